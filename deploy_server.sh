@@ -1,2 +1,2 @@
 #!/bin/bash
-scp -o BatchMode=yes -o StrictHostKeyChecking=no mc-server/command_server.py root@192.168.0.99:/root/mc-server/command_server.py
+scp -r -o BatchMode=yes -o StrictHostKeyChecking=no mc-server/command_server.py mc-server/gunicorn.conf.py mc-server/blueprints root@192.168.0.99:/root/mc-server/
@@ -0,0 +1,452 @@
+"""Local CalDAV mirror kept current with RFC 6578 sync-collection reports.
+
+Each calendar is mirrored as {href: {etag, data}}. A sync asks Nextcloud only
+for what changed since the last sync-token, then fetches the changed objects
+with one calendar-multiget per batch. Read endpoints serve events and tasks
+from the mirror; writes call invalidate(), which bumps a per-calendar
+generation stamp in caldav_stamp_dir, so the next read in every server
+process picks them up.
+
+Reads also fill a per-calendar UID index of (href, etag, data) so updates
+and deletes can go straight to a conditional PUT/DELETE without first
+searching for the object with a UID text-match REPORT.
+"""
+import os
+import re
+import heapq
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape as xml_escape
+
+from .shared import (CONFIG, CalDAVError, caldav_request, caldav_url, caldav_query,
+                     iter_multistatus, iter_ical_events, iter_ical_todos,
+                     time_range_filter, parse_date, read_generation, bump_generation)
+
+MULTIGET_BATCH = 100
+
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+
+def _entry(calendar):
+    with _mirrors_lock:
+        entry = _mirrors.get(calendar)
+        if entry is None:
+            entry = {
+                'lock': threading.Lock(),
+                'token': None,
+                'objects': {},
+                'synced_at': 0.0,
+                'generation': 0,
+                'uids': {},
+            }
+            _mirrors[calendar] = entry
+        return entry
+
+
+def _sync_collection(calendar, token):
+    """Return ({href: etag or None}, new_token) for changes since token."""
+    body = """<?xml version="1.0" encoding="utf-8" ?>
+<D:sync-collection xmlns:D="DAV:">
+  <D:sync-token>{token}</D:sync-token>
+  <D:sync-level>1</D:sync-level>
+  <D:prop>
+    <D:getetag/>
+  </D:prop>
+</D:sync-collection>""".format(token=xml_escape(token or ''))
+
+    r = caldav_request(
+        "REPORT",
+        caldav_url(calendar),
+        data=body,
+        headers={"Content-Type": "application/xml; charset=utf-8", "Depth": "0"},
+        stream=True
+    )
+    if r.status_code not in (200, 207):
+        raise CalDAVError(r.status_code, r.text[:500])
+
+    meta = {}
+    changes = {}
+    for href, etag, _ in iter_multistatus(r, meta):
+        if href.endswith('/'):
+            continue  # the collection itself
+        changes[href] = etag
+    return changes, meta.get('sync-token')
+
+
+def _multiget(calendar, hrefs):
+    """Yield (href, etag, calendar-data) for hrefs, MULTIGET_BATCH per REPORT."""
+    for i in range(0, len(hrefs), MULTIGET_BATCH):
+        batch = hrefs[i:i + MULTIGET_BATCH]
+        body = """<?xml version="1.0" encoding="utf-8" ?>
+<C:calendar-multiget xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">
+  <D:prop>
+    <D:getetag/>
+    <C:calendar-data/>
+  </D:prop>
+  {hrefs}
+</C:calendar-multiget>""".format(hrefs="\n  ".join("<D:href>" + xml_escape(h) + "</D:href>" for h in batch))
+
+        r = caldav_request(
+            "REPORT",
+            caldav_url(calendar),
+            data=body,
+            headers={"Content-Type": "application/xml; charset=utf-8", "Depth": "1"},
+            stream=True
+        )
+        if r.status_code not in (200, 207):
+            raise CalDAVError(r.status_code, r.text[:500])
+        for item in iter_multistatus(r):
+            yield item
+
+
+def _sync(calendar, entry):
+    """Pull changes since the stored token into the mirror (caller holds entry lock)."""
+    objects = dict(entry['objects'])
+    full = entry['token'] is None
+    try:
+        changes, token = _sync_collection(calendar, entry['token'])
+    except CalDAVError as e:
+        if full or e.status not in (403, 409):
+            raise
+        # DAV:valid-sync-token precondition failed — start over, keeping
+        # objects whose etag is unchanged
+        changes, token = _sync_collection(calendar, None)
+        full = True
+
+    if full:
+        # A full sync returns every member; anything we held is gone otherwise
+        for href in set(objects) - set(changes):
+            del objects[href]
+
+    fetch = []
+    for href, etag in changes.items():
+        if etag is None:
+            objects.pop(href, None)
+        elif href not in objects or objects[href]['etag'] != etag:
+            fetch.append(href)
+
+    for href, etag, data in _multiget(calendar, fetch):
+        if data is None:
+            objects.pop(href, None)
+        else:
+            objects[href] = {'etag': etag, 'data': data}
+
+    entry['objects'] = objects
+    entry['token'] = token
+    entry['synced_at'] = time.monotonic()
+
+
+def _stamp_path(calendar):
+    return os.path.join(CONFIG['caldav_stamp_dir'],
+                        'caldav-' + re.sub(r'[^A-Za-z0-9_.-]', '_', calendar) + '.generation')
+
+
+def _fresh(entry, generation):
+    return (entry['generation'] == generation
+            and time.monotonic() - entry['synced_at'] < CONFIG['caldav_sync_interval'])
+
+
+def mirror_objects(calendar):
+    """Return the mirrored {href: object} map for a calendar, syncing if stale.
+
+    Nextcloud is contacted at most once per caldav_sync_interval per calendar,
+    or sooner once any process has invalidated it. A failed sync serves the
+    last good copy; with no copy yet it raises.
+    """
+    entry = _entry(calendar)
+    if _fresh(entry, read_generation(_stamp_path(calendar))):
+        return entry['objects']
+    with entry['lock']:
+        # Another request may have synced while we waited. The generation is
+        # read before syncing, so a write landing mid-sync forces another.
+        generation = read_generation(_stamp_path(calendar))
+        if not _fresh(entry, generation):
+            try:
+                _sync(calendar, entry)
+                entry['generation'] = generation
+            except Exception as e:
+                if entry['token'] is None:
+                    raise
+                print("CalDAV sync of " + calendar + " failed, serving mirror: " + str(e))
+        return entry['objects']
+
+
+def invalidate(calendar):
+    """Force the next read of a calendar to sync in every process (call after writes)."""
+    _entry(calendar)['synced_at'] = 0.0
+    try:
+        bump_generation(_stamp_path(calendar))
+    except OSError as e:
+        print("Could not bump the CalDAV generation of " + calendar + ": " + str(e))
+
+
+def _records(obj, kind):
+    """Parse an object's components once and keep them alongside the data."""
+    records = obj.get(kind)
+    if records is None:
+        parse = iter_ical_events if kind == 'events' else iter_ical_todos
+        records = obj[kind] = list(parse(obj['data']))
+    return records
+
+
+def _to_iso(stamp):
+    """'20260215T120000Z' -> '2026-02-15T12:00:00' for string range checks."""
+    return parse_date(stamp) or ''
+
+
+# Step per FREQ, rounded up so COUNT gives an upper bound on the last start
+_FREQ_STEP = {
+    'SECONDLY': timedelta(seconds=1), 'MINUTELY': timedelta(minutes=1),
+    'HOURLY': timedelta(hours=1), 'DAILY': timedelta(days=1),
+    'WEEKLY': timedelta(weeks=1), 'MONTHLY': timedelta(days=31),
+    'YEARLY': timedelta(days=366),
+}
+# BYxxx parts that only add occurrences within each period; any other can
+# skip periods, after which COUNT no longer bounds the series
+_EXPANDING = {'WEEKLY': {'BYDAY', 'WKST'}, 'YEARLY': {'BYMONTH'}}
+
+
+def _ical_datetime(value, tzid=None):
+    """iCal DATE/DATE-TIME -> naive datetime (UTC when it carries Z or a known
+    TZID, floating otherwise), or None."""
+    iso = parse_date(value)
+    try:
+        dt = datetime.fromisoformat(iso) if iso else None
+    except ValueError:
+        return None
+    if dt is not None and tzid and not value.endswith('Z'):
+        try:
+            dt = dt.replace(tzinfo=ZoneInfo(tzid)).astimezone(timezone.utc).replace(tzinfo=None)
+        except (ValueError, ZoneInfoNotFoundError):
+            pass
+    return dt
+
+
+def _last_start(rrule, first, all_day):
+    """Latest possible occurrence start of an RRULE series, or None if unbounded."""
+    parts = dict(p.split('=', 1) for p in rrule.upper().split(';') if '=' in p)
+    if 'UNTIL' in parts:
+        until = _ical_datetime(parts['UNTIL'])
+        if until is not None and len(parts['UNTIL']) == 8 and not all_day:
+            until += timedelta(days=1) - timedelta(seconds=1)   # a date UNTIL covers the whole day
+        return until
+    if 'COUNT' in parts:
+        freq = parts.get('FREQ')
+        by = {k for k in parts if k.startswith('BY') or k == 'WKST'}
+        if freq not in _FREQ_STEP or not by <= _EXPANDING.get(freq, set()):
+            return None
+        try:
+            periods = (max(int(parts['COUNT']), 1) - 1) * max(int(parts.get('INTERVAL', 1)), 1)
+        except ValueError:
+            return None
+        # Expanding parts can place occurrences anywhere in the last period
+        return first + _FREQ_STEP[freq] * (periods + (1 if by - {'WKST'} else 0))
+    return None
+
+
+def _event_overlaps(ev, start_iso, end_iso):
+    """CalDAV time-range overlap (RFC 4791 9.9) of an event with [start, end).
+
+    DTEND is exclusive; an all-day event without one lasts a day and a timed
+    one is an instant. TZID times are compared in UTC. A recurring event
+    overlaps if any occurrence between its first and the last its UNTIL or
+    COUNT allows could; EXDATE and limiting BYxxx parts are not expanded.
+    """
+    ev_start = _ical_datetime(ev.get('dtstart', ''), ev.get('tzid'))
+    if ev_start is None:
+        return False
+    window_start = datetime.fromisoformat(start_iso)
+    window_end = datetime.fromisoformat(end_iso)
+    if ev_start >= window_end:
+        return False
+    all_day = len(ev.get('dtstart', '')) == 8
+    ev_end = _ical_datetime(ev.get('dtend', ''), ev.get('dtendTzid', ev.get('tzid')))
+    if ev_end is None or ev_end < ev_start:
+        ev_end = ev_start + timedelta(days=1) if all_day else ev_start
+    duration = ev_end - ev_start
+    rrule = ev.get('rrule')
+    if rrule:
+        last = _last_start(rrule, ev_start, all_day)
+        if last is None:
+            return True
+        ev_end = last + duration
+    if duration:
+        return ev_end > window_start
+    return ev_end >= window_start
+
+
+def iter_events(calendar, start, end):
+    """Yield (href, etag, event) for VEVENTs overlapping [start, end) (iCal UTC stamps)."""
+    uids = _entry(calendar)['uids']
+    if not CONFIG['caldav_mirror']:
+        for href, etag, data in caldav_query(calendar, time_range_filter("VEVENT", start, end)):
+            if data:
+                for ev in iter_ical_events(data):
+                    uids[ev.get('uid')] = (href, etag, data)
+                    yield href, etag, ev
+        return
+
+    start_iso, end_iso = _to_iso(start), _to_iso(end)
+    for href, obj in mirror_objects(calendar).items():
+        for ev in _records(obj, 'events'):
+            uids[ev.get('uid')] = (href, obj['etag'], obj['data'])
+            if _event_overlaps(ev, start_iso, end_iso):
+                yield href, obj['etag'], ev
+
+
+def iter_todos(calendar, comp_filter=None):
+    """Yield (href, etag, todo) for VTODOs in a calendar.
+
+    comp_filter narrows the live calendar-query; the mirror already holds
+    every task, so callers must still apply their own predicates.
+    """
+    uids = _entry(calendar)['uids']
+    if not CONFIG['caldav_mirror']:
+        for href, etag, data in caldav_query(calendar, comp_filter or '<C:comp-filter name="VTODO"/>'):
+            if data:
+                for todo in iter_ical_todos(data):
+                    uids[todo.get('uid')] = (href, etag, data)
+                    yield href, etag, todo
+        return
+
+    for href, obj in mirror_objects(calendar).items():
+        for todo in _records(obj, 'todos'):
+            uids[todo.get('uid')] = (href, obj['etag'], obj['data'])
+            yield href, obj['etag'], todo
+
+
+# --- UID Index ---
+
+def lookup(calendar, uid):
+    """Return the indexed (href, etag, data) for a UID, or None. No network."""
+    return _entry(calendar)['uids'].get(uid)
+
+
+def remember(calendar, uid, href, etag, data=None):
+    """Record a successful write; without an ETag the entry is dropped instead."""
+    uids = _entry(calendar)['uids']
+    if etag:
+        uids[uid] = (href, etag, data)
+    else:
+        uids.pop(uid, None)
+
+
+def forget(calendar, uid):
+    """Drop a UID from the index (after a delete, 404 or 412)."""
+    _entry(calendar)['uids'].pop(uid, None)
+
+
+def lookup_remote(calendar, uid, component='VTODO'):
+    """Find a UID with a text-match REPORT, index it and return (href, etag, data) or None."""
+    comp_filter = """<C:comp-filter name="{component}">
+        <C:prop-filter name="UID">
+          <C:text-match collation="i;octet">{uid}</C:text-match>
+        </C:prop-filter>
+      </C:comp-filter>""".format(component=component, uid=xml_escape(uid))
+    for href, etag, data in caldav_query(calendar, comp_filter):
+        if data:
+            remember(calendar, uid, href, etag, data)
+            return href, etag, data
+    return None
+
+
+def delete_uid(calendar, uid, component='VTODO', etag=None):
+    """Delete the object holding a UID; True if deleted, False if it does not exist.
+
+    The indexed href is deleted with If-Match; a 404 or 412 (stale index)
+    falls back to lookup_remote() and one more conditional DELETE. A caller
+    etag is used as the If-Match as-is, so a mismatch raises CalDAVError(412).
+    """
+    hit = lookup(calendar, uid)
+    if hit and (etag is None or hit[1] == etag):
+        r = _conditional_delete(hit)
+        forget(calendar, uid)
+        if r.status_code in (200, 204):
+            return True
+        if r.status_code not in (404, 412) or (etag and r.status_code == 412):
+            raise CalDAVError(r.status_code, r.text[:500])
+
+    hit = lookup_remote(calendar, uid, component)
+    if hit is None:
+        return False
+    r = _conditional_delete((hit[0], etag or hit[1], None))
+    forget(calendar, uid)
+    if r.status_code not in (200, 204):
+        raise CalDAVError(r.status_code, r.text[:500])
+    return True
+
+
+def _conditional_delete(hit):
+    href, etag, _ = hit
+    return caldav_request("DELETE", CONFIG['nextcloud_url'] + href,
+                          headers={"If-Match": etag} if etag else {})
+
+
+# --- Multi-calendar Fan-out ---
+
+CALENDAR_PALETTE = ('#4a6741', '#2d7d46', '#3b6ea5', '#a5603b',
+                    '#7a4aa5', '#a53b5e', '#3ba59a', '#a5913b')
+
+_colors = {}
+
+
+def calendar_color(calendar):
+    """Return a calendar's #rrggbb colour (Nextcloud calendar-color, cached).
+
+    Calendars without a colour get a stable palette entry; a failed PROPFIND
+    also falls back to the palette but is retried on the next call.
+    """
+    color = _colors.get(calendar)
+    if color:
+        return color
+    fallback = CALENDAR_PALETTE[zlib.crc32(calendar.encode()) % len(CALENDAR_PALETTE)]
+    try:
+        r = caldav_request(
+            "PROPFIND",
+            caldav_url(calendar),
+            data="""<?xml version="1.0" encoding="utf-8" ?>
+<D:propfind xmlns:D="DAV:" xmlns:I="http://apple.com/ns/ical/">
+  <D:prop><I:calendar-color/></D:prop>
+</D:propfind>""",
+            headers={"Content-Type": "application/xml; charset=utf-8", "Depth": "0"}
+        )
+        if r.status_code != 207:
+            return fallback
+        el = ET.fromstring(r.content).find('.//{http://apple.com/ns/ical/}calendar-color')
+    except Exception:
+        return fallback
+    color = (el.text or '').strip()[:7] if el is not None else ''
+    _colors[calendar] = color if len(color) == 7 and color.startswith('#') else fallback
+    return _colors[calendar]
+
+
+def fan_out(calendars, fetch, key):
+    """Run fetch(calendar) -> list for every calendar concurrently.
+
+    Each list is sorted by key and the runs are k-way merged, so the cost is
+    the slowest calendar rather than the sum. Returns (items, errors) with one
+    {"calendar", "error"[, "status", "body"]} per calendar that failed.
+    """
+    def run(calendar):
+        return sorted(fetch(calendar), key=key)
+
+    workers = max(1, min(len(calendars), CONFIG['nextcloud_pool_size']))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(calendar, pool.submit(run, calendar)) for calendar in calendars]
+
+    runs, errors = [], []
+    for calendar, future in futures:
+        try:
+            runs.append(future.result())
+        except CalDAVError as e:
+            errors.append({"calendar": calendar, "error": "CalDAV request failed",
+                           "status": e.status, "body": e.body})
+        except Exception as e:
+            errors.append({"calendar": calendar, "error": str(e)})
+    return list(heapq.merge(*runs, key=key)), errors
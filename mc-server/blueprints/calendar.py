@@ -1,81 +1,63 @@
 """Nextcloud Calendar Events — read, create, delete."""
 import uuid
 from datetime import datetime, timedelta
-from xml.etree import ElementTree as ET
 
-import requests as http_requests
 from flask import Blueprint, request, jsonify
 
-from .shared import (CONFIG, nextcloud_auth, nextcloud_configured,
-                     caldav_url, parse_ical_events, parse_date, ical_escape_text)
+from .shared import (CONFIG, caldav_request, nextcloud_configured,
+                     caldav_url, parse_date, ical_escape_text)
+from .caldav_mirror import (iter_events, invalidate, lookup, remember, delete_uid, calendar_color,
+                            fan_out)
 
 bp = Blueprint('calendar', __name__)
 
 
 @bp.route('/api/calendar-events', methods=['GET'])
 def get_calendar_events():
-    """Fetch upcoming events from Nextcloud CalDAV."""
+    """Fetch upcoming events from one or more Nextcloud calendars.
+
+    calendars=a,b queries each concurrently and merges them by start time;
+    calendar=a is the single-calendar form. Calendars that fail are listed
+    in errors; the request only fails when all of them do.
+    """
     if not nextcloud_configured():
         return jsonify({"error": "Nextcloud not configured"}), 500
 
     days = int(request.args.get('days', 30))
     target_calendar = request.args.get('calendar')
+    if request.args.get('calendars'):
+        calendars = [c.strip() for c in request.args['calendars'].split(',') if c.strip()]
+    elif target_calendar:
+        calendars = [target_calendar]
+    else:
+        calendars = CONFIG['nextcloud_calendars']
     now = datetime.utcnow()
     start = (now - timedelta(days=7)).strftime("%Y%m%dT%H%M%SZ")
     end = (now + timedelta(days=days)).strftime("%Y%m%dT%H%M%SZ")
 
-    cal_url = caldav_url(target_calendar)
-
-    report_body = """<?xml version="1.0" encoding="utf-8" ?>
-<C:calendar-query xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">
-  <D:prop>
-    <D:getetag/>
-    <C:calendar-data/>
-  </D:prop>
-  <C:filter>
-    <C:comp-filter name="VCALENDAR">
-      <C:comp-filter name="VEVENT">
-        <C:time-range start="{start}" end="{end}"/>
-      </C:comp-filter>
-    </C:comp-filter>
-  </C:filter>
-</C:calendar-query>""".format(start=start, end=end)
+    def fetch(calendar):
+        color = calendar_color(calendar)
+        events = []
+        for _, _, ev in iter_events(calendar, start, end):
+            cats = ev.get("categories", [])
+            events.append({
+                "id": ev.get("uid", ""),
+                "title": ev.get("summary", "Untitled"),
+                "startDate": parse_date(ev.get("dtstart", "")),
+                "endDate": parse_date(ev.get("dtend", "")),
+                "allDay": ev.get("allDay", False),
+                "category": cats[0] if cats else "personal",
+                "description": ev.get("description", ""),
+                "calendar": calendar,
+                "color": color,
+            })
+        return events
 
     try:
-        r = http_requests.request(
-            "REPORT",
-            cal_url,
-            data=report_body,
-            headers={"Content-Type": "application/xml; charset=utf-8", "Depth": "1"},
-            auth=nextcloud_auth(),
-            timeout=15
-        )
-
-        if r.status_code not in (200, 207):
-            return jsonify({"error": "CalDAV request failed", "status": r.status_code, "body": r.text[:500]}), 502
-
-        root = ET.fromstring(r.text)
-        ns = {"D": "DAV:", "C": "urn:ietf:params:xml:ns:caldav"}
-
-        events = []
-        for response in root.findall(".//D:response", ns):
-            cal_data_el = response.find(".//C:calendar-data", ns)
-            if cal_data_el is not None and cal_data_el.text:
-                parsed = parse_ical_events(cal_data_el.text)
-                for ev in parsed:
-                    cats = ev.get("categories", [])
-                    events.append({
-                        "id": ev.get("uid", ""),
-                        "title": ev.get("summary", "Untitled"),
-                        "startDate": parse_date(ev.get("dtstart", "")),
-                        "endDate": parse_date(ev.get("dtend", "")),
-                        "allDay": ev.get("allDay", False),
-                        "category": cats[0] if cats else "personal",
-                        "description": ev.get("description", ""),
-                    })
-
-        events.sort(key=lambda e: e.get("startDate") or "")
-        return jsonify({"events": events, "count": len(events)}), 200
+        events, errors = fan_out(calendars, fetch, key=lambda e: e.get("startDate") or "")
+        if errors and len(errors) == len(calendars):
+            return jsonify(dict(errors[0], errors=errors)), 502
+        return jsonify({"events": events, "count": len(events), "errors": errors}), 200
 
     except Exception as e:
         return jsonify({"error": "Failed to fetch calendar events", "details": str(e)}), 502
@@ -144,14 +126,16 @@ def create_calendar_event():
 
     try:
         put_url = caldav_url(target_calendar) + uid + ".ics"
-        r = http_requests.put(
+        r = caldav_request(
+            "PUT",
             put_url,
             data=ical.encode('utf-8'),
-            headers={"Content-Type": "text/calendar; charset=utf-8"},
-            auth=nextcloud_auth(),
-            timeout=10
+            headers={"Content-Type": "text/calendar; charset=utf-8"}
         )
         if r.status_code in (200, 201, 204):
+            calendar = target_calendar or CONFIG['nextcloud_calendar']
+            remember(calendar, uid, put_url[len(CONFIG['nextcloud_url']):], r.headers.get("ETag"), ical)
+            invalidate(calendar)
             return jsonify({"id": uid, "title": title, "created": True}), 201
         else:
             return jsonify({"error": "CalDAV PUT failed", "status": r.status_code, "body": r.text[:300]}), 502
@@ -159,69 +143,41 @@ def create_calendar_event():
         return jsonify({"error": "Failed to create event", "details": str(e)}), 502
 
 
+def _delete_event(calendar, event_uid):
+    """Delete an event from one calendar; False if it is not there."""
+    if lookup(calendar, event_uid) is None:
+        # Not indexed yet: try direct deletion with UID as filename
+        try:
+            r = caldav_request("DELETE", caldav_url(calendar) + event_uid + ".ics")
+            if r.status_code in (200, 204):
+                return True
+        except Exception:
+            pass
+    return delete_uid(calendar, event_uid, "VEVENT")
+
+
 @bp.route('/api/calendar-events/<event_uid>', methods=['DELETE'])
 def delete_calendar_event(event_uid):
-    """Delete an event from Nextcloud CalDAV."""
+    """Delete an event from Nextcloud CalDAV.
+
+    calendar=a deletes from that calendar (one of NEXTCLOUD_CALENDARS, as the
+    GET tags each event); without it every configured calendar is tried,
+    the default one first.
+    """
     if not nextcloud_configured():
         return jsonify({"error": "Nextcloud not configured"}), 500
 
-    cal_base = caldav_url()
-
-    # Try direct deletion with UID as filename
-    try:
-        r = http_requests.delete(
-            cal_base + event_uid + ".ics",
-            auth=nextcloud_auth(),
-            timeout=10
-        )
-        if r.status_code in (200, 204):
-            return jsonify({"deleted": True, "id": event_uid}), 200
-    except:
-        pass
-
-    # Search for the event by UID
-    report_body = """<?xml version="1.0" encoding="utf-8" ?>
-<C:calendar-query xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">
-  <D:prop>
-    <D:getetag/>
-    <C:calendar-data/>
-  </D:prop>
-  <C:filter>
-    <C:comp-filter name="VCALENDAR">
-      <C:comp-filter name="VEVENT">
-        <C:prop-filter name="UID">
-          <C:text-match collation="i;octet">{uid}</C:text-match>
-        </C:prop-filter>
-      </C:comp-filter>
-    </C:comp-filter>
-  </C:filter>
-</C:calendar-query>""".format(uid=event_uid)
+    configured = list(dict.fromkeys([CONFIG['nextcloud_calendar']] + CONFIG['nextcloud_calendars']))
+    target_calendar = request.args.get('calendar')
+    if target_calendar and target_calendar not in configured:
+        return jsonify({"error": "Unknown calendar", "calendar": target_calendar,
+                        "calendars": configured}), 400
 
     try:
-        r = http_requests.request(
-            "REPORT",
-            cal_base,
-            data=report_body,
-            headers={"Content-Type": "application/xml; charset=utf-8", "Depth": "1"},
-            auth=nextcloud_auth(),
-            timeout=10
-        )
-
-        if r.status_code in (200, 207):
-            root = ET.fromstring(r.text)
-            ns = {"D": "DAV:"}
-            for response in root.findall(".//D:response", ns):
-                href_el = response.find("D:href", ns)
-                if href_el is not None and href_el.text:
-                    delete_url = CONFIG['nextcloud_url'] + href_el.text
-                    dr = http_requests.delete(
-                        delete_url,
-                        auth=nextcloud_auth(),
-                        timeout=10
-                    )
-                    if dr.status_code in (200, 204):
-                        return jsonify({"deleted": True, "id": event_uid}), 200
-
+        for calendar in [target_calendar] if target_calendar else configured:
+            if _delete_event(calendar, event_uid):
+                invalidate(calendar)
+                return jsonify({"deleted": True, "id": event_uid, "calendar": calendar}), 200
         return jsonify({"error": "Event not found", "id": event_uid}), 404
 
     except Exception as e:
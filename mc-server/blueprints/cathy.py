@@ -1,21 +1,20 @@
 """Cathy Comics Bot — daily comic post tracking."""
-import json
 from datetime import date, datetime
 
 from flask import Blueprint, request, jsonify
 
+from .shared import depends_on, serialize_writes
+from . import storage
+
 bp = Blueprint('cathy', __name__)
 
 CATHY_POSTS_FILE = '/opt/cathy-posts.json'
+serialize_writes(bp, CATHY_POSTS_FILE + '.lock')
 
 
 def _load_cathy_posts():
     """Load cathy posts, auto-migrating from old single-day format if needed."""
-    try:
-        with open(CATHY_POSTS_FILE, 'r') as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {"dates": {}}
+    data = storage.load(CATHY_POSTS_FILE, {"dates": {}})
 
     # Auto-migrate old format: {"date": "...", "posts": [...]}
     if "date" in data and "posts" in data and "dates" not in data:
@@ -31,11 +30,11 @@ def _load_cathy_posts():
 
 
 def _save_cathy_posts(data):
-    with open(CATHY_POSTS_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+    storage.save(CATHY_POSTS_FILE, data, indent=2)
 
 
 @bp.route('/api/cathy-today', methods=['GET'])
+@depends_on(CATHY_POSTS_FILE)
 def get_cathy_today():
     """Return Cathy comics for a given date (default today) with prev/next nav."""
     data = _load_cathy_posts()
@@ -1,11 +1,22 @@
 """Operation Darrentan — financial planning: gates, timeline, goals, risks, expenses."""
+import io
 import os
-import json
+import re
+import csv
+import html
+import hashlib
+import itertools
+import secrets
+import threading
 import uuid
 from datetime import datetime
 
+import numpy as np
 from flask import Blueprint, request, jsonify
 
+from .shared import CONFIG, depends_on, serialize_writes, date_window, month_window
+from . import storage, projection, gategraph
+
 bp = Blueprint('financials', __name__)
 
 FINANCIALS_DIR = '/opt/financials'
@@ -19,21 +30,20 @@ SCENARIOS_FILE = os.path.join(FINANCIALS_DIR, 'scenarios.json')
 RD_LOG_FILE = os.path.join(FINANCIALS_DIR, 'rd-log.json')
 
 os.makedirs(FINANCIALS_DIR, exist_ok=True)
+serialize_writes(bp, os.path.join(FINANCIALS_DIR, '.lock'))
+storage.register_table(EXPENSES_FILE, 'expenses', wrapper='expenses',
+                       fields=('date', 'category', 'classification'), indent=2)
+storage.register_table(RD_LOG_FILE, 'rd_log', wrapper='entries', indent=2)
 
 
 # --- JSON helpers ---
 
 def _load(filepath, default_key='items'):
-    try:
-        with open(filepath, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {default_key: []}
+    return storage.load(filepath, {default_key: []})
 
 
 def _save(filepath, data):
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2)
+    storage.save(filepath, data, indent=2)
 
 
 def _gen_id():
@@ -52,16 +62,69 @@ def _save_gates(data):
     _save(GATES_FILE, data)
 
 
+CRITICAL_GATE = 'notice-given'
+
+# Gate graph for this process, tagged with the gates store version it was
+# built from. Status changes made here are applied to it incrementally; any
+# other write (dependencies, another worker) makes it rebuild on next use.
+_gate_graph = {'version': None, 'graph': None}
+_gate_graph_lock = threading.Lock()
+
+
+def _current_gate_graph():
+    """The graph for the gates store as it is now. Call with _gate_graph_lock held."""
+    version = storage.store_version(GATES_FILE)
+    if _gate_graph['version'] != version:
+        gates = _load_gates().get('gates', [])
+        _gate_graph.update(version=version, graph=gategraph.build(gates))
+    return _gate_graph['graph']
+
+
+def _cycle_error(cycle):
+    return jsonify({"error": str(gategraph.CycleError(cycle)), "cycle": cycle}), 400
+
+
+def _gate_id_error(e):
+    # Only a hand-edited gates file can hold these; create_gate refuses them
+    return jsonify({"error": str(e), "ids": e.ids}), 409
+
+
 @bp.route('/api/financials/gates', methods=['GET'])
+@depends_on(GATES_FILE)
 def list_gates():
-    data = _load_gates()
-    gates = data.get('gates', [])
-    # Compute dependency status for each gate
-    completed_ids = {g['id'] for g in gates if g.get('status') == 'completed'}
-    for g in gates:
-        deps = g.get('dependencies', [])
-        g['depsReady'] = all(d in completed_ids for d in deps)
-    return jsonify({"gates": gates}), 200
+    """Gates in file order with dependency readiness, plus the critical path.
+
+    depsReady: every direct dependency is completed. blockers: every open
+    gate (or unknown id) upstream, transitively. ?target= picks the gate the
+    critical path leads to (default notice-given).
+    """
+    target = request.args.get('target', CRITICAL_GATE)
+    with _gate_graph_lock:
+        try:
+            graph = _current_gate_graph()
+        except gategraph.GateIdError as e:
+            return _gate_id_error(e)
+        position = {gid: i for i, gid in enumerate(graph['order'])}
+        gates = []
+        for gid, g in graph['gates'].items():
+            blockers = graph['blockers'][gid]
+            gates.append({
+                **g,
+                "depsReady": not any(d in blockers for d in graph['deps'][gid]),
+                "blockers": sorted(blockers, key=lambda b: position.get(b, len(position))),
+                "topoIndex": position[gid],
+            })
+        path = gategraph.critical_path(graph, target)
+        order = list(graph['order'])
+        cyclic = list(graph['cyclic'])
+
+    return jsonify({
+        "gates": gates,
+        "order": order,
+        "criticalPath": {"target": target, "gates": path,
+                         "remaining": len(path) if path is not None else None},
+        "cycles": cyclic,
+    }), 200
 
 
 @bp.route('/api/financials/gates', methods=['POST'])
@@ -81,6 +144,16 @@ def create_gate():
         "sortOrder": body.get('sortOrder', len(data.get('gates', [])) + 1),
         "createdAt": datetime.now().isoformat(),
     }
+    with _gate_graph_lock:
+        try:
+            graph = _current_gate_graph()
+        except gategraph.GateIdError as e:
+            return _gate_id_error(e)
+        if gate['id'] in graph['gates']:
+            return jsonify({"error": "Gate id already exists", "id": gate['id']}), 400
+        cycle = gategraph.find_cycle(graph, gate['id'], gate['dependencies'])
+    if cycle:
+        return _cycle_error(cycle)
     data.setdefault('gates', []).append(gate)
     _save_gates(data)
     return jsonify(gate), 201
@@ -93,14 +166,31 @@ def update_gate(gate_id):
         return jsonify({"error": "Request body required"}), 400
     data = _load_gates()
     for i, g in enumerate(data.get('gates', [])):
-        if g['id'] == gate_id:
-            for key in ('label', 'description', 'status', 'phase',
-                        'dependencies', 'evidence', 'sortOrder'):
-                if key in body:
-                    g[key] = body[key]
-            g['updatedAt'] = datetime.now().isoformat()
-            data['gates'][i] = g
-            _save_gates(data)
+        if g.get('id') == gate_id:
+            with _gate_graph_lock:
+                try:
+                    graph = _current_gate_graph()
+                except gategraph.GateIdError as e:
+                    return _gate_id_error(e)
+                if 'dependencies' in body:
+                    cycle = gategraph.find_cycle(graph, gate_id, body['dependencies'] or [])
+                    if cycle:
+                        return _cycle_error(cycle)
+                structural = any(key in body and body[key] != g.get(key)
+                                 for key in ('dependencies', 'sortOrder'))
+                for key in ('label', 'description', 'status', 'phase',
+                            'dependencies', 'evidence', 'sortOrder'):
+                    if key in body:
+                        g[key] = body[key]
+                g['updatedAt'] = datetime.now().isoformat()
+                data['gates'][i] = g
+                _save_gates(data)
+                # Writes hold the store lock, so the graph was current up to
+                # this save; carry it forward instead of rebuilding
+                if not structural:
+                    graph['gates'][gate_id].update({k: v for k, v in g.items() if k != 'status'})
+                    gategraph.set_status(graph, gate_id, g.get('status'))
+                    _gate_graph['version'] = storage.store_version(GATES_FILE)
             return jsonify(g), 200
     return jsonify({"error": "Gate not found"}), 404
 
@@ -194,6 +284,7 @@ def _save_timeline(data):
 
 
 @bp.route('/api/financials/timeline', methods=['GET'])
+@depends_on(TIMELINE_FILE)
 def list_milestones():
     data = _load_timeline()
     return jsonify({"milestones": data.get('milestones', [])}), 200
@@ -262,6 +353,7 @@ def _save_goals(data):
 
 
 @bp.route('/api/financials/goals', methods=['GET'])
+@depends_on(GOALS_FILE)
 def list_goals():
     data = _load_goals()
     return jsonify({"goals": data.get('goals', [])}), 200
@@ -411,6 +503,7 @@ def _save_risks(data):
 
 
 @bp.route('/api/financials/risks', methods=['GET'])
+@depends_on(RISKS_FILE)
 def list_risks():
     data = _load_risks()
     risks = data.get('risks', [])
@@ -552,43 +645,61 @@ EXPENSE_CATEGORIES = [
     {"id": "other", "label": "Other", "icon": "📌"},
 ]
 
+EXPENSE_CLASSIFICATIONS = ('business', 'personal', 'mixed')
+
+
+def _fold_expense_month(months, e):
+    """Per-month partition rollup: total, count, and amounts by category/classification.
 
-def _load_expenses():
-    return _load(EXPENSES_FILE, 'expenses')
+    Undated expenses go to the '' partition, which no month summary includes.
+    """
+    m = months.setdefault(str(e.get('date') or '')[:7], {
+        "total": 0, "count": 0, "byCategory": {}, "byClassification": {},
+    })
+    amount = e.get('amount', 0)
+    cat = e.get('category', 'other')
+    cls = e.get('classification')
+    m["total"] += amount
+    m["count"] += 1
+    m["byCategory"][cat] = m["byCategory"].get(cat, 0) + amount
+    m["byClassification"][cls] = m["byClassification"].get(cls, 0) + amount
 
 
-def _save_expenses(data):
-    _save(EXPENSES_FILE, data)
+storage.register_aggregate(EXPENSES_FILE, 'months', dict, _fold_expense_month)
 
 
 @bp.route('/api/financials/categories', methods=['GET'])
+@depends_on()
 def list_categories():
     return jsonify({"categories": EXPENSE_CATEGORIES}), 200
 
 
 @bp.route('/api/financials/expenses', methods=['GET'])
+@depends_on(EXPENSES_FILE)
 def list_expenses():
-    data = _load_expenses()
-    expenses = data.get('expenses', [])
-    # Filters
-    month = request.args.get('month')  # YYYY-MM
+    # Filters: ?month=YYYY-MM (or YYYY) or ?from=&to= (newest first), ?category=, ?classification=
+    try:
+        since, until = date_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": "invalid date filter", "details": str(e)}), 400
     category = request.args.get('category')
     classification = request.args.get('classification')
 
-    if month:
-        expenses = [e for e in expenses if e.get('date', '').startswith(month)]
-    if category:
-        expenses = [e for e in expenses if e.get('category') == category]
-    if classification:
-        expenses = [e for e in expenses if e.get('classification') == classification]
-
-    # Sort by date descending
-    expenses.sort(key=lambda e: e.get('date', ''), reverse=True)
-
-    # Compute totals
-    total = sum(e.get('amount', 0) for e in expenses)
-    business_total = sum(e.get('amount', 0) for e in expenses if e.get('classification') == 'business')
-    personal_total = sum(e.get('amount', 0) for e in expenses if e.get('classification') == 'personal')
+    # One pass over the date window: filter and total together
+    expenses = []
+    total = business_total = personal_total = 0
+    for e in storage.rows_by_date(EXPENSES_FILE, since, until):
+        if category and e.get('category') != category:
+            continue
+        if classification and e.get('classification') != classification:
+            continue
+        expenses.append(e)
+        amount = e.get('amount', 0)
+        total += amount
+        if e.get('classification') == 'business':
+            business_total += amount
+        elif e.get('classification') == 'personal':
+            personal_total += amount
 
     return jsonify({
         "expenses": expenses,
@@ -604,7 +715,8 @@ def create_expense():
     body = request.get_json()
     if not body or not body.get('amount'):
         return jsonify({"error": "amount is required"}), 400
-    data = _load_expenses()
+    if body.get('classification', 'personal') not in EXPENSE_CLASSIFICATIONS:
+        return jsonify({"error": "classification must be one of: " + ', '.join(EXPENSE_CLASSIFICATIONS)}), 400
     expense = {
         "id": _gen_id(),
         "date": body.get('date', datetime.now().strftime('%Y-%m-%d')),
@@ -616,30 +728,32 @@ def create_expense():
         "rewardCard": body.get('rewardCard'),
         "createdAt": datetime.now().isoformat(),
     }
-    data.setdefault('expenses', []).append(expense)
-    _save_expenses(data)
+    storage.put_row(EXPENSES_FILE, expense['id'], expense)
     return jsonify(expense), 201
 
 
 @bp.route('/api/financials/expenses/summary', methods=['GET'])
+@depends_on(EXPENSES_FILE)
 def expense_summary():
-    """Monthly aggregates by category."""
-    data = _load_expenses()
-    expenses = data.get('expenses', [])
-    month = request.args.get('month')  # YYYY-MM, defaults to current
-    if not month:
-        month = datetime.now().strftime('%Y-%m')
-
-    monthly = [e for e in expenses if e.get('date', '').startswith(month)]
-    by_category = {}
-    for e in monthly:
-        cat = e.get('category', 'other')
-        by_category.setdefault(cat, 0)
-        by_category[cat] += e.get('amount', 0)
-
+    """Monthly aggregates by category, read from the month's rollup."""
+    # YYYY-MM or YYYY, as list_expenses takes it; defaults to current
+    try:
+        month, _ = month_window(request.args.get('month') or datetime.now().strftime('%Y-%m'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Usually one partition; a year merges its months
+    by_category, by_class = {}, {}
+    for key, rollup in list(storage.aggregate(EXPENSES_FILE, 'months').items()):
+        if not key or not key.startswith(month):
+            continue
+        for cat, amount in rollup["byCategory"].items():
+            by_category[cat] = by_category.get(cat, 0) + amount
+        for cls, amount in rollup["byClassification"].items():
+            by_class[cls] = by_class.get(cls, 0) + amount
     total = sum(by_category.values())
-    business = sum(e.get('amount', 0) for e in monthly if e.get('classification') == 'business')
-    personal = sum(e.get('amount', 0) for e in monthly if e.get('classification') == 'personal')
+    business = by_class.get('business', 0)
+    personal = by_class.get('personal', 0)
 
     return jsonify({
         "month": month,
@@ -650,6 +764,282 @@ def expense_summary():
     }), 200
 
 
+# ============================================================
+# Statement Import
+# ============================================================
+
+IMPORT_BATCH = 5000
+IMPORT_MAX_ERRORS = 20
+
+# (pattern, fields) matched case-insensitively against the statement text;
+# the first rule that matches anywhere in it wins, so more specific rules
+# (food delivery before ride share, Costco gas before Costco) come first and
+# grocers come before the generic utility words. Unmatched lines get
+# category "other" and the form's default classification.
+IMPORT_RULES = [
+    (r'\b(?:mortgage|rent|hoa)\b', {"category": "housing"}),
+    (r'insurance|geico|state farm|progressive|allstate', {"category": "insurance"}),
+    (r'pharmacy|\bcvs\b|walgreens|clinic|dental|hospital|\brx\b', {"category": "medical"}),
+    (r'inbiz|secretary of state|\birs\b|legalzoom', {"category": "legal", "classification": "business"}),
+    (r'micro ?center|newegg|best buy|b&h photo|\bdell\b|lenovo', {"category": "equipment"}),
+    (r'github|openai|anthropic|digitalocean|\baws\b|google \*?cloud',
+     {"category": "subscriptions", "classification": "business"}),
+    (r'netflix|spotify|hulu|disney|apple\.com/bill|prime video|youtube', {"category": "subscriptions"}),
+    (r'daycare|child ?care|kindercare', {"category": "childcare"}),
+    (r'\buber ?eats\b|doordash|grubhub|postmates', {"category": "food"}),
+    (r'costco gas|\bfuel\b|\bshell\b|speedway|marathon|exxon|circle k|\bbmv\b|parking|\buber\b|\blyft\b',
+     {"category": "transportation"}),
+    (r'costco|kroger|meijer|\baldi\b|walmart|trader joe|whole foods|grocery|restaurant',
+     {"category": "food"}),
+    (r'\benergy\b|\belectric\b|\bwater\b|comcast|xfinity|\bat&t\b|verizon|t-mobile',
+     {"category": "utilities"}),
+]
+
+
+def _compile_rules(rules):
+    """One regex for all rules; match().lastgroup names the first rule that hits.
+
+    Raises ValueError for a rule setting a classification expenses cannot have.
+    """
+    for p, fields in rules:
+        if fields.get('classification', 'personal') not in EXPENSE_CLASSIFICATIONS:
+            raise ValueError(f"import rule {p!r}: unknown classification {fields['classification']!r}")
+    pattern = '|'.join('(?P<r%d>.*?(?:%s))' % (i, p) for i, (p, _) in enumerate(rules))
+    return re.compile(pattern, re.IGNORECASE | re.DOTALL), [fields for _, fields in rules]
+
+
+_IMPORT_MATCHER, _IMPORT_FIELDS = _compile_rules(IMPORT_RULES)
+
+
+def _classify(text):
+    m = _IMPORT_MATCHER.match(text)
+    return _IMPORT_FIELDS[int(m.lastgroup[1:])] if m else {}
+
+
+def _expense_fingerprint(e):
+    """Content hash of what a statement line carries: date, amount and text."""
+    text = ' '.join(str(e.get('description') or e.get('vendor') or '').lower().split())
+    try:
+        amount = float(e.get('amount') or 0)
+    except (TypeError, ValueError):
+        amount = 0
+    key = '%s|%.2f|%s' % (e.get('date', ''), amount, text)
+    return hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+
+
+def _fold_fingerprints(counts, e):
+    """How many expenses share each fingerprint (same-day repeats are real)."""
+    fp = _expense_fingerprint(e)
+    counts[fp] = counts.get(fp, 0) + 1
+
+
+storage.register_aggregate(EXPENSES_FILE, 'fingerprints', dict, _fold_fingerprints)
+
+
+_DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%Y/%m/%d', '%Y%m%d', '%d %b %Y')
+
+
+def _parse_statement_date(value, formats):
+    """Statement date -> YYYY-MM-DD. formats is reordered so the one that
+    worked is tried first next time (a statement sticks to one)."""
+    value = value.strip()
+    for i, fmt in enumerate(formats):
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if i:
+            formats.insert(0, formats.pop(i))
+        return parsed.strftime('%Y-%m-%d')
+    raise ValueError(f"unrecognised date {value!r}")
+
+
+def _parse_amount(value):
+    """'$1,234.50', '(12.00)', '-3.1' -> float."""
+    value = value.strip().replace('$', '').replace(',', '')
+    if value.startswith('(') and value.endswith(')'):
+        value = '-' + value[1:-1]
+    return float(value)
+
+
+_CSV_COLUMNS = {
+    'date': ('date', 'transaction date', 'trans. date', 'posted date', 'posting date'),
+    'text': ('description', 'payee', 'name', 'merchant', 'details', 'memo'),
+    'amount': ('amount',),
+    'debit': ('debit', 'withdrawal', 'withdrawals'),
+    'credit': ('credit', 'deposit', 'deposits'),
+}
+
+
+def _csv_transactions(lines, sign):
+    """Yield (line number, date, amount, sign, text, external id) from CSV lines.
+
+    amount * sign is positive for a purchase. An amount column takes the
+    caller's sign; debit and credit columns carry their own.
+    """
+    reader = csv.reader(lines)
+    header = [h.strip().lower() for h in next(reader, [])]
+    cols = {name: next((header.index(h) for h in names if h in header), None)
+            for name, names in _CSV_COLUMNS.items()}
+    if cols['date'] is None or (cols['amount'] is None and cols['debit'] is None):
+        raise ValueError("CSV needs a date column and an amount or debit column")
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+
+        def cell(name):
+            i = cols[name]
+            return row[i].strip() if i is not None and i < len(row) else ''
+
+        if cols['amount'] is not None:
+            yield reader.line_num, cell('date'), cell('amount'), sign, cell('text'), None
+        elif cell('debit'):
+            yield reader.line_num, cell('date'), cell('debit').lstrip('-'), 1, cell('text'), None
+        else:
+            yield reader.line_num, cell('date'), cell('credit'), -1, cell('text'), None
+
+
+_OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)')
+
+
+def _ofx_transactions(lines, sign):
+    """Yield (line number, date, amount, sign, text, FITID) from OFX/QFX lines.
+
+    Handles both SGML (unclosed tags, one per line) and XML OFX. Values
+    have their entities decoded (AT&amp;T -> AT&T), so they match the same
+    line from a CSV export.
+    """
+    txn = None
+    for number, line in enumerate(lines, 1):
+        for close, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if close and txn is not None:
+                    text = txn.get('NAME') or txn.get('MEMO', '')
+                    yield (number, txn.get('DTPOSTED', '')[:8], txn.get('TRNAMT', ''), sign,
+                           text, txn.get('FITID'))
+                txn = None if close else {}
+            elif txn is not None and not close:
+                txn[tag] = html.unescape(value.strip())
+
+
+def _statement_transactions(upload, sign):
+    """Transactions from an uploaded statement, parsed while it streams in."""
+    lines = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', errors='replace', newline='')
+    first = lines.readline()
+    lines = itertools.chain([first], lines)
+    name = (upload.filename or '').lower()
+    if name.endswith(('.ofx', '.qfx')) or first.lstrip().upper().startswith(('OFXHEADER', '<?XML', '<OFX')):
+        return _ofx_transactions(lines, sign)
+    return _csv_transactions(lines, sign)
+
+
+@bp.route('/api/financials/expenses/import', methods=['POST'])
+def import_expenses():
+    """Bulk-import a CSV or OFX/QFX statement (multipart field "file").
+
+    Form fields: rewardCard (the card the statement is for), classification
+    (default for lines no rule classifies, "personal"), sign ("negative" when
+    purchases are negative amounts, the bank/OFX default, or "positive" for
+    card exports that list purchases as positive; CSVs with separate debit
+    and credit columns ignore it), dryRun=1 to preview.
+    Lines already in the expense log are skipped by content hash, so
+    re-importing an overlapping statement only adds what is new.
+
+    A file that turns unreadable part-way is imported up to that point and
+    reported with partial and readError; fixing it and importing it again
+    adds the rest. A file with no readable transactions at all is a 400.
+    """
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({"error": "No file provided"}), 400
+    form = request.form
+    card = form.get('rewardCard') or None
+    if card and card not in REWARD_CARDS:
+        return jsonify({"error": f"Unknown rewardCard: {card}"}), 400
+    default_class = form.get('classification', 'personal')
+    if default_class not in EXPENSE_CLASSIFICATIONS:
+        return jsonify({"error": "classification must be one of: " + ', '.join(EXPENSE_CLASSIFICATIONS)}), 400
+    sign = -1 if form.get('sign', 'negative') == 'negative' else 1
+    dry_run = form.get('dryRun') in ('1', 'true')
+
+    existing = dict(storage.aggregate(EXPENSES_FILE, 'fingerprints'))
+    seen = {}
+    date_formats = list(_DATE_FORMATS)
+    created_at = datetime.now().isoformat()
+    source = 'import:' + os.path.basename(upload.filename)
+    batch, batches, read = [], 0, 0
+    counts = {"imported": 0, "duplicates": 0, "skipped": 0}
+    total, by_category, errors = 0, {}, []
+
+    def commit():
+        nonlocal batch, batches
+        if batch and not dry_run:
+            storage.put_rows(EXPENSES_FILE, [(e['id'], e) for e in batch])
+            batches += 1
+        batch = []
+
+    transactions = _statement_transactions(upload, sign)
+    try:
+        for line, raw_date, raw_amount, line_sign, text, external_id in transactions:
+            read += 1
+            try:
+                day = _parse_statement_date(raw_date, date_formats)
+                amount = round(_parse_amount(raw_amount) * line_sign, 2)
+            except ValueError as e:
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append({"line": line, "error": str(e)})
+                continue
+            if amount <= 0:
+                counts["skipped"] += 1   # payments, refunds, deposits
+                continue
+
+            expense = {
+                "id": _gen_id(),
+                "date": day,
+                "amount": amount,
+                "category": "other",
+                "classification": default_class,
+                "description": text,
+                "vendor": '',
+                "rewardCard": card,
+                "source": source,
+                "createdAt": created_at,
+            }
+            fp = _expense_fingerprint(expense)
+            seen[fp] = seen.get(fp, 0) + 1
+            if seen[fp] <= existing.get(fp, 0):
+                counts["duplicates"] += 1
+                continue
+            expense.update(_classify(text))
+            if external_id:
+                expense["externalId"] = external_id
+
+            batch.append(expense)
+            counts["imported"] += 1
+            total += amount
+            by_category[expense["category"]] = by_category.get(expense["category"], 0) + amount
+            if len(batch) >= IMPORT_BATCH:
+                commit()
+        read_error = None
+    except (ValueError, csv.Error) as e:
+        if not read:
+            return jsonify({"error": f"Could not read statement: {e}"}), 400
+        read_error = str(e)
+    commit()
+
+    return jsonify({
+        **counts,
+        "partial": read_error is not None,
+        "readError": read_error,
+        "errors": errors,
+        "total": round(total, 2),
+        "byCategory": {k: round(v, 2) for k, v in sorted(by_category.items())},
+        "batches": batches,
+        "dryRun": dry_run,
+    }), 201 if counts["imported"] and not dry_run else 200
+
+
 # ============================================================
 # Revenue Streams
 # ============================================================
@@ -663,16 +1053,32 @@ def _save_revenue(data):
 
 
 @bp.route('/api/financials/revenue', methods=['GET'])
+@depends_on(REVENUE_FILE)
 def list_revenue():
     data = _load_revenue()
     return jsonify({"streams": data.get('streams', [])}), 200
 
 
+_MONTH = re.compile(r'\d{4}-(0[1-9]|1[0-2])')
+
+
+def _month_error(body):
+    """Error message if body's startMonth/endMonth is set but not YYYY-MM."""
+    for key in ('startMonth', 'endMonth'):
+        value = body.get(key)
+        if value and not (isinstance(value, str) and _MONTH.fullmatch(value)):
+            return f"{key} must be YYYY-MM"
+    return None
+
+
 @bp.route('/api/financials/revenue', methods=['POST'])
 def create_revenue():
     body = request.get_json()
     if not body or not body.get('name'):
         return jsonify({"error": "name is required"}), 400
+    error = _month_error(body)
+    if error:
+        return jsonify({"error": error}), 400
     data = _load_revenue()
     stream = {
         "id": body.get('id') or _gen_id(),
@@ -698,6 +1104,9 @@ def update_revenue(stream_id):
     body = request.get_json()
     if not body:
         return jsonify({"error": "Request body required"}), 400
+    error = _month_error(body)
+    if error:
+        return jsonify({"error": error}), 400
     data = _load_revenue()
     for i, s in enumerate(data.get('streams', [])):
         if s['id'] == stream_id:
@@ -805,6 +1214,7 @@ def _save_scenarios(data):
 
 
 @bp.route('/api/financials/scenarios', methods=['GET'])
+@depends_on(SCENARIOS_FILE)
 def list_scenarios():
     data = _load_scenarios()
     return jsonify({"scenarios": data.get('scenarios', [])}), 200
@@ -861,92 +1271,277 @@ def delete_scenario(scenario_id):
     return jsonify({"deleted": True}), 200
 
 
+# Projection responses by (view, args), tagged with the scenarios and revenue
+# store versions they were computed from. Any create/update/delete of either
+# bumps its version (in every worker), so a stale entry is never served; each
+# key only keeps its latest result and the oldest keys are dropped past the cap.
+PROJECTION_CACHE_SIZE = 256
+_projection_cache = {}
+_projection_cache_lock = threading.Lock()
+
+
+def _memo_projection(key, compute):
+    """compute() for key, served from memory while both stores are unchanged.
+
+    Results are shared between requests; callers must not mutate them.
+    """
+    versions = (storage.store_version(SCENARIOS_FILE), storage.store_version(REVENUE_FILE))
+    with _projection_cache_lock:
+        hit = _projection_cache.pop(key, None)
+        if hit and hit[0] == versions:
+            _projection_cache[key] = hit
+            return hit[1]
+    # Versions were read first, so a write landing meanwhile only makes the
+    # entry look older than its data and it is recomputed next time
+    result = compute()
+    with _projection_cache_lock:
+        _projection_cache.pop(key, None)
+        _projection_cache[key] = (versions, result)
+        while len(_projection_cache) > PROJECTION_CACHE_SIZE:
+            del _projection_cache[next(iter(_projection_cache))]
+    return result
+
+
+def _projection_args():
+    """(start, horizon) from ?start=YYYY-MM&months=N. Raises ValueError."""
+    start = request.args.get('start') or datetime.now().strftime('%Y-%m')
+    projection.month_index(start)
+    return start, projection.parse_horizon(request.args.get('months'))
+
+
+def _break_even(proj, row):
+    index = int(proj['breakEven'][row])
+    return proj['months'][index] if index >= 0 else None
+
+
 @bp.route('/api/financials/scenarios/<scenario_id>/projection', methods=['GET'])
+@depends_on(SCENARIOS_FILE, REVENUE_FILE)
 def scenario_projection(scenario_id):
-    """12-month cash flow projection for a scenario."""
-    scenarios_data = _load_scenarios()
-    scenario = None
-    for s in scenarios_data.get('scenarios', []):
-        if s['id'] == scenario_id:
-            scenario = s
-            break
+    """Cash flow projection for a scenario (?months=, default 12)."""
+    try:
+        start, horizon = _projection_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    body, code = _memo_projection(('projection', scenario_id, start, horizon),
+                                  lambda: _project_scenario(scenario_id, start, horizon))
+    return jsonify(body), code
+
+
+def _project_scenario(scenario_id, start, horizon):
+    """(body, status) for scenario_projection."""
+    scenarios = storage.snapshot(SCENARIOS_FILE, {}).get('scenarios', [])
+    scenario = next((s for s in scenarios if s['id'] == scenario_id), None)
     if not scenario:
-        return jsonify({"error": "Scenario not found"}), 404
-
-    revenue_data = _load_revenue()
-    all_streams = {s['id']: s for s in revenue_data.get('streams', [])}
+        return {"error": "Scenario not found"}, 404
 
+    streams = storage.snapshot(REVENUE_FILE, {}).get('streams', [])
+    proj = projection.project([scenario], streams, start, horizon)
+    listed = proj['included'][0] > 0
     monthly_expenses = scenario.get('monthlyExpenses', 4500)
-    tax_rate = scenario.get('taxRate', 0.30)
-    start_month = request.args.get('start', datetime.now().strftime('%Y-%m'))
 
     months = []
-    cumulative = 0
-    for i in range(12):
-        # Calculate month string
-        year = int(start_month[:4])
-        month_num = int(start_month[5:7]) + i
-        while month_num > 12:
-            month_num -= 12
-            year += 1
-        month_str = f"{year}-{month_num:02d}"
-
-        # Sum revenue from included streams
-        gross_revenue = 0
-        stream_breakdown = []
-        for sid in scenario.get('streamIds', []):
-            stream = all_streams.get(sid)
-            if not stream:
-                continue
-            s_start = stream.get('startMonth', '2026-01')
-            s_end = stream.get('endMonth')
-            if s_start and month_str < s_start:
-                continue
-            if s_end and month_str > s_end:
-                continue
-            amount = stream.get('monthlyAmount', 0) * stream.get('probability', 1.0)
-            gross_revenue += amount
-            stream_breakdown.append({
-                "id": sid,
-                "name": stream['name'],
-                "amount": round(amount, 2),
-            })
-
-        taxes = gross_revenue * tax_rate
-        net_revenue = gross_revenue - taxes
-        net_cash_flow = net_revenue - monthly_expenses
-        cumulative += net_cash_flow
-
+    for i, month_str in enumerate(proj['months']):
+        per_stream = proj['gross'][0, :, i]
         months.append({
             "month": month_str,
-            "grossRevenue": round(gross_revenue, 2),
-            "taxes": round(taxes, 2),
-            "netRevenue": round(net_revenue, 2),
+            "grossRevenue": round(float(proj['grossRevenue'][0, i]), 2),
+            "taxes": round(float(proj['taxes'][0, i]), 2),
+            "netRevenue": round(float(proj['netRevenue'][0, i]), 2),
             "expenses": monthly_expenses,
-            "netCashFlow": round(net_cash_flow, 2),
-            "cumulative": round(cumulative, 2),
-            "streams": stream_breakdown,
+            "netCashFlow": round(float(proj['netCashFlow'][0, i]), 2),
+            "cumulative": round(float(proj['cumulative'][0, i]), 2),
+            "streams": [
+                {"id": streams[j]['id'], "name": streams[j]['name'],
+                 "amount": round(float(per_stream[j]), 2)}
+                for j in np.flatnonzero(listed & proj['active'][:, i])
+            ],
         })
 
-    # Summary stats
     total_gross = sum(m['grossRevenue'] for m in months)
     total_net = sum(m['netCashFlow'] for m in months)
-    break_even_month = None
-    for m in months:
-        if m['cumulative'] >= 0 and break_even_month is None and m['netCashFlow'] > 0:
-            break_even_month = m['month']
-
-    return jsonify({
+    return {
         "scenario": scenario['name'],
         "scenarioId": scenario_id,
         "months": months,
         "totalGrossRevenue": round(total_gross, 2),
         "totalNetCashFlow": round(total_net, 2),
-        "breakEvenMonth": break_even_month,
-        "annualizedGross": round(total_gross, 2),
+        "breakEvenMonth": _break_even(proj, 0),
+        "annualizedGross": round(total_gross * 12 / horizon, 2),
+    }, 200
+
+
+SIM_MAX_PATHS = 200000
+
+
+@bp.route('/api/financials/scenarios/<scenario_id>/simulate', methods=['GET'])
+@depends_on(SCENARIOS_FILE, REVENUE_FILE, requires_arg='seed')
+def simulate_scenario(scenario_id):
+    """Monte Carlo cash flow bands, shortfall risk and break-even spread for a scenario.
+
+    ?paths= (default 10000), ?cash= starting cash, ?startJitter= months,
+    ?amountJitter= (sd as a fraction), ?seed= for repeatable runs, plus the
+    projection's ?start= and ?months=. Without a seed one is drawn, and it is
+    returned so the run can be repeated; only seeded runs are answered 304.
+    """
+    scenarios = storage.snapshot(SCENARIOS_FILE, {}).get('scenarios', [])
+    scenario = next((s for s in scenarios if s['id'] == scenario_id), None)
+    if not scenario:
+        return jsonify({"error": "Scenario not found"}), 404
+    args = request.args
+    try:
+        start, horizon = _projection_args()
+        paths = int(args.get('paths', 10000))
+        cash = float(args.get('cash', 0))
+        start_jitter = int(args.get('startJitter', 1))
+        amount_jitter = float(args.get('amountJitter', 0.15))
+        seed = int(args['seed']) if args.get('seed') else secrets.randbits(63)
+        if seed < 0:
+            raise ValueError("seed must be a non-negative integer")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not 1 <= paths <= SIM_MAX_PATHS:
+        return jsonify({"error": f"paths must be between 1 and {SIM_MAX_PATHS}"}), 400
+    if not 0 <= start_jitter <= 12 or not 0 <= amount_jitter <= 1:
+        return jsonify({"error": "startJitter must be 0-12 and amountJitter 0-1"}), 400
+
+    streams = storage.snapshot(REVENUE_FILE, {}).get('streams', [])
+    result = projection.simulate(scenario, streams, start, horizon, paths=paths, cash=cash,
+                                 start_jitter=start_jitter, amount_jitter=amount_jitter,
+                                 seed=seed, workers=CONFIG['simulation_workers'])
+    return jsonify({
+        "scenario": scenario['name'],
+        "scenarioId": scenario_id,
+        "startingCash": cash,
+        "seed": seed,
+        **result,
     }), 200
 
 
+SENSITIVITY_MAX_TOGGLES = 8
+SENSITIVITY_MAX_CELLS = 50000
+
+
+def _number_list(name, default):
+    """?name=a,b,c -> list of floats, or default. Raises ValueError."""
+    raw = request.args.get(name)
+    if not raw:
+        return default
+    return [float(v) for v in raw.split(',') if v.strip()]
+
+
+@bp.route('/api/financials/scenarios/<scenario_id>/sensitivity', methods=['GET'])
+@depends_on(SCENARIOS_FILE, REVENUE_FILE)
+def scenario_sensitivity(scenario_id):
+    """Break-even and 12/24-month cumulative cash over a grid of assumptions.
+
+    ?taxRates=0.15,0.2 and ?expenses=3500,4500 (default: a spread around the
+    scenario's own values) and ?toggles=stream,ids switched on and off in
+    every combination, plus ?start= and ?months= (at least 24).
+    Matrices are indexed [taxRate][expenses] for each toggle combo.
+    """
+    scenarios = storage.snapshot(SCENARIOS_FILE, {}).get('scenarios', [])
+    scenario = next((s for s in scenarios if s['id'] == scenario_id), None)
+    if not scenario:
+        return jsonify({"error": "Scenario not found"}), 404
+    tax_rate = scenario.get('taxRate', 0.30)
+    monthly_expenses = scenario.get('monthlyExpenses', 4500)
+    try:
+        start, horizon = _projection_args()
+        tax_rates = _number_list('taxRates', [round(tax_rate + d, 3) for d in (-0.05, -0.025, 0, 0.025, 0.05)])
+        expenses = _number_list('expenses', [monthly_expenses + d for d in range(-1500, 1501, 500)])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    horizon = max(horizon, 24)
+
+    streams = storage.snapshot(REVENUE_FILE, {}).get('streams', [])
+    known = {s['id'] for s in streams}
+    toggles = list(dict.fromkeys(t for t in request.args.get('toggles', '').split(',') if t))
+    missing = [t for t in toggles if t not in known]
+    if missing:
+        return jsonify({"error": f"Unknown revenue streams: {', '.join(missing)}"}), 400
+    if not tax_rates or not expenses:
+        return jsonify({"error": "taxRates and expenses need at least one value"}), 400
+    if len(toggles) > SENSITIVITY_MAX_TOGGLES:
+        return jsonify({"error": f"At most {SENSITIVITY_MAX_TOGGLES} toggles"}), 400
+    if len(tax_rates) * len(expenses) * 2 ** len(toggles) > SENSITIVITY_MAX_CELLS:
+        return jsonify({"error": f"Grid larger than {SENSITIVITY_MAX_CELLS} cells"}), 400
+
+    grid = projection.sensitivity(scenario, streams, start, horizon, tax_rates, expenses, toggles)
+    labels = np.array(grid['months'] + [None], dtype=object)   # index -1 (never) -> None
+
+    def matrix(values):
+        return np.round(values, 2).tolist()
+
+    cells = []
+    for c, combo in enumerate(grid['combos']):
+        break_even = grid['breakEven'][c]
+        cells.append({
+            "streams": combo,
+            "breakEvenMonth": labels[break_even].tolist(),
+            "monthsToBreakEven": [[int(i) + 1 if i >= 0 else None for i in row] for row in break_even],
+            "cumulative12": matrix(grid['cumulative'][c, :, :, 11]),
+            "cumulative24": matrix(grid['cumulative'][c, :, :, 23]),
+        })
+
+    return jsonify({
+        "scenario": scenario['name'],
+        "scenarioId": scenario_id,
+        "start": start,
+        "months": horizon,
+        "taxRates": tax_rates,
+        "expenses": expenses,
+        "toggles": toggles,
+        "cells": cells,
+    }), 200
+
+
+@bp.route('/api/financials/scenarios/compare', methods=['GET'])
+@depends_on(SCENARIOS_FILE, REVENUE_FILE)
+def compare_scenarios():
+    """Project every scenario (or ?ids=a,b) side by side over ?months= (default 12)."""
+    ids = tuple(i for i in request.args.get('ids', '').split(',') if i)
+    try:
+        start, horizon = _projection_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    body = _memo_projection(('compare', ids, start, horizon),
+                            lambda: _compare_scenarios(ids, start, horizon))
+    return jsonify(body), 200
+
+
+def _compare_scenarios(ids, start, horizon):
+    scenarios = storage.snapshot(SCENARIOS_FILE, {}).get('scenarios', [])
+    if ids:
+        scenarios = [s for s in scenarios if s['id'] in ids]
+    streams = storage.snapshot(REVENUE_FILE, {}).get('streams', [])
+    proj = projection.project(scenarios, streams, start, horizon)
+
+    def column(name, row):
+        return np.round(proj[name][row], 2).tolist()
+
+    results = []
+    for row, scenario in enumerate(scenarios):
+        total_gross = float(proj['grossRevenue'][row].sum())
+        results.append({
+            "scenarioId": scenario['id'],
+            "scenario": scenario['name'],
+            "color": scenario.get('color'),
+            "grossRevenue": column('grossRevenue', row),
+            "netCashFlow": column('netCashFlow', row),
+            "cumulative": column('cumulative', row),
+            "totalGrossRevenue": round(total_gross, 2),
+            "totalNetCashFlow": round(float(proj['netCashFlow'][row].sum()), 2),
+            "endingCumulative": round(float(proj['cumulative'][row, -1]), 2),
+            "breakEvenMonth": _break_even(proj, row),
+            "annualizedGross": round(total_gross * 12 / horizon, 2),
+        })
+
+    return {
+        "months": proj['months'],
+        "scenarios": results,
+    }
+
+
 @bp.route('/api/financials/scenarios/seed', methods=['POST'])
 def seed_scenarios():
     data = _load_scenarios()
@@ -1026,42 +1621,58 @@ REWARD_CARDS = {
 
 
 @bp.route('/api/financials/rewards', methods=['GET'])
+@depends_on()
 def get_rewards():
     return jsonify({"cards": REWARD_CARDS}), 200
 
 
+def _fold_rewards(acc, e):
+    """Running spend per card/category, plus the span of reward-card dates."""
+    card = e.get('rewardCard')
+    if not card:
+        return
+    acc["tagged"] += 1
+    d = e.get('date')
+    if d:
+        acc["dated"] += 1
+        if acc["first"] is None or d < acc["first"]:
+            acc["first"] = d
+        if acc["last"] is None or d > acc["last"]:
+            acc["last"] = d
+    if card not in REWARD_CARDS:
+        return
+    spending = acc["cards"].setdefault(card, {})
+    cat = e.get('category', 'other')
+    spending[cat] = spending.get(cat, 0) + e.get('amount', 0)
+
+
+storage.register_aggregate(
+    EXPENSES_FILE, 'rewards',
+    lambda: {"cards": {}, "tagged": 0, "dated": 0, "first": None, "last": None},
+    _fold_rewards)
+
+
+def _card_reward(card_info, cat_spending):
+    if 'rewardRate' in card_info:
+        # Flat rate card
+        return sum(cat_spending.values()) * card_info['rewardRate']
+    # Category-based rates
+    rates = card_info.get('rates', {})
+    return sum(amount * rates.get(cat, rates.get('other', 0.01))
+               for cat, amount in cat_spending.items())
+
+
 @bp.route('/api/financials/rewards/estimate', methods=['GET'])
+@depends_on(EXPENSES_FILE)
 def rewards_estimate():
-    """Calculate projected annual rewards from actual expense data."""
-    data = _load_expenses()
-    expenses = data.get('expenses', [])
-
-    card_totals = {}
-    for e in expenses:
-        card = e.get('rewardCard')
-        if not card or card not in REWARD_CARDS:
-            continue
-        card_totals.setdefault(card, {})
-        cat = e.get('category', 'other')
-        card_totals[card].setdefault(cat, 0)
-        card_totals[card][cat] += e.get('amount', 0)
+    """Projected annual rewards from the running per-card expense rollup."""
+    rollup = storage.aggregate(EXPENSES_FILE, 'rewards')
 
-    # Calculate rewards
     estimates = []
     total_rewards = 0
-    for card_id, cat_spending in card_totals.items():
+    for card_id, cat_spending in rollup["cards"].items():
         card_info = REWARD_CARDS[card_id]
-        card_reward = 0
-
-        if 'rewardRate' in card_info:
-            # Flat rate card
-            card_reward = sum(cat_spending.values()) * card_info['rewardRate']
-        elif 'rates' in card_info:
-            # Category-based rates
-            for cat, amount in cat_spending.items():
-                rate = card_info['rates'].get(cat, card_info['rates'].get('other', 0.01))
-                card_reward += amount * rate
-
+        card_reward = _card_reward(card_info, cat_spending)
         total_rewards += card_reward
         estimates.append({
             "card": card_id,
@@ -1071,22 +1682,25 @@ def rewards_estimate():
         })
 
     # Annualize based on data period
-    dates = [e.get('date', '') for e in expenses if e.get('rewardCard')]
-    if dates:
-        date_objs = sorted([datetime.strptime(d, '%Y-%m-%d') for d in dates if d])
-        if len(date_objs) >= 2:
-            days_span = (date_objs[-1] - date_objs[0]).days or 1
-            annualization_factor = 365 / days_span
-        else:
-            annualization_factor = 12  # assume 1 month of data
-    else:
+    if not rollup["tagged"]:
         annualization_factor = 1
+    elif rollup["dated"] >= 2:
+        days_span = (datetime.strptime(rollup["last"], '%Y-%m-%d')
+                     - datetime.strptime(rollup["first"], '%Y-%m-%d')).days or 1
+        annualization_factor = 365 / days_span
+    else:
+        annualization_factor = 12  # assume 1 month of data
+
+    for est in estimates:
+        est["annualizedReward"] = round(est["reward"] * annualization_factor, 2)
 
     return jsonify({
         "estimates": estimates,
         "totalRewards": round(total_rewards, 2),
         "annualizedRewards": round(total_rewards * annualization_factor, 2),
         "annualizationFactor": round(annualization_factor, 2),
+        "periodStart": rollup["first"],
+        "periodEnd": rollup["last"],
     }), 200
 
 
@@ -1109,37 +1723,19 @@ def _load_rd_log():
     return _load(RD_LOG_FILE, 'entries')
 
 
-def _save_rd_log(data):
-    _save(RD_LOG_FILE, data)
-
-
 @bp.route('/api/financials/rd-log', methods=['GET'])
+@depends_on(RD_LOG_FILE)
 def list_rd_entries():
-    """List R&D hour log entries. Optional filters: ?project=X, ?quarter=YYYY-QN, ?month=YYYY-MM."""
-    data = _load_rd_log()
-    entries = data.get('entries', [])
+    """List R&D hour log entries. Optional filters: ?project=X, ?quarter=YYYY-QN, ?month=YYYY-MM, ?from=&to=."""
+    try:
+        since, until = date_window(request.args)
+    except ValueError:
+        return jsonify({"error": "invalid date filter"}), 400
+    entries = storage.rows_by_date(RD_LOG_FILE, since, until)
 
     project = request.args.get('project')
-    quarter = request.args.get('quarter')  # e.g. 2026-Q3
-    month = request.args.get('month')      # e.g. 2026-08
-
     if project:
         entries = [e for e in entries if e.get('project', '').lower() == project.lower()]
-    if month:
-        entries = [e for e in entries if e.get('date', '').startswith(month)]
-    if quarter:
-        # Parse quarter: 2026-Q3 → months 07,08,09
-        try:
-            qy, qn = quarter.split('-Q')
-            q_int = int(qn)
-            q_months = {1: ('01','02','03'), 2: ('04','05','06'),
-                        3: ('07','08','09'), 4: ('10','11','12')}[q_int]
-            prefixes = [f"{qy}-{m}" for m in q_months]
-            entries = [e for e in entries if any(e.get('date','').startswith(p) for p in prefixes)]
-        except (ValueError, KeyError):
-            pass
-
-    entries.sort(key=lambda e: e.get('date', ''), reverse=True)
 
     total_hours = sum(e.get('hours', 0) for e in entries)
 
@@ -1158,7 +1754,6 @@ def create_rd_entry():
     if not body or not body.get('hours'):
         return jsonify({"error": "hours is required"}), 400
 
-    data = _load_rd_log()
     entry = {
         "id": _gen_id(),
         "date": body.get('date', datetime.now().strftime('%Y-%m-%d')),
@@ -1168,23 +1763,19 @@ def create_rd_entry():
         "category": body.get('category', 'Software Development'),
         "createdAt": datetime.now().isoformat(),
     }
-    data.setdefault('entries', []).append(entry)
-    _save_rd_log(data)
+    storage.put_row(RD_LOG_FILE, entry['id'], entry)
     return jsonify(entry), 201
 
 
 @bp.route('/api/financials/rd-log/<entry_id>', methods=['DELETE'])
 def delete_rd_entry(entry_id):
-    data = _load_rd_log()
-    before = len(data.get('entries', []))
-    data['entries'] = [e for e in data.get('entries', []) if e['id'] != entry_id]
-    if len(data['entries']) == before:
+    if not storage.delete_row(RD_LOG_FILE, entry_id):
         return jsonify({"error": "Entry not found"}), 404
-    _save_rd_log(data)
     return jsonify({"deleted": True}), 200
 
 
 @bp.route('/api/financials/rd-log/summary', methods=['GET'])
+@depends_on(RD_LOG_FILE)
 def rd_summary():
     """Quarterly aggregation for tax filing. Returns hours by quarter, project, and category."""
     data = _load_rd_log()
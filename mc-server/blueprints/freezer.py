@@ -1,6 +1,5 @@
 """Freezer Meal Planning — recipes, sessions, inventory, shopping lists."""
 import os
-import json
 import uuid
 import traceback
 from datetime import datetime
@@ -8,7 +7,8 @@ from datetime import datetime
 import requests as http_requests
 from flask import Blueprint, request, jsonify
 
-from .shared import CONFIG
+from .shared import CONFIG, depends_on, serialize_writes, locks_own_writes
+from . import storage
 
 bp = Blueprint('freezer', __name__)
 
@@ -17,6 +17,8 @@ SESSIONS_FILE = os.path.join(FREEZER_DATA_DIR, 'sessions.json')
 INVENTORY_FILE = os.path.join(FREEZER_DATA_DIR, 'inventory.json')
 
 os.makedirs(FREEZER_DATA_DIR, exist_ok=True)
+_store_lock = serialize_writes(bp, os.path.join(FREEZER_DATA_DIR, '.lock'))
+storage.register_table(SESSIONS_FILE, 'sessions', wrapper='sessions', fields=('status',), indent=2)
 
 _tandoor_session = None
 
@@ -88,6 +90,7 @@ def get_recipe(recipe_id):
 
 
 @bp.route('/api/freezer/recipes/import-url', methods=['POST'])
+@locks_own_writes
 def import_recipe():
     """Import a recipe from a URL via Tandoor: parse, create, attach image."""
     data = request.get_json()
@@ -219,6 +222,7 @@ def import_recipe():
 
 
 @bp.route('/api/freezer/recipes/<int:recipe_id>', methods=['DELETE'])
+@locks_own_writes
 def delete_recipe(recipe_id):
     """Delete a recipe from Tandoor."""
     try:
@@ -235,6 +239,7 @@ def delete_recipe(recipe_id):
 
 
 @bp.route('/api/freezer/recipes/<int:recipe_id>/keywords', methods=['PUT'])
+@locks_own_writes
 def update_recipe_keywords(recipe_id):
     """Update keywords/tags on a Tandoor recipe."""
     data = request.get_json()
@@ -269,19 +274,15 @@ def update_recipe_keywords(recipe_id):
 # --- Prep Sessions ---
 
 def _load_sessions():
-    try:
-        with open(SESSIONS_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {"sessions": []}
+    return storage.load(SESSIONS_FILE, {"sessions": []})
 
 
-def _save_sessions(data):
-    with open(SESSIONS_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+def _save_session(session):
+    storage.put_row(SESSIONS_FILE, session["id"], session)
 
 
 @bp.route('/api/freezer/sessions', methods=['GET'])
+@depends_on(SESSIONS_FILE)
 def list_sessions():
     """List all prep sessions."""
     return jsonify(_load_sessions()), 200
@@ -294,7 +295,6 @@ def create_session():
     if not body or not body.get('name'):
         return jsonify({"error": "Session name is required"}), 400
 
-    data = _load_sessions()
     session_id = str(uuid.uuid4())[:8]
     session = {
         "id": session_id,
@@ -304,8 +304,7 @@ def create_session():
         "createdAt": datetime.now().isoformat(),
         "status": "planning"
     }
-    data["sessions"].append(session)
-    _save_sessions(data)
+    _save_session(session)
     return jsonify(session), 201
 
 
@@ -313,29 +312,24 @@ def create_session():
 def update_session(session_id):
     """Update a prep session."""
     body = request.get_json()
-    data = _load_sessions()
-
-    for i, s in enumerate(data["sessions"]):
-        if s["id"] == session_id:
-            if 'name' in body:
-                s['name'] = body['name']
-            if 'recipes' in body:
-                s['recipes'] = body['recipes']
-            if 'status' in body:
-                s['status'] = body['status']
-            data["sessions"][i] = s
-            _save_sessions(data)
-            return jsonify(s), 200
+    s = storage.get_row(SESSIONS_FILE, session_id)
+    if not s:
+        return jsonify({"error": "Session not found"}), 404
 
-    return jsonify({"error": "Session not found"}), 404
+    if 'name' in body:
+        s['name'] = body['name']
+    if 'recipes' in body:
+        s['recipes'] = body['recipes']
+    if 'status' in body:
+        s['status'] = body['status']
+    _save_session(s)
+    return jsonify(s), 200
 
 
 @bp.route('/api/freezer/sessions/<session_id>', methods=['DELETE'])
 def delete_session(session_id):
     """Delete a prep session."""
-    data = _load_sessions()
-    data["sessions"] = [s for s in data["sessions"] if s["id"] != session_id]
-    _save_sessions(data)
+    storage.delete_row(SESSIONS_FILE, session_id)
     return jsonify({"deleted": True}), 200
 
 
@@ -391,14 +385,13 @@ def _normalize_ingredient_name(name):
 
 
 @bp.route('/api/freezer/sessions/<session_id>/generate-list', methods=['POST'])
+@locks_own_writes
 def generate_shopping_list(session_id):
-    """Generate a shopping list for a prep session with prep guide."""
-    data = _load_sessions()
-    session = None
-    for s in data["sessions"]:
-        if s["id"] == session_id:
-            session = s
-            break
+    """Generate a shopping list for a prep session with prep guide.
+
+    The recipes are fetched from Tandoor before the store lock is taken.
+    """
+    session = storage.get_row(SESSIONS_FILE, session_id)
     if not session:
         return jsonify({"error": "Session not found"}), 404
     if not session.get("recipes"):
@@ -524,9 +517,14 @@ def generate_shopping_list(session_id):
 
     prep_guide = _build_prep_guide(aggregated, recipe_details)
 
-    session["shoppingList"] = shopping_list
-    session["prepGuide"] = prep_guide
-    _save_sessions(data)
+    with _store_lock():
+        # The session may have changed while the recipes were being fetched
+        session = storage.get_row(SESSIONS_FILE, session_id)
+        if not session:
+            return jsonify({"error": "Session not found"}), 404
+        session["shoppingList"] = shopping_list
+        session["prepGuide"] = prep_guide
+        _save_session(session)
 
     total_items = sum(len(items) for items in shopping_list.values())
     return jsonify({
@@ -589,38 +587,33 @@ def check_item(session_id):
     if not body or 'itemId' not in body:
         return jsonify({"error": "itemId is required"}), 400
 
-    data = _load_sessions()
-    for s in data["sessions"]:
-        if s["id"] == session_id:
-            shopping_list = s.get("shoppingList", {})
-            item_id = body["itemId"]
-            checked = body.get("checked", True)
-            for cat, items in shopping_list.items():
-                for item in items:
-                    if item.get("id") == item_id:
-                        item["checked"] = checked
-                        _save_sessions(data)
-                        return jsonify({"updated": True, "itemId": item_id, "checked": checked}), 200
-            return jsonify({"error": "Item not found"}), 404
-    return jsonify({"error": "Session not found"}), 404
+    s = storage.get_row(SESSIONS_FILE, session_id)
+    if not s:
+        return jsonify({"error": "Session not found"}), 404
+    shopping_list = s.get("shoppingList") or {}
+    item_id = body["itemId"]
+    checked = body.get("checked", True)
+    for cat, items in shopping_list.items():
+        for item in items:
+            if item.get("id") == item_id:
+                item["checked"] = checked
+                _save_session(s)
+                return jsonify({"updated": True, "itemId": item_id, "checked": checked}), 200
+    return jsonify({"error": "Item not found"}), 404
 
 
 # --- Inventory Management ---
 
 def _load_inventory():
-    try:
-        with open(INVENTORY_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {"items": []}
+    return storage.load(INVENTORY_FILE, {"items": []})
 
 
 def _save_inventory(data):
-    with open(INVENTORY_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+    storage.save(INVENTORY_FILE, data, indent=2)
 
 
 @bp.route('/api/freezer/inventory', methods=['GET'])
+@depends_on(INVENTORY_FILE)
 def get_inventory():
     """Get all inventory items."""
     return jsonify(_load_inventory()), 200
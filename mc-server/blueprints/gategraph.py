@@ -0,0 +1,176 @@
+"""Dependency graph over the decision gates.
+
+build() takes the gate list once and keeps a topological order, every gate's
+transitive dependencies (ancestors) and the ones of those still open
+(blockers). A status change only touches the blockers of the gates
+downstream of it (set_status), and critical paths are cached per target
+until a status changes. Dependency edits rebuild the graph; find_cycle()
+checks a proposed dependency list before it is saved.
+
+Dependencies on ids that do not exist (yet) count as permanent blockers.
+Every gate needs a non-empty id of its own; build() raises GateIdError
+otherwise, since the graph is keyed by id.
+"""
+import heapq
+
+DONE = 'completed'
+
+
+class CycleError(ValueError):
+    """Raised when a dependency list would close a loop; .cycle is the loop."""
+
+    def __init__(self, cycle):
+        super().__init__("Dependency cycle: " + " -> ".join(cycle))
+        self.cycle = cycle
+
+
+class GateIdError(ValueError):
+    """Raised by build() for gates with an empty or repeated id; .ids lists them."""
+
+    def __init__(self, ids):
+        super().__init__("Duplicate or empty gate ids: " + ", ".join(repr(i) for i in ids))
+        self.ids = ids
+
+
+def _dependency_ids(gate):
+    return list(dict.fromkeys(gate.get('dependencies') or []))
+
+
+def build(gates):
+    """Graph state for a list of gate dicts (which it keeps references to)."""
+    by_id, bad = {}, []
+    for g in gates:
+        gid = g.get('id')
+        if gid is None or gid == '' or gid in by_id:
+            bad.append(gid)
+        by_id[gid] = g
+    if bad:
+        raise GateIdError(list(dict.fromkeys(bad)))
+    deps = {gid: _dependency_ids(g) for gid, g in by_id.items()}
+    dependents = {gid: [] for gid in by_id}
+    for gid, ds in deps.items():
+        for d in ds:
+            if d in dependents:
+                dependents[d].append(gid)
+
+    # Kahn's algorithm, ties broken by sortOrder then file position
+    rank = {gid: (g.get('sortOrder') or 0, i) for i, (gid, g) in enumerate(by_id.items())}
+    waiting = {gid: sum(d in by_id for d in ds) for gid, ds in deps.items()}
+    ready = [(rank[gid], gid) for gid, n in waiting.items() if n == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, gid = heapq.heappop(ready)
+        order.append(gid)
+        for child in dependents[gid]:
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                heapq.heappush(ready, (rank[child], child))
+
+    ancestors, unresolved = {}, {}
+    for gid in order:
+        anc, missing = set(), set()
+        for d in deps[gid]:
+            if d in by_id:
+                anc.add(d)
+                anc |= ancestors[d]
+                missing |= unresolved[d]
+            else:
+                missing.add(d)
+        ancestors[gid], unresolved[gid] = anc, missing
+
+    # Hand-edited files can hold a loop; those gates come last and are
+    # resolved by plain reachability (they block themselves)
+    placed = set(order)
+    cyclic = [gid for gid in by_id if gid not in placed]
+    for gid in cyclic:
+        anc, missing, stack = set(), set(), list(deps[gid])
+        while stack:
+            d = stack.pop()
+            if d not in by_id:
+                missing.add(d)
+            elif d not in anc:
+                anc.add(d)
+                stack.extend(deps[d])
+        ancestors[gid], unresolved[gid] = anc, missing
+
+    graph = {
+        'gates': by_id,
+        'deps': deps,
+        'dependents': dependents,
+        'order': order + cyclic,
+        'cyclic': cyclic,
+        'ancestors': ancestors,
+        'unresolved': unresolved,
+        'critical': {},
+    }
+    graph['blockers'] = {
+        gid: {a for a in ancestors[gid] if by_id[a].get('status') != DONE} | unresolved[gid]
+        for gid in by_id
+    }
+    return graph
+
+
+def set_status(graph, gate_id, status):
+    """Record a status change, updating only the blockers downstream of gate_id."""
+    gate = graph['gates'][gate_id]
+    was_done = gate.get('status') == DONE
+    gate['status'] = status
+    if was_done == (status == DONE):
+        return
+    seen, stack = set(), list(graph['dependents'][gate_id])
+    while stack:
+        gid = stack.pop()
+        if gid in seen:
+            continue
+        seen.add(gid)
+        if status == DONE:
+            graph['blockers'][gid].discard(gate_id)
+        else:
+            graph['blockers'][gid].add(gate_id)
+        stack.extend(graph['dependents'][gid])
+    graph['critical'].clear()
+
+
+def find_cycle(graph, gate_id, dependencies):
+    """The loop gate_id -> ... -> gate_id that dependencies would create, or None."""
+    deps = graph['deps']
+    for start in dict.fromkeys(dependencies):
+        # Depth-first search back along dependencies, keeping the path
+        stack, seen = [(start, [gate_id, start])], set()
+        while stack:
+            gid, path = stack.pop()
+            if gid == gate_id:
+                return path
+            if gid in seen:
+                continue
+            seen.add(gid)
+            stack.extend((d, path + [d]) for d in deps.get(gid, ()))
+    return None
+
+
+def critical_path(graph, target):
+    """Longest chain of open gates that must finish before target can, ending
+    at target (oldest first). None when target is unknown or in a loop."""
+    if target in graph['critical']:
+        return graph['critical'][target]
+    if target not in graph['gates'] or target in graph['cyclic']:
+        return None
+    scope = graph['ancestors'][target] | {target}
+    best, via = {}, {}
+    for gid in graph['order']:
+        if gid not in scope:
+            continue
+        prev = max((d for d in graph['deps'][gid] if d in best),
+                   key=lambda d: best[d], default=None)
+        open_ = graph['gates'][gid].get('status') != DONE
+        best[gid] = (best[prev] if prev is not None else 0) + open_
+        via[gid] = prev
+    path, gid = [], target
+    while gid is not None:
+        if graph['gates'][gid].get('status') != DONE:
+            path.append(gid)
+        gid = via[gid]
+    path.reverse()
+    graph['critical'][target] = path
+    return path
@@ -1,11 +1,13 @@
 """Personal Health Tracking — weight, rowing, habits, and fitness data."""
 import os
-import json
 import uuid
 from datetime import datetime, timedelta
 
 from flask import Blueprint, request, jsonify
 
+from .shared import depends_on, serialize_writes, date_window
+from . import storage, timeseries
+
 bp = Blueprint('health', __name__)
 
 HEALTH_DATA_DIR = '/opt/health-data'
@@ -16,6 +18,15 @@ HABIT_LOG_FILE = os.path.join(HEALTH_DATA_DIR, 'habit-log.json')
 FAMILY_SCORE_FILE = os.path.join(HEALTH_DATA_DIR, 'family-score.json')
 
 os.makedirs(HEALTH_DATA_DIR, exist_ok=True)
+_store_lock = serialize_writes(bp, os.path.join(HEALTH_DATA_DIR, '.lock'))
+# The logs only ever grow, so on the json engine they are journaled: a write
+# is one fsynced append rather than a rewrite of the whole history.
+storage.register_table(WEIGHT_FILE, 'weight', journal=True, indent=2, default=str)
+storage.register_table(ROWING_FILE, 'rowing', journal=True, indent=2, default=str)
+storage.register_table(HABIT_LOG_FILE, 'habit_log', wrapper='entries', fields=('date', 'habitId'),
+                       journal=True, indent=2, default=str)
+storage.register_table(FAMILY_SCORE_FILE, 'family_score', wrapper='entries', journal=True,
+                       indent=2, default=str)
 
 DEFAULT_HABITS = [
     {'name': 'Rowing', 'category': 'movement', 'emoji': '\U0001F6A3',
@@ -35,75 +46,82 @@ DEFAULT_HABITS = [
 ]
 
 
-def _load_json(path):
-    """Load a JSON file, returning [] if missing or invalid."""
-    try:
-        if os.path.exists(path):
-            with open(path, 'r') as f:
-                return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        pass
-    return []
+def _load_json(path, readonly=False):
+    """Load a store, returning [] if missing or invalid.
+
+    readonly=True returns the shared cached document instead of a copy;
+    the caller must not mutate it.
+    """
+    if readonly:
+        return storage.snapshot(path, [])
+    return storage.load(path, [])
 
 
 def _save_json(path, data):
-    """Save data to a JSON file."""
-    with open(path, 'w') as f:
-        json.dump(data, f, indent=2, default=str)
+    """Save a whole store."""
+    storage.save(path, data, indent=2, default=str)
 
 
-def _load_habits():
-    """Load habits, seeding defaults if empty."""
-    data = _load_json(HABITS_FILE)
+def _habit_list(data):
     if isinstance(data, dict):
-        habits = data.get('habits', [])
-    else:
-        habits = data if isinstance(data, list) else []
-
-    if not habits:
-        now = datetime.now().isoformat()
-        habits = []
-        for h in DEFAULT_HABITS:
-            habits.append({
-                'id': str(uuid.uuid4())[:8],
-                'name': h['name'],
-                'category': h['category'],
-                'emoji': h['emoji'],
-                'durationMinutes': h['durationMinutes'],
-                'defaultDays': h['defaultDays'],
-                'linkedTracker': h['linkedTracker'],
-                'active': True,
-                'createdAt': now,
-            })
-        _save_json(HABITS_FILE, {'habits': habits})
+        return data.get('habits', [])
+    return data if isinstance(data, list) else []
+
+
+def _load_habits(readonly=False):
+    """Load habits, seeding defaults if empty.
+
+    Seeding can happen on a GET, so it takes the store lock itself.
+    """
+    habits = _habit_list(_load_json(HABITS_FILE, readonly))
+    if habits:
+        return habits
+
+    with _store_lock():
+        # Another request may have seeded them while we waited
+        habits = _habit_list(_load_json(HABITS_FILE))
+        if not habits:
+            now = datetime.now().isoformat()
+            for h in DEFAULT_HABITS:
+                habits.append({
+                    'id': str(uuid.uuid4())[:8],
+                    'name': h['name'],
+                    'category': h['category'],
+                    'emoji': h['emoji'],
+                    'durationMinutes': h['durationMinutes'],
+                    'defaultDays': h['defaultDays'],
+                    'linkedTracker': h['linkedTracker'],
+                    'active': True,
+                    'createdAt': now,
+                })
+            _save_json(HABITS_FILE, {'habits': habits})
     return habits
 
 
-def _load_habit_log():
-    """Load habit log entries."""
-    data = _load_json(HABIT_LOG_FILE)
-    if isinstance(data, dict):
-        return data.get('entries', [])
-    return data if isinstance(data, list) else []
+def _in_window(path):
+    """Entries in the request's ?date/days/month/from/to window, newest first.
 
+    Raises ValueError for malformed filters.
+    """
+    since, until = date_window(request.args)
+    return storage.rows_by_date(path, since, until)
 
-def _save_habit_log(entries):
-    """Save habit log entries."""
-    _save_json(HABIT_LOG_FILE, {'entries': entries})
+
+def _habit_log_on(date_str):
+    """Habit-log entries for one date (hash-indexed lookup)."""
+    return storage.find_rows(HABIT_LOG_FILE, date=date_str)
 
 
 def _auto_complete_linked_habit(tracker_name, date_str):
     """Auto-create a habit-log entry for a linked tracker if not already logged."""
-    habits = _load_habits()
+    habits = _load_habits(readonly=True)
     linked = [h for h in habits if h.get('linkedTracker') == tracker_name and h.get('active')]
     if not linked:
         return
     habit = linked[0]
-    entries = _load_habit_log()
-    already = any(e.get('habitId') == habit['id'] and e.get('date') == date_str for e in entries)
-    if already:
+    if storage.find_rows(HABIT_LOG_FILE, habitId=habit['id'], date=date_str):
         return
-    entries.append({
+    entry = {
         'id': str(uuid.uuid4())[:8],
         'habitId': habit['id'],
         'date': date_str,
@@ -111,22 +129,94 @@ def _auto_complete_linked_habit(tracker_name, date_str):
         'durationMinutes': habit.get('durationMinutes'),
         'notes': '',
         'source': 'auto',
-    })
-    _save_habit_log(entries)
+    }
+    storage.put_row(HABIT_LOG_FILE, entry['id'], entry)
+
+
+# --- Aggregates ---
+# Folded over each log by storage as rows are written (rebuilt after deletes),
+# so the summaries never rescan the history.
+
+def _fold_rowing_day(acc, e):
+    """date -> (sessions, meters); each day's pair is replaced whole, so a
+    concurrent reader never sees one without the other."""
+    sessions, meters = acc.get(e.get('date', ''), (0, 0))
+    acc[e.get('date', '')] = (sessions + 1, meters + (e.get('meters', 0) or 0))
+
+
+def _fold_habit_counts(acc, e):
+    """date -> {habitId: completions}."""
+    day = acc.setdefault(e.get('date', ''), {})
+    day[e.get('habitId')] = day.get(e.get('habitId'), 0) + 1
+
+
+def _fold_day_score(acc, e):
+    """date -> score of the first entry logged for that date."""
+    acc.setdefault(e.get('date', ''), e.get('score', 0))
+
+
+storage.register_aggregate(ROWING_FILE, 'by_day', dict, _fold_rowing_day)
+storage.register_aggregate(HABIT_LOG_FILE, 'counts', dict, _fold_habit_counts)
+storage.register_aggregate(FAMILY_SCORE_FILE, 'day_scores', dict, _fold_day_score)
+
+
+def _weight_in_lbs(row, field, value):
+    return value * 2.20462 if field == 'weight' and row.get('unit') == 'kg' else value
+
+
+storage.register_aggregate(WEIGHT_FILE, 'columns',
+                           *timeseries.columns(('weight', 'bodyFat'), scale=_weight_in_lbs))
+storage.register_aggregate(ROWING_FILE, 'columns',
+                           *timeseries.columns(('meters', 'minutes', 'calories', 'strokeRate')))
+
+
+def _days_since(since):
+    """YYYY-MM-DD for each day from since through today."""
+    day, today = datetime.strptime(since, '%Y-%m-%d'), datetime.now()
+    while day <= today:
+        yield day.strftime('%Y-%m-%d')
+        day += timedelta(days=1)
+
+
+def _rowing_since(since):
+    """(sessions, meters) rowed from the since date through today.
+
+    One lookup per day in the per-day aggregate, so the cost follows the
+    window (a week or a month), not the history.
+    """
+    by_day = storage.aggregate(ROWING_FILE, 'by_day')
+    sessions = meters = 0
+    for day in _days_since(since):
+        n, m = by_day.get(day, (0, 0))
+        sessions += n
+        meters += m
+    return sessions, meters
+
+
+def _habit_counts_since(since):
+    """habitId -> completions from the since date through today."""
+    by_date = storage.aggregate(HABIT_LOG_FILE, 'counts')
+    counts = {}
+    for day in _days_since(since):
+        for habit_id, n in list(by_date.get(day, {}).items()):
+            counts[habit_id] = counts.get(habit_id, 0) + n
+    return counts
+
+
+def _family_score_today(today):
+    return next(iter(storage.find_rows(FAMILY_SCORE_FILE, date=today)), None)
 
 
 # --- Weight Tracking ---
 
 @bp.route('/api/health/weight', methods=['GET'])
+@depends_on(WEIGHT_FILE)
 def get_weight():
-    """Get weight log. Optional ?days=N to limit history."""
-    entries = _load_json(WEIGHT_FILE)
-    days = request.args.get('days', type=int)
-    if days:
-        cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-        entries = [e for e in entries if e.get('date', '') >= cutoff_date]
-    # Sort newest first
-    entries.sort(key=lambda e: e.get('date', ''), reverse=True)
+    """Get weight log, newest first. Optional ?days=N, ?month=YYYY-MM or ?from=&to= window."""
+    try:
+        entries = _in_window(WEIGHT_FILE)
+    except ValueError:
+        return jsonify({'error': 'invalid date filter'}), 400
     return jsonify({'entries': entries, 'count': len(entries)})
 
 
@@ -149,9 +239,7 @@ def add_weight():
         'createdAt': datetime.now().isoformat(),
     }
 
-    entries = _load_json(WEIGHT_FILE)
-    entries.append(entry)
-    _save_json(WEIGHT_FILE, entries)
+    storage.put_row(WEIGHT_FILE, entry['id'], entry)
 
     return jsonify({'entry': entry}), 201
 
@@ -159,26 +247,21 @@ def add_weight():
 @bp.route('/api/health/weight/<entry_id>', methods=['DELETE'])
 def delete_weight(entry_id):
     """Delete a weight entry by ID."""
-    entries = _load_json(WEIGHT_FILE)
-    before = len(entries)
-    entries = [e for e in entries if e.get('id') != entry_id]
-    if len(entries) == before:
+    if not storage.delete_row(WEIGHT_FILE, entry_id):
         return jsonify({'error': 'not found'}), 404
-    _save_json(WEIGHT_FILE, entries)
     return jsonify({'deleted': entry_id})
 
 
 # --- Rowing Sessions ---
 
 @bp.route('/api/health/rowing', methods=['GET'])
+@depends_on(ROWING_FILE)
 def get_rowing():
-    """Get rowing session log. Optional ?days=N to limit history."""
-    entries = _load_json(ROWING_FILE)
-    days = request.args.get('days', type=int)
-    if days:
-        cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-        entries = [e for e in entries if e.get('date', '') >= cutoff_date]
-    entries.sort(key=lambda e: e.get('date', ''), reverse=True)
+    """Get rowing session log, newest first. Optional ?days=N, ?month=YYYY-MM or ?from=&to= window."""
+    try:
+        entries = _in_window(ROWING_FILE)
+    except ValueError:
+        return jsonify({'error': 'invalid date filter'}), 400
     return jsonify({'entries': entries, 'count': len(entries)})
 
 
@@ -203,9 +286,7 @@ def add_rowing():
         'createdAt': datetime.now().isoformat(),
     }
 
-    entries = _load_json(ROWING_FILE)
-    entries.append(entry)
-    _save_json(ROWING_FILE, entries)
+    storage.put_row(ROWING_FILE, entry['id'], entry)
 
     # Auto-complete linked rowing habit
     _auto_complete_linked_habit('rowing', entry['date'])
@@ -216,18 +297,15 @@ def add_rowing():
 @bp.route('/api/health/rowing/<entry_id>', methods=['DELETE'])
 def delete_rowing(entry_id):
     """Delete a rowing session by ID."""
-    entries = _load_json(ROWING_FILE)
-    before = len(entries)
-    entries = [e for e in entries if e.get('id') != entry_id]
-    if len(entries) == before:
+    if not storage.delete_row(ROWING_FILE, entry_id):
         return jsonify({'error': 'not found'}), 404
-    _save_json(ROWING_FILE, entries)
     return jsonify({'deleted': entry_id})
 
 
 # --- Habit Definitions ---
 
 @bp.route('/api/health/habits', methods=['GET'])
+@depends_on(HABITS_FILE)
 def get_habits():
     """List active habits. Auto-seeds defaults on first call."""
     habits = _load_habits()
@@ -293,19 +371,13 @@ def delete_habit(habit_id):
 # --- Habit Log ---
 
 @bp.route('/api/health/habit-log', methods=['GET'])
+@depends_on(HABIT_LOG_FILE)
 def get_habit_log():
-    """Get habit log entries. Optional ?date=YYYY-MM-DD or ?days=N."""
-    entries = _load_habit_log()
-    date_filter = request.args.get('date')
-    days = request.args.get('days', type=int)
-
-    if date_filter:
-        entries = [e for e in entries if e.get('date') == date_filter]
-    elif days:
-        cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-        entries = [e for e in entries if e.get('date', '') >= cutoff]
-
-    entries.sort(key=lambda e: e.get('date', ''), reverse=True)
+    """Get habit log entries, newest first. Optional ?date=YYYY-MM-DD, ?days=N, ?month= or ?from=&to=."""
+    try:
+        entries = _in_window(HABIT_LOG_FILE)
+    except ValueError:
+        return jsonify({'error': 'invalid date filter'}), 400
     return jsonify({'entries': entries, 'count': len(entries)})
 
 
@@ -318,11 +390,9 @@ def log_habit():
         return jsonify({'error': 'habitId is required'}), 400
 
     date_str = data.get('date') or datetime.now().strftime('%Y-%m-%d')
-    entries = _load_habit_log()
 
     # Prevent duplicate check-off for same habit+date
-    already = any(e.get('habitId') == habit_id and e.get('date') == date_str for e in entries)
-    if already:
+    if storage.find_rows(HABIT_LOG_FILE, habitId=habit_id, date=date_str):
         return jsonify({'error': 'already logged for this date'}), 409
 
     entry = {
@@ -335,20 +405,15 @@ def log_habit():
         'source': 'manual',
     }
 
-    entries.append(entry)
-    _save_habit_log(entries)
+    storage.put_row(HABIT_LOG_FILE, entry['id'], entry)
     return jsonify({'entry': entry}), 201
 
 
 @bp.route('/api/health/habit-log/<entry_id>', methods=['DELETE'])
 def delete_habit_log(entry_id):
     """Un-check a habit (delete log entry)."""
-    entries = _load_habit_log()
-    before = len(entries)
-    entries = [e for e in entries if e.get('id') != entry_id]
-    if len(entries) == before:
+    if not storage.delete_row(HABIT_LOG_FILE, entry_id):
         return jsonify({'error': 'not found'}), 404
-    _save_habit_log(entries)
     return jsonify({'deleted': entry_id})
 
 
@@ -363,55 +428,27 @@ FAMILY_SCORE_LABELS = {
 }
 
 
-def _load_family_scores():
-    """Load family time score entries."""
-    data = _load_json(FAMILY_SCORE_FILE)
-    if isinstance(data, dict):
-        return data.get('entries', [])
-    return data if isinstance(data, list) else []
-
-
-def _save_family_scores(entries):
-    """Save family time score entries."""
-    _save_json(FAMILY_SCORE_FILE, {'entries': entries})
-
-
-def _family_score_streak(entries):
+def _family_score_streak():
     """Calculate current streak of days with score >= 4."""
-    if not entries:
-        return 0
-    sorted_entries = sorted(entries, key=lambda e: e.get('date', ''), reverse=True)
+    day_scores = storage.aggregate(FAMILY_SCORE_FILE, 'day_scores')
     streak = 0
-    expected = datetime.now().strftime('%Y-%m-%d')
-    for entry in sorted_entries:
-        d = entry.get('date', '')
-        if d == expected and entry.get('score', 0) >= 4:
-            streak += 1
-            expected = (datetime.strptime(d, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
-        elif d == expected:
-            # Scored but below threshold — streak broken
-            break
-        elif d < expected:
-            # Missed a day — streak broken
-            break
+    day = datetime.now()
+    # A missed day or a score below the threshold breaks the streak
+    while day_scores.get(day.strftime('%Y-%m-%d'), 0) >= 4:
+        streak += 1
+        day -= timedelta(days=1)
     return streak
 
 
 @bp.route('/api/health/family-score', methods=['GET'])
+@depends_on(FAMILY_SCORE_FILE)
 def get_family_score():
-    """Get family time scores. Optional ?date=YYYY-MM-DD or ?days=N."""
-    entries = _load_family_scores()
-    date_filter = request.args.get('date')
-    days = request.args.get('days', type=int)
-
-    if date_filter:
-        entries = [e for e in entries if e.get('date') == date_filter]
-    elif days:
-        cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-        entries = [e for e in entries if e.get('date', '') >= cutoff]
-
-    entries.sort(key=lambda e: e.get('date', ''), reverse=True)
-    streak = _family_score_streak(_load_family_scores())
+    """Get family time scores, newest first. Optional ?date=YYYY-MM-DD, ?days=N, ?month= or ?from=&to=."""
+    try:
+        entries = _in_window(FAMILY_SCORE_FILE)
+    except ValueError:
+        return jsonify({'error': 'invalid date filter'}), 400
+    streak = _family_score_streak()
 
     return jsonify({
         'entries': entries,
@@ -430,16 +467,15 @@ def submit_family_score():
         return jsonify({'error': 'score must be 1-5'}), 400
 
     date_str = data.get('date') or datetime.now().strftime('%Y-%m-%d')
-    entries = _load_family_scores()
 
     # One score per day — update if exists
-    existing = next((e for e in entries if e.get('date') == date_str), None)
+    existing = next(iter(storage.find_rows(FAMILY_SCORE_FILE, date=date_str)), None)
     if existing:
         existing['score'] = int(score)
         existing['label'] = FAMILY_SCORE_LABELS.get(int(score), '')
         existing['notes'] = data.get('notes', existing.get('notes', ''))
         existing['updatedAt'] = datetime.now().isoformat()
-        _save_family_scores(entries)
+        storage.put_row(FAMILY_SCORE_FILE, existing['id'], existing)
         return jsonify({'entry': existing, 'updated': True})
 
     entry = {
@@ -450,55 +486,41 @@ def submit_family_score():
         'notes': data.get('notes', ''),
         'createdAt': datetime.now().isoformat(),
     }
-    entries.append(entry)
-    _save_family_scores(entries)
+    storage.put_row(FAMILY_SCORE_FILE, entry['id'], entry)
     return jsonify({'entry': entry}), 201
 
 
 @bp.route('/api/health/family-score/<entry_id>', methods=['DELETE'])
 def delete_family_score(entry_id):
     """Delete a family time score entry."""
-    entries = _load_family_scores()
-    before = len(entries)
-    entries = [e for e in entries if e.get('id') != entry_id]
-    if len(entries) == before:
+    if not storage.delete_row(FAMILY_SCORE_FILE, entry_id):
         return jsonify({'error': 'not found'}), 404
-    _save_family_scores(entries)
     return jsonify({'deleted': entry_id})
 
 
 # --- Summary ---
 
 @bp.route('/api/health/summary', methods=['GET'])
+@depends_on(WEIGHT_FILE, ROWING_FILE, HABITS_FILE, HABIT_LOG_FILE, FAMILY_SCORE_FILE)
 def health_summary():
     """Get a summary of latest health metrics including habits."""
-    weight_entries = _load_json(WEIGHT_FILE)
-    rowing_entries = _load_json(ROWING_FILE)
-
-    # Latest weight
-    weight_entries.sort(key=lambda e: e.get('date', ''), reverse=True)
-    latest_weight = weight_entries[0] if weight_entries else None
-
-    # Weight trend (last 7 entries)
-    weight_trend = weight_entries[:7]
+    # Latest weight and trend (last 7 entries)
+    weight_trend = storage.rows_by_date(WEIGHT_FILE, limit=7)
+    latest_weight = weight_trend[0] if weight_trend else None
 
     # Rowing stats this week
     week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
     month_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    rowing_this_week = [e for e in rowing_entries if e.get('date', '') >= week_ago]
-    rowing_this_month = [e for e in rowing_entries if e.get('date', '') >= month_ago]
-
-    week_meters = sum(e.get('meters', 0) or 0 for e in rowing_this_week)
-    month_meters = sum(e.get('meters', 0) or 0 for e in rowing_this_month)
+    week_sessions, week_meters = _rowing_since(week_ago)
+    month_sessions, month_meters = _rowing_since(month_ago)
 
     # Habit summary
     today = datetime.now().strftime('%Y-%m-%d')
     iso_weekday = datetime.now().isoweekday()  # 1=Mon .. 7=Sun
-    habits = _load_habits()
+    habits = _load_habits(readonly=True)
     active_habits = [h for h in habits if h.get('active', True)]
     todays_habits = [h for h in active_habits if iso_weekday in h.get('defaultDays', [])]
-    log_entries = _load_habit_log()
-    todays_log = [e for e in log_entries if e.get('date') == today]
+    todays_log = _habit_log_on(today)
     completed_ids = {e['habitId'] for e in todays_log}
     completed_today = [h for h in todays_habits if h['id'] in completed_ids]
 
@@ -507,8 +529,8 @@ def health_summary():
 
     # Weekly habit stats
     week_start = (datetime.now() - timedelta(days=datetime.now().weekday())).strftime('%Y-%m-%d')
-    week_log = [e for e in log_entries if e.get('date', '') >= week_start]
-    week_completed = len(week_log)
+    week_by_habit = _habit_counts_since(week_start)
+    week_completed = sum(week_by_habit.values())
     # Total possible = sum of habits suggested per day this week (up to today)
     days_so_far = datetime.now().weekday() + 1  # Mon=1 .. Sun=7
     week_total_possible = 0
@@ -518,23 +540,22 @@ def health_summary():
     week_rate = round(week_completed / week_total_possible, 2) if week_total_possible else 0
 
     # Family time score
-    family_scores = _load_family_scores()
-    todays_family = next((e for e in family_scores if e.get('date') == today), None)
-    family_streak = _family_score_streak(family_scores)
+    todays_family = _family_score_today(today)
+    family_streak = _family_score_streak()
 
     return jsonify({
         'latestWeight': latest_weight,
         'weightTrend': weight_trend,
         'rowingThisWeek': {
-            'sessions': len(rowing_this_week),
+            'sessions': week_sessions,
             'totalMeters': week_meters,
         },
         'rowingThisMonth': {
-            'sessions': len(rowing_this_month),
+            'sessions': month_sessions,
             'totalMeters': month_meters,
         },
-        'totalWeightEntries': len(weight_entries),
-        'totalRowingSessions': len(rowing_entries),
+        'totalWeightEntries': storage.count_rows(WEIGHT_FILE),
+        'totalRowingSessions': storage.count_rows(ROWING_FILE),
         'habitsToday': {
             'suggested': len(todays_habits),
             'completed': len(completed_today),
@@ -545,9 +566,55 @@ def health_summary():
             'totalPossible': week_total_possible,
             'completed': week_completed,
             'completionRate': week_rate,
+            'byHabit': week_by_habit,
         },
         'familyScore': {
             'today': todays_family,
             'streak': family_streak,
         },
     })
+
+
+# --- Series ---
+
+# metric -> (store, column, default aggregate)
+SERIES_METRICS = {
+    'weight': (WEIGHT_FILE, 'weight', 'mean'),
+    'bodyFat': (WEIGHT_FILE, 'bodyFat', 'mean'),
+    'meters': (ROWING_FILE, 'meters', 'sum'),
+    'minutes': (ROWING_FILE, 'minutes', 'sum'),
+    'calories': (ROWING_FILE, 'calories', 'sum'),
+    'strokeRate': (ROWING_FILE, 'strokeRate', 'mean'),
+}
+
+
+@bp.route('/api/health/series', methods=['GET'])
+@depends_on(WEIGHT_FILE, ROWING_FILE)
+def get_series():
+    """Chart series: ?metric=weight&bucket=day|week|month&agg=mean|sum|min|max|last&window=N.
+
+    Optional ?days=N, ?month= or ?from=&to= window. Weight is reported in lbs.
+    """
+    metric = request.args.get('metric', 'weight')
+    if metric not in SERIES_METRICS:
+        return jsonify({'error': 'metric must be one of: ' + ', '.join(SERIES_METRICS)}), 400
+    path, column, default_agg = SERIES_METRICS[metric]
+    bucket = request.args.get('bucket', 'day')
+    agg = request.args.get('agg', default_agg)
+    if bucket not in timeseries.BUCKETS or agg not in timeseries.AGGREGATES:
+        return jsonify({'error': 'bucket must be day/week/month and agg mean/sum/min/max/last'}), 400
+    try:
+        window = request.args.get('window', 7, type=int)
+        since, until = date_window(request.args)
+        since = timeseries.ordinal(since) if since else None
+        until = timeseries.ordinal(until) if until else None
+    except ValueError:
+        return jsonify({'error': 'invalid date filter'}), 400
+
+    cols = storage.snapshot_aggregate(path, 'columns', timeseries.copy_columns)
+    result = timeseries.series(cols, column, bucket=bucket, agg=agg,
+                               since=since, until=until, window=max(window or 0, 0))
+    result.update(metric=metric, bucket=bucket, agg=agg, window=window)
+    if metric == 'weight':
+        result['unit'] = 'lbs'
+    return jsonify(result)
@@ -1,34 +1,27 @@
 """Oliver's Almanac — daily quote journal with CalDAV sync."""
-import json
 import uuid
 from datetime import date, datetime
 
-import requests as http_requests
 from flask import Blueprint, request, jsonify
 
-from .shared import CONFIG, nextcloud_auth
+from .shared import (CONFIG, nextcloud_configured, caldav_url, caldav_request, depends_on, serialize_writes,
+                     locks_own_writes)
+from . import storage
+from .caldav_mirror import invalidate
 
 bp = Blueprint('oliver', __name__)
 
 OLIVER_QUOTES_FILE = '/opt/oliver-quotes.json'
+_store_lock = serialize_writes(bp, OLIVER_QUOTES_FILE + '.lock')
+storage.register_table(OLIVER_QUOTES_FILE, 'quotes', keyed=True, fields=(), indent=2, sort_keys=True)
 
 
 def _load_quotes():
-    try:
-        with open(OLIVER_QUOTES_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
-
-
-def _save_quotes(quotes):
-    with open(OLIVER_QUOTES_FILE, 'w') as f:
-        json.dump(quotes, f, indent=2, sort_keys=True)
+    return storage.load(OLIVER_QUOTES_FILE, {})
 
 
 def _create_caldav_event(date_str, quote_text):
-    user, password = nextcloud_auth()
-    if not user or not password:
+    if not nextcloud_configured():
         return False
     uid = str(uuid.uuid4())
     now = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
@@ -50,28 +43,27 @@ def _create_caldav_event(date_str, quote_text):
         ""
     ])
     try:
-        caldav_url = (CONFIG['nextcloud_url'] + "/remote.php/dav/calendars/"
-                      + CONFIG['nextcloud_user'] + "/" + CONFIG['nextcloud_calendar']
-                      + "/" + uid + ".ics")
-        r = http_requests.put(
-            caldav_url,
+        r = caldav_request(
+            "PUT",
+            caldav_url() + uid + ".ics",
             data=ical,
-            headers={"Content-Type": "text/calendar; charset=utf-8"},
-            auth=(user, password),
-            timeout=10
+            headers={"Content-Type": "text/calendar; charset=utf-8"}
         )
-        return r.status_code in (200, 201, 204)
+        if r.status_code in (200, 201, 204):
+            invalidate(CONFIG['nextcloud_calendar'])
+            return True
+        return False
     except Exception as e:
         print("CalDAV event creation failed: " + str(e))
         return False
 
 
 @bp.route('/api/oliver-quotes', methods=['GET'])
+@depends_on(OLIVER_QUOTES_FILE)
 def get_oliver_quotes():
-    quotes = _load_quotes()
     date_filter = request.args.get('date')
     if date_filter:
-        entry = quotes.get(date_filter)
+        entry = storage.get_row(OLIVER_QUOTES_FILE, date_filter)
         if isinstance(entry, str):
             entry = {"quote": entry, "submitted_by": "unknown"}
         return jsonify({
@@ -80,7 +72,7 @@ def get_oliver_quotes():
             "submitted_by": entry.get("submitted_by") if entry else None
         }), 200
     result = {}
-    for d, v in quotes.items():
+    for d, v in _load_quotes().items():
         if isinstance(v, str):
             result[d] = {"quote": v, "submitted_by": "unknown"}
         else:
@@ -89,24 +81,25 @@ def get_oliver_quotes():
 
 
 @bp.route('/api/oliver-quotes', methods=['POST'])
+@locks_own_writes
 def save_oliver_quote():
     data = request.get_json()
     if not data or not data.get('quote', '').strip():
         return jsonify({"error": "Quote text is required"}), 400
     today = date.today().isoformat()
-    quotes = _load_quotes()
-    if today in quotes:
-        existing = quotes[today]
-        q = existing.get("quote", existing) if isinstance(existing, dict) else existing
-        return jsonify({"error": "Already submitted for today", "date": today, "quote": q}), 409
     submitted_by = request.headers.get('X-Device-Name', '') or request.remote_addr or 'unknown'
     entry = {
         "quote": data['quote'].strip(),
         "submitted_by": submitted_by,
         "timestamp": datetime.now().isoformat()
     }
-    quotes[today] = entry
-    _save_quotes(quotes)
+    with _store_lock():
+        existing = storage.get_row(OLIVER_QUOTES_FILE, today)
+        if existing is not None:
+            q = existing.get("quote", existing) if isinstance(existing, dict) else existing
+            return jsonify({"error": "Already submitted for today", "date": today, "quote": q}), 409
+        storage.put_row(OLIVER_QUOTES_FILE, today, entry)
+    # The calendar event is created after the lock is released
     caldav_ok = _create_caldav_event(today, entry['quote'])
     return jsonify({
         "date": today,
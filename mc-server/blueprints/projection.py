@@ -0,0 +1,333 @@
+"""Vectorised cash-flow projections for the financial scenarios.
+
+Months are handled as integer indexes (year * 12 + month - 1) so stream start
+and end bounds become array comparisons. project() builds the full
+(scenario x stream x month) gross revenue matrix in one go and derives taxes,
+net cash flow, the running cumulative and the break-even month from it, so
+projecting every scenario over a ten-year horizon is a handful of array ops.
+
+simulate() replaces the expected-value view with Monte Carlo paths in which
+each stream either lands or does not, with jittered timing and amount.
+sensitivity() sweeps a grid of tax rates, expenses and stream toggles.
+"""
+import atexit
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+MAX_HORIZON = 240
+
+
+def month_index(month):
+    """'YYYY-MM' -> integer month index. Raises ValueError on a malformed month."""
+    year, num = str(month)[:7].split('-')
+    num = int(num)
+    if len(year) != 4 or not 1 <= num <= 12:
+        raise ValueError(f"invalid month: {month!r}")
+    return int(year) * 12 + num - 1
+
+
+def month_label(index):
+    return f"{index // 12}-{index % 12 + 1:02d}"
+
+
+def parse_horizon(value, default=12):
+    """?months= query value -> horizon in months (1..MAX_HORIZON). Raises ValueError."""
+    horizon = int(value) if value not in (None, '') else default
+    if not 1 <= horizon <= MAX_HORIZON:
+        raise ValueError(f"months must be between 1 and {MAX_HORIZON}")
+    return horizon
+
+
+_OPEN = 10 ** 9   # stands in for a missing start/end bound; survives jitter
+DEFAULT_START = '2026-01'   # streams saved without a startMonth key start here
+
+
+def _bounds(streams):
+    """(first, last) month index arrays for streams; empty bounds are open.
+
+    A stream with a malformed month gets an empty range, so it never earns
+    rather than failing the whole projection.
+    """
+    lo = np.empty(len(streams), dtype=np.int64)
+    hi = np.empty(len(streams), dtype=np.int64)
+    for i, s in enumerate(streams):
+        first, last = s.get('startMonth', DEFAULT_START), s.get('endMonth')
+        try:
+            lo[i] = month_index(first) if first else -_OPEN
+            hi[i] = month_index(last) if last else _OPEN
+        except ValueError:
+            lo[i], hi[i] = _OPEN, -_OPEN
+    return lo, hi
+
+
+def stream_revenue(streams, start, horizon):
+    """(stream x month) expected revenue and activity mask from start ('YYYY-MM').
+
+    A stream earns monthlyAmount * probability in every month between its
+    startMonth and endMonth inclusive; an empty bound is open.
+    """
+    months = month_index(start) + np.arange(horizon)
+    lo, hi = _bounds(streams)
+    active = (months >= lo[:, None]) & (months <= hi[:, None])
+    amount = np.array([float(s.get('monthlyAmount') or 0) * float(s.get('probability', 1.0))
+                       for s in streams], dtype=np.float64)
+    return amount[:, None] * active, active
+
+
+def _break_even(cumulative, net_cash_flow):
+    """First month index (last axis) where the cumulative is non-negative on a
+    positive month, or -1. Compared at cent precision, as months are reported."""
+    hit = (np.round(cumulative, 2) >= 0) & (np.round(net_cash_flow, 2) > 0)
+    return np.where(hit.any(axis=-1), hit.argmax(axis=-1), -1)
+
+
+def project(scenarios, streams, start, horizon=12):
+    """Project every scenario over the same months.
+
+    Returns a dict of arrays: gross is (scenario x stream x month), the
+    per-month totals (grossRevenue, taxes, netRevenue, netCashFlow,
+    cumulative) are (scenario x month), and breakEven holds the first month
+    index where the cumulative is non-negative on a positive month (-1 when
+    never). Stream ids a scenario names but that no longer exist are ignored.
+    """
+    positions = {s['id']: i for i, s in enumerate(streams)}
+    included = np.zeros((len(scenarios), len(streams)), dtype=np.float64)
+    for row, scenario in enumerate(scenarios):
+        for sid in scenario.get('streamIds', []):
+            if sid in positions:
+                included[row, positions[sid]] += 1
+
+    revenue, active = stream_revenue(streams, start, horizon)
+    gross = included[:, :, None] * revenue[None, :, :]
+    tax_rate = np.array([s.get('taxRate', 0.30) for s in scenarios], dtype=np.float64)
+    expenses = np.array([s.get('monthlyExpenses', 4500) for s in scenarios], dtype=np.float64)
+
+    gross_revenue = gross.sum(axis=1)
+    taxes = gross_revenue * tax_rate[:, None]
+    net_revenue = gross_revenue - taxes
+    net_cash_flow = net_revenue - expenses[:, None]
+    cumulative = np.cumsum(net_cash_flow, axis=1)
+
+    break_even = _break_even(cumulative, net_cash_flow)
+
+    first = month_index(start)
+    return {
+        'months': [month_label(first + i) for i in range(horizon)],
+        'included': included,
+        'active': active,
+        'gross': gross,
+        'expenses': expenses,
+        'grossRevenue': gross_revenue,
+        'taxes': taxes,
+        'netRevenue': net_revenue,
+        'netCashFlow': net_cash_flow,
+        'cumulative': cumulative,
+        'breakEven': break_even,
+    }
+
+
+# --- Sensitivity ---
+
+def sensitivity(scenario, streams, start, horizon, tax_rates, expenses, toggles=()):
+    """Evaluate a scenario over a grid of assumptions in one pass.
+
+    Every combination of tax rate, monthly expenses and on/off states of the
+    toggled streams (which may or may not be in the scenario) is projected.
+    Returns combos, a list of {stream id: on} dicts, and arrays shaped
+    (combo x tax rate x expenses [x month]): netCashFlow, cumulative and
+    breakEven (month index or -1).
+    """
+    positions = {s['id']: i for i, s in enumerate(streams)}
+    base = np.zeros(len(streams))
+    for sid in scenario.get('streamIds', []):
+        if sid in positions:
+            base[positions[sid]] += 1
+    toggled = [positions[sid] for sid in toggles]
+    combos = np.array(list(itertools.product((0, 1), repeat=len(toggled))), dtype=np.float64)
+    included = np.repeat(base[None, :], len(combos), axis=0)
+    included[:, toggled] = combos
+
+    revenue, _ = stream_revenue(streams, start, horizon)
+    gross = included @ revenue                                     # combo x month
+    tax = np.asarray(tax_rates, dtype=np.float64)[None, :, None, None]
+    spend = np.asarray(expenses, dtype=np.float64)[None, None, :, None]
+    net = gross[:, None, None, :] * (1 - tax) - spend
+    cumulative = np.cumsum(net, axis=-1)
+    return {
+        'months': [month_label(month_index(start) + i) for i in range(horizon)],
+        'combos': [{sid: bool(on) for sid, on in zip(toggles, row)} for row in combos],
+        'netCashFlow': net,
+        'cumulative': cumulative,
+        'breakEven': _break_even(cumulative, net),
+    }
+
+
+# --- Monte Carlo ---
+
+SIM_CHUNK = 10000        # paths per task; fixed so a seed gives the same result on any pool size
+PERCENTILES = (5, 25, 50, 75, 95)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _executor(workers):
+    """Process pool shared by simulations in this process, created on first use.
+
+    Workers come from a forkserver, so forking never copies the threads (and
+    locks) of a running server worker. Every server worker gets its own pool,
+    which is why simulation_workers defaults to a small number.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context('forkserver'))
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool(broken=None):
+    """Shut the pool down (only if it is still broken, when given) so the
+    next simulation starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        pool = _pool
+        if pool is None or (broken is not None and pool is not broken):
+            return
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_chunks(model, sizes, seeds, workers):
+    """_simulate_chunk over every chunk, on the pool when it pays off.
+
+    A pool whose worker died is replaced on the next call; this one finishes
+    in-process.
+    """
+    if workers > 1 and len(sizes) > 1:
+        pool = _executor(workers)
+        try:
+            return list(pool.map(_simulate_chunk, [model] * len(sizes), sizes, seeds))
+        except BrokenProcessPool:
+            _shutdown_pool(pool)
+    return [_simulate_chunk(model, n, s) for n, s in zip(sizes, seeds)]
+
+
+def _simulate_chunk(model, paths, seed):
+    """Simulate paths; -> (cumulative float32 month x path, break-even idx, run-out idx)."""
+    rng = np.random.default_rng(seed)
+    horizon = model['horizon']
+    rows = np.arange(paths)
+    # Each stream adds its level at its first month and removes it after its
+    # last, so one cumsum over months gives gross revenue for every path
+    delta = np.zeros((paths, horizon + 1))
+    for amount, probability, lo, hi in zip(model['amount'], model['probability'],
+                                           model['lo'], model['hi']):
+        level = np.where(rng.random(paths) < probability, float(amount), 0.0)
+        if model['amountJitter']:
+            level *= np.maximum(rng.normal(1.0, model['amountJitter'], paths), 0)
+        shift = 0
+        if model['startJitter']:
+            shift = rng.integers(-model['startJitter'], model['startJitter'] + 1, paths)
+        first = np.clip(lo + shift - model['first'], 0, horizon)
+        end = np.clip(hi + shift - model['first'] + 1, 0, horizon)
+        delta[rows, first] += level
+        delta[rows, np.maximum(end, first)] -= level
+
+    net = np.cumsum(delta[:, :horizon], axis=1) * (1 - model['taxRate']) - model['expenses']
+    cumulative = np.cumsum(net, axis=1)
+    hit = (cumulative >= 0) & (net > 0)
+    short = cumulative + model['cash'] < 0
+    return (np.ascontiguousarray(cumulative.T, dtype=np.float32),
+            np.where(hit.any(axis=1), hit.argmax(axis=1), -1),
+            np.where(short.any(axis=1), short.argmax(axis=1), -1))
+
+
+def _percentiles(values, qs):
+    """Linear-interpolated percentiles along the last axis.
+
+    A full sort beats np.percentile's multi-point partition here, by several
+    times on float32 rows.
+    """
+    n = values.shape[-1]
+    pos = np.array(qs) / 100 * (n - 1)
+    below = np.floor(pos).astype(np.int64)
+    above = np.minimum(below + 1, n - 1)
+    ordered = np.sort(values, axis=-1)
+    frac = pos - below
+    return ordered[..., below] * (1 - frac) + ordered[..., above] * frac
+
+
+def _first_month_stats(index, labels):
+    """Per-path first-month indexes (-1 = never) -> distribution summary."""
+    paths = len(index)
+    horizon = len(labels)
+    counts = np.bincount(index[index >= 0], minlength=horizon)
+    hit = np.sort(index[index >= 0])
+
+    def at(q):
+        # Percentile over all paths; None once it falls among the never-hit ones
+        k = int(np.ceil(q / 100 * paths)) - 1
+        return labels[hit[k]] if 0 <= k < len(hit) else None
+
+    return {
+        'probability': round(len(hit) / paths, 4),
+        'byMonth': np.round(np.cumsum(counts) / paths, 4).tolist(),
+        'p10': at(10),
+        'p50': at(50),
+        'p90': at(90),
+    }
+
+
+def simulate(scenario, streams, start, horizon=12, paths=10000, cash=0.0,
+             start_jitter=1, amount_jitter=0.15, seed=None, workers=1):
+    """Monte Carlo cash flow for one scenario.
+
+    Each path lands each included stream with its probability (rather than
+    scaling by it), shifts its start and end by up to start_jitter months and
+    scales its amount by a normal factor with sd amount_jitter. Returns the
+    percentile bands of cash on hand (cash + cumulative net) per month, the
+    chance of running short of cash and the break-even distribution, both with
+    per-month cumulative probabilities. Chunks run on a process pool when
+    workers > 1 and there is more than one chunk.
+    """
+    positions = {s['id']: s for s in streams}
+    included = [positions[sid] for sid in scenario.get('streamIds', []) if sid in positions]
+    lo, hi = _bounds(included)
+    model = {
+        'first': month_index(start),
+        'horizon': horizon,
+        'amount': [float(s.get('monthlyAmount') or 0) for s in included],
+        'probability': [float(s.get('probability', 1.0)) for s in included],
+        'lo': lo,
+        'hi': hi,
+        'taxRate': float(scenario.get('taxRate', 0.30)),
+        'expenses': float(scenario.get('monthlyExpenses', 4500)),
+        'cash': float(cash),
+        'startJitter': int(start_jitter),
+        'amountJitter': float(amount_jitter),
+    }
+
+    sizes = [SIM_CHUNK] * (paths // SIM_CHUNK) + ([paths % SIM_CHUNK] if paths % SIM_CHUNK else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    parts = _run_chunks(model, sizes, seeds, workers)
+    cumulative = np.concatenate([p[0] for p in parts], axis=1)
+    break_even = np.concatenate([p[1] for p in parts])
+    run_out = np.concatenate([p[2] for p in parts])
+
+    labels = [month_label(model['first'] + i) for i in range(horizon)]
+    bands = _percentiles(cumulative, PERCENTILES).T.astype(np.float64) + model['cash']
+    return {
+        'months': labels,
+        'paths': paths,
+        'cash': {f'p{q}': np.round(band, 2).tolist() for q, band in zip(PERCENTILES, bands)},
+        'mean': np.round(cumulative.mean(axis=1, dtype=np.float64) + model['cash'], 2).tolist(),
+        'runOut': _first_month_stats(run_out, labels),
+        'breakEven': _first_month_stats(break_even, labels),
+    }
@@ -3,11 +3,17 @@ import os
 import re
 import json
 import uuid
+import fcntl
+import tempfile
+import threading
+from contextlib import contextmanager
 from datetime import date, datetime, timedelta
 from xml.etree import ElementTree as ET
 
 import requests as http_requests
-from flask import request, jsonify
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import current_app, g, has_app_context, request, jsonify
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -25,6 +31,21 @@ def load_config():
         'nextcloud_app_password': os.getenv('NEXTCLOUD_APP_PASSWORD', ''),
         'nextcloud_calendar': os.getenv('NEXTCLOUD_CALENDAR', 'personal'),
         'nextcloud_tasks_calendar': os.getenv('NEXTCLOUD_TASKS_CALENDAR', 'tasks'),
+        'nextcloud_calendars': [c.strip() for c in os.getenv(
+            'NEXTCLOUD_CALENDARS', os.getenv('NEXTCLOUD_CALENDAR', 'personal')).split(',') if c.strip()],
+        'caldav_mirror': os.getenv('CALDAV_MIRROR', '1') != '0',
+        'caldav_sync_interval': float(os.getenv('CALDAV_SYNC_INTERVAL', '30')),
+        'caldav_stamp_dir': os.getenv('CALDAV_STAMP_DIR', '/opt/mc-data'),
+        'nextcloud_pool_size': int(os.getenv('NEXTCLOUD_POOL_SIZE', '10')),
+        'http_connect_timeout': float(os.getenv('HTTP_CONNECT_TIMEOUT', '5')),
+        'http_read_timeout': float(os.getenv('HTTP_READ_TIMEOUT', '15')),
+        'http_retries': int(os.getenv('HTTP_RETRIES', '2')),
+        'tasks_batch_workers': int(os.getenv('TASKS_BATCH_WORKERS', '4')),
+        'storage_backend': os.getenv('STORAGE_BACKEND', 'json'),
+        'storage_db': os.getenv('STORAGE_DB', '/opt/mc-data/store.db'),
+        'journal_compact_bytes': int(os.getenv('JOURNAL_COMPACT_BYTES', str(256 * 1024))),
+        # Per server worker, so keep it small; 1 runs simulations in-process
+        'simulation_workers': int(os.getenv('SIMULATION_WORKERS', '2')),
         'upload_dir': os.getenv('UPLOAD_DIR', '/mnt/media_pool'),
         'tandoor_url': os.getenv('TANDOOR_URL', 'http://192.168.0.99:8080'),
         'tandoor_user': os.getenv('TANDOOR_USER', ''),
@@ -56,6 +77,246 @@ def check_token():
         return jsonify({"error": "Invalid Authorization header format"}), 401
 
 
+# --- Store Locking ---
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def serialize_writes(bp, lock_path):
+    """Hold an exclusive flock on lock_path for every mutating request to bp.
+
+    Load-modify-save cycles in the blueprint's views then run one at a time
+    across all server processes and threads. Reads take no lock; they rely on
+    atomic_write_json never exposing a half-written file.
+
+    Returns a context manager taking the same lock (a no-op where the request
+    already holds it). Views marked @locks_own_writes, which call out over the
+    network, run without the request-long lock and use it around their store
+    updates only, as does anything that writes on a GET.
+    """
+    key = 'store_lock_' + bp.name
+
+    @contextmanager
+    def store_lock():
+        if has_app_context() and g.get(key) is not None:
+            yield
+            return
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    @bp.before_request
+    def _acquire_store_lock():
+        if request.method in READ_METHODS:
+            return
+        if getattr(current_app.view_functions.get(request.endpoint), 'locks_own_writes', False):
+            return
+        lock_file = open(lock_path, 'a')
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        setattr(g, key, lock_file)
+
+    @bp.teardown_request
+    def _release_store_lock(exc):
+        lock_file = g.pop(key, None)
+        if lock_file is not None:
+            lock_file.close()  # closing the descriptor drops the flock
+
+    return store_lock
+
+
+def locks_own_writes(view):
+    """Exempt a mutating view from serialize_writes' request-long lock.
+
+    Apply below @bp.route. The view takes the returned store lock itself,
+    around its store reads and writes but not its network calls.
+    """
+    view.locks_own_writes = True
+    return view
+
+
+def read_generation(path):
+    """The counter stored in path (0 if there is none yet).
+
+    Every server process sees the same value, so a bump in one worker is
+    visible to the next read in any other.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return 0
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        return int(os.pread(fd, 32, 0) or 0)
+    except ValueError:
+        return 0
+    finally:
+        os.close(fd)
+
+
+def bump_generation(path):
+    """Increment the counter in path under an exclusive flock; returns the new value."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            value = int(os.pread(fd, 32, 0) or 0) + 1
+        except ValueError:
+            value = 1
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, b'%d' % value, 0)
+        return value
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path, data, **dump_kwargs):
+    """Write JSON to a temp file in the same directory and os.replace() it in."""
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.',
+                                    dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# --- Conditional GET ---
+
+def depends_on(*paths, requires_arg=None):
+    """Mark a GET view whose body is a function of these store files.
+
+    Apply below @bp.route. command_server answers If-None-Match for such
+    views from storage.store_etag() before the view runs, so an unchanged store costs
+    a few version checks instead of a load and a re-serialise.
+
+    requires_arg: the body is only a function of the stores (and URL) when
+    this query argument is given; other requests always run the view.
+    """
+    def wrap(view):
+        view.store_files = paths
+        view.store_etag_arg = requires_arg
+        return view
+    return wrap
+
+
+# --- Date Windows ---
+
+def _next_day(day):
+    return (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+def _add_months(month, n):
+    y, m = divmod(int(month[:4]) * 12 + int(month[5:7]) - 1 + n, 12)
+    return '%04d-%02d' % (y, m + 1)
+
+
+_MONTH_ARG = re.compile(r'(\d{4})(?:-(0[1-9]|1[0-2])(?:-\d{2})?)?')
+
+
+def month_window(value):
+    """(since, until) for a ?month= value: YYYY-MM is that month and YYYY the
+    whole year; a full date is cut to its month. Raises ValueError otherwise."""
+    match = _MONTH_ARG.fullmatch(value)
+    if not match:
+        raise ValueError('month must be YYYY-MM or YYYY')
+    if match.group(2) is None:
+        return value, '%04d' % (int(value) + 1)
+    return value[:7], _add_months(value[:7], 1)
+
+
+def date_window(args):
+    """(since, until) date bounds, since inclusive and until exclusive, from query args.
+
+    Understands ?date=YYYY-MM-DD, ?days=N, ?month=YYYY-MM (or YYYY, see
+    month_window()), ?quarter=YYYY-QN and
+    ?from=/&to= (both inclusive). Several are intersected; None means unbounded.
+    Bounds are ISO date strings, so 'YYYY-MM' works as the start of a month.
+    Raises ValueError for malformed values.
+    """
+    bounds = []
+    if args.get('date'):
+        bounds.append((args['date'], _next_day(args['date'])))
+    if args.get('days'):
+        cutoff = (datetime.now() - timedelta(days=int(args['days']))).strftime('%Y-%m-%d')
+        bounds.append((cutoff, None))
+    if args.get('month'):
+        bounds.append(month_window(args['month']))
+    if args.get('quarter'):
+        year, q = args['quarter'].split('-Q')
+        if not 1 <= int(q) <= 4:
+            raise ValueError('quarter must be YYYY-Q1..Q4')
+        start = '%04d-%02d' % (int(year), (int(q) - 1) * 3 + 1)
+        bounds.append((start, _add_months(start, 3)))
+    if args.get('from') or args.get('to'):
+        bounds.append((args.get('from') or None, _next_day(args['to']) if args.get('to') else None))
+    since = max((s for s, _ in bounds if s), default=None)
+    until = min((u for _, u in bounds if u), default=None)
+    return since, until
+
+
+# --- Pooled HTTP Client ---
+
+# Safe or idempotent per RFC 7231 / RFC 4918 — a retry cannot double-apply them
+RETRY_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'PROPFIND', 'REPORT'])
+
+_adapters = {}
+_adapters_lock = threading.Lock()
+_local = threading.local()
+
+
+def _upstream_adapter(base_url, pool_size):
+    """Return the keep-alive connection pool for an upstream, created once per process."""
+    with _adapters_lock:
+        adapter = _adapters.get(base_url)
+        if adapter is None:
+            retry = Retry(
+                total=CONFIG['http_retries'],
+                backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=RETRY_METHODS,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                                  max_retries=retry)
+            _adapters[base_url] = adapter
+        return adapter
+
+
+def http_session(base_url, pool_size=10):
+    """Return this thread's session for an upstream, sharing its connection pool.
+
+    Sessions are per thread (requests.Session is not thread-safe); the mounted
+    HTTPAdapter and its urllib3 pool are shared, so concurrent requests reuse
+    open connections instead of handshaking every call.
+    """
+    sessions = getattr(_local, 'sessions', None)
+    if sessions is None:
+        sessions = _local.sessions = {}
+    session = sessions.get(base_url)
+    if session is None:
+        session = http_requests.Session()
+        session.mount(base_url, _upstream_adapter(base_url, pool_size))
+        sessions[base_url] = session
+    return session
+
+
+def http_timeout():
+    """Default (connect, read) timeout for upstream calls."""
+    return (CONFIG['http_connect_timeout'], CONFIG['http_read_timeout'])
+
+
 # --- Nextcloud Helpers ---
 
 def nextcloud_auth():
@@ -63,6 +324,14 @@ def nextcloud_auth():
     return (CONFIG['nextcloud_user'], CONFIG['nextcloud_app_password'])
 
 
+def caldav_request(method, url, **kwargs):
+    """Send a Nextcloud request through the pooled session with auth and timeouts."""
+    kwargs.setdefault('auth', nextcloud_auth())
+    kwargs.setdefault('timeout', http_timeout())
+    session = http_session(CONFIG['nextcloud_url'], CONFIG['nextcloud_pool_size'])
+    return session.request(method, url, **kwargs)
+
+
 def nextcloud_configured():
     """Check if Nextcloud credentials are configured."""
     return bool(CONFIG['nextcloud_user'] and CONFIG['nextcloud_app_password'])
@@ -75,6 +344,100 @@ def caldav_url(calendar=None):
             + CONFIG['nextcloud_user'] + "/" + cal + "/")
 
 
+DAV_NS = {"D": "DAV:", "C": "urn:ietf:params:xml:ns:caldav"}
+
+
+class CalDAVError(Exception):
+    """A CalDAV request answered with an unexpected HTTP status."""
+
+    def __init__(self, status, body=''):
+        super().__init__("CalDAV request failed: HTTP " + str(status))
+        self.status = status
+        self.body = body
+
+
+def time_range_filter(component, start, end):
+    """Build a calendar-query comp-filter limited to [start, end) (iCal UTC stamps)."""
+    return """<C:comp-filter name="{comp}">
+        <C:time-range start="{start}" end="{end}"/>
+      </C:comp-filter>""".format(comp=component, start=start, end=end)
+
+
+def caldav_query(calendar, comp_filter):
+    """Run a calendar-query REPORT; yield (href, etag, calendar-data) per object."""
+    report_body = """<?xml version="1.0" encoding="utf-8" ?>
+<C:calendar-query xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">
+  <D:prop>
+    <D:getetag/>
+    <C:calendar-data/>
+  </D:prop>
+  <C:filter>
+    <C:comp-filter name="VCALENDAR">
+      {comp_filter}
+    </C:comp-filter>
+  </C:filter>
+</C:calendar-query>""".format(comp_filter=comp_filter)
+
+    r = caldav_request(
+        "REPORT",
+        caldav_url(calendar),
+        data=report_body,
+        headers={"Content-Type": "application/xml; charset=utf-8", "Depth": "1"},
+        stream=True
+    )
+    if r.status_code not in (200, 207):
+        raise CalDAVError(r.status_code, r.text[:500])
+    return iter_multistatus(r)
+
+
+_RESPONSE_TAG = '{DAV:}response'
+_SYNC_TOKEN_TAG = '{DAV:}sync-token'
+_HREF_TAG = '{DAV:}href'
+_ETAG_PATH = './/{DAV:}getetag'
+_CALENDAR_DATA_PATH = './/{urn:ietf:params:xml:ns:caldav}calendar-data'
+
+
+def iter_multistatus(response, meta=None, chunk_size=64 * 1024):
+    """Stream (href, etag, calendar-data) tuples out of a 207 response.
+
+    The body is fed to an incremental parser straight from iter_content and
+    every DAV:response is cleared once yielded, so memory is bounded by one
+    object however large the calendar. etag is None for members reported 404
+    (sync-collection deletions); a top-level DAV:sync-token is stored in meta.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    state = {'root': None}
+
+    def drain():
+        for event, elem in parser.read_events():
+            if event == 'start':
+                if state['root'] is None:
+                    state['root'] = elem
+                continue
+            if elem.tag == _RESPONSE_TAG:
+                href = elem.findtext(_HREF_TAG)
+                if href:
+                    etag_el = elem.find(_ETAG_PATH)
+                    cal_data_el = elem.find(_CALENDAR_DATA_PATH)
+                    yield (href,
+                           etag_el.text if etag_el is not None else None,
+                           cal_data_el.text if cal_data_el is not None else None)
+                elem.clear()
+                if elem in state['root']:
+                    state['root'].remove(elem)
+            elif elem.tag == _SYNC_TOKEN_TAG and meta is not None:
+                meta['sync-token'] = elem.text
+
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            parser.feed(chunk)
+            yield from drain()
+        parser.close()
+        yield from drain()
+    finally:
+        response.close()
+
+
 # --- iCal Helpers ---
 
 def ical_escape_text(text):
@@ -83,91 +446,188 @@ def ical_escape_text(text):
             .replace(',', '\\,').replace('\n', '\\n'))
 
 
-def _unfold_ical(text):
-    """Unfold iCal content lines per RFC 5545 section 3.1."""
-    return text.replace('\r\n ', '').replace('\r\n\t', '').replace('\n ', '').replace('\n\t', '')
+# --- iCal Tokenizer ---
+
+_CONTENT_LINE_RE = re.compile(
+    r'(?P<name>[A-Za-z0-9-]+)'
+    r'(?P<params>(?:;[^:;="]+=(?:"[^"]*"|[^:;",]*)(?:,(?:"[^"]*"|[^:;",]*))*)*)'
+    r':(?P<value>.*)', re.S)
+_PARAM_RE = re.compile(r';([^:;="]+)=((?:"[^"]*"|[^:;",]*)(?:,(?:"[^"]*"|[^:;",]*))*)')
+
+
+_UNFOLD_CHUNK = 64 * 1024
+
+
+def _iter_content_chunks(text):
+    """Yield lists of unfolded content lines (RFC 5545 section 3.1).
+
+    The payload is walked in ~64 KiB slices cut on a line boundary that does
+    not start a folded continuation, so unfolding and splitting run at C speed
+    while only one slice is ever copied at a time.
+    """
+    find = text.find
+    rfind = text.rfind
+    pos = 0
+    size = len(text)
+    while pos < size:
+        end = pos + _UNFOLD_CHUNK
+        if end >= size:
+            end = size
+        else:
+            cut = rfind('\n', pos, end)
+            while cut != -1 and text[cut + 1:cut + 2] in (' ', '\t'):
+                cut = rfind('\n', pos, cut)
+            if cut == -1:
+                # One logical line longer than a slice: extend to its end
+                cut = find('\n', end)
+                while cut != -1 and text[cut + 1:cut + 2] in (' ', '\t'):
+                    cut = find('\n', cut + 1)
+            end = size if cut == -1 else cut + 1
+        chunk = text[pos:end]
+        pos = end
+        if '\n ' in chunk or '\n\t' in chunk:
+            chunk = (chunk.replace('\r\n ', '').replace('\r\n\t', '')
+                     .replace('\n ', '').replace('\n\t', ''))
+        yield chunk.split('\n')
+
+
+def _parse_params(raw):
+    """Parse 'NAME=value;...' parameter text into an upper-cased dict."""
+    return {name.upper(): value.strip('"') for name, value in _PARAM_RE.findall(';' + raw)}
+
+
+def iter_ical_components(ical_text, kinds=('VEVENT', 'VTODO'), wanted=None):
+    """Yield (kind, props) for each component in kinds, in a single pass.
+
+    props maps property NAME to (value, raw params after the first ';'). Only names in wanted are
+    kept when given; nested components such as VALARM are skipped so their
+    properties never leak into the parent.
+    """
+    depth = 0
+    props = None
+    for lines in _iter_content_chunks(ical_text):
+        for line in lines:
+            key_part, sep, value = line.partition(':')
+            if not sep:
+                continue
+            if key_part == 'BEGIN' or key_part == 'END':
+                name = value.strip().upper()
+                if key_part == 'BEGIN':
+                    depth += 1
+                    if props is None and name in kinds:
+                        props = {}
+                        comp_depth = depth
+                else:
+                    if props is not None and depth == comp_depth:
+                        yield name, props
+                        props = None
+                    depth -= 1
+                continue
+            if props is None or depth != comp_depth:
+                continue
+            if '"' in key_part:
+                # Quoted parameter values may contain ':' so re-split with the grammar
+                m = _CONTENT_LINE_RE.match(line.strip())
+                if m:
+                    key_part, value = m.group('name') + m.group('params'), m.group('value')
+            name, _, params = key_part.partition(';')
+            if wanted is None:
+                name = name.strip().upper()
+            elif name not in wanted:
+                name = name.strip().upper()
+                if name not in wanted:
+                    continue
+            props[name] = (value.strip(), params)
+
+
+def _is_date_value(raw_params):
+    """True if a DTSTART/DUE property carries VALUE=DATE."""
+    if 'DATE' not in raw_params.upper():
+        return False
+    return _parse_params(raw_params).get('VALUE', '').upper() == 'DATE'
+
+
+def _split_categories(value):
+    return [c.strip() for c in value.split(',') if c.strip()]
 
 
 # --- iCal Parsers ---
 
+_EVENT_PROPS = frozenset(('SUMMARY', 'DTSTART', 'DTEND', 'UID', 'CATEGORIES', 'DESCRIPTION',
+                          'RRULE'))
+_TODO_PROPS = frozenset(('UID', 'SUMMARY', 'DESCRIPTION', 'STATUS', 'PRIORITY', 'DUE',
+                         'PERCENT-COMPLETE', 'CATEGORIES'))
+
+
+def iter_ical_events(ical_text):
+    """Lazily parse iCalendar text into event dicts."""
+    for _, props in iter_ical_components(ical_text, ('VEVENT',), _EVENT_PROPS):
+        ev = {}
+        if 'SUMMARY' in props:
+            ev['summary'] = props['SUMMARY'][0]
+        if 'DTSTART' in props:
+            value, params = props['DTSTART']
+            ev['dtstart'] = value
+            ev['allDay'] = _is_date_value(params)
+            if 'TZID' in params.upper():
+                ev['tzid'] = _parse_params(params).get('TZID')
+        if 'DTEND' in props:
+            value, params = props['DTEND']
+            ev['dtend'] = value
+            if 'TZID' in params.upper():
+                ev['dtendTzid'] = _parse_params(params).get('TZID')
+        if 'UID' in props:
+            ev['uid'] = props['UID'][0]
+        if 'CATEGORIES' in props:
+            ev['categories'] = _split_categories(props['CATEGORIES'][0])
+        if 'DESCRIPTION' in props:
+            ev['description'] = props['DESCRIPTION'][0]
+        if 'RRULE' in props:
+            ev['rrule'] = props['RRULE'][0]
+        if ev.get('summary'):
+            yield ev
+
+
+def iter_ical_todos(ical_text):
+    """Lazily parse iCalendar text into VTODO dicts."""
+    for _, props in iter_ical_components(ical_text, ('VTODO',), _TODO_PROPS):
+        todo = {}
+        if 'UID' in props:
+            todo['uid'] = props['UID'][0]
+        if 'SUMMARY' in props:
+            todo['summary'] = props['SUMMARY'][0]
+        if 'DESCRIPTION' in props:
+            todo['description'] = props['DESCRIPTION'][0]
+        if 'STATUS' in props:
+            todo['status'] = props['STATUS'][0]
+        if 'PRIORITY' in props:
+            try:
+                todo['priority'] = int(props['PRIORITY'][0])
+            except ValueError:
+                todo['priority'] = 0
+        if 'DUE' in props:
+            value, params = props['DUE']
+            todo['due'] = value
+            todo['dueAllDay'] = _is_date_value(params)
+        if 'PERCENT-COMPLETE' in props:
+            try:
+                todo['percent_complete'] = int(props['PERCENT-COMPLETE'][0])
+            except ValueError:
+                todo['percent_complete'] = 0
+        if 'CATEGORIES' in props:
+            todo['categories'] = _split_categories(props['CATEGORIES'][0])
+        if todo.get('summary') or todo.get('uid'):
+            yield todo
+
+
 def parse_ical_events(ical_text):
     """Parse iCalendar text into a list of event dicts."""
-    ical_text = _unfold_ical(ical_text)
-    events = []
-    in_event = False
-    current = {}
-    for line in ical_text.replace("\r\n", "\n").split("\n"):
-        line = line.strip()
-        if line == "BEGIN:VEVENT":
-            in_event = True
-            current = {}
-        elif line == "END:VEVENT":
-            in_event = False
-            if current.get("summary"):
-                events.append(current)
-            current = {}
-        elif in_event and ":" in line:
-            key_part, _, value = line.partition(":")
-            key = key_part.split(";")[0].upper()
-            if key == "SUMMARY":
-                current["summary"] = value
-            elif key == "DTSTART":
-                current["dtstart"] = value
-                current["allDay"] = "VALUE=DATE" in key_part and "DATE-TIME" not in key_part
-            elif key == "DTEND":
-                current["dtend"] = value
-            elif key == "UID":
-                current["uid"] = value
-            elif key == "CATEGORIES":
-                current["categories"] = [c.strip() for c in value.split(',') if c.strip()]
-            elif key == "DESCRIPTION":
-                current["description"] = value
-    return events
+    return list(iter_ical_events(ical_text))
 
 
 def parse_ical_todos(ical_text):
     """Parse iCalendar text into a list of VTODO dicts."""
-    ical_text = _unfold_ical(ical_text)
-    todos = []
-    in_todo = False
-    current = {}
-    for line in ical_text.replace("\r\n", "\n").split("\n"):
-        line = line.strip()
-        if line == "BEGIN:VTODO":
-            in_todo = True
-            current = {}
-        elif line == "END:VTODO":
-            in_todo = False
-            if current.get("summary") or current.get("uid"):
-                todos.append(current)
-            current = {}
-        elif in_todo and ":" in line:
-            key_part, _, value = line.partition(":")
-            key = key_part.split(";")[0].upper()
-            if key == "UID":
-                current["uid"] = value
-            elif key == "SUMMARY":
-                current["summary"] = value
-            elif key == "DESCRIPTION":
-                current["description"] = value
-            elif key == "STATUS":
-                current["status"] = value
-            elif key == "PRIORITY":
-                try:
-                    current["priority"] = int(value)
-                except ValueError:
-                    current["priority"] = 0
-            elif key == "DUE":
-                current["due"] = value
-                current["dueAllDay"] = "VALUE=DATE" in key_part and "DATE-TIME" not in key_part
-            elif key == "PERCENT-COMPLETE":
-                try:
-                    current["percent_complete"] = int(value)
-                except ValueError:
-                    current["percent_complete"] = 0
-            elif key == "CATEGORIES":
-                current["categories"] = [c.strip() for c in value.split(',') if c.strip()]
-    return todos
+    return list(iter_ical_todos(ical_text))
 
 
 def parse_date(date_str):
@@ -0,0 +1,723 @@
+"""Pluggable storage for the file-backed blueprints.
+
+Stores are addressed by the JSON path the blueprints already use (WEIGHT_FILE,
+EXPENSES_FILE, ...), so the existing _load/_save helpers only swap their body:
+
+    load(path, default)           whole document, same shape as the JSON file
+    snapshot(path, default)       the same, shared and read-only (no copy)
+    save(path, data, **dump)      whole document (or every row of a table)
+
+Paths registered with register_table() are row tables, which add O(row) writes:
+
+    put_row(path, key, row)       insert, or replace in place
+    put_rows(path, [(key, row)])  the same for many rows, as one write
+    delete_row(path, key)
+    get_row(path, key) / find_rows(path, **fields)
+    rows_by_date(path, since, until)  newest first, by binary search on date
+    aggregate(path, name)         a register_aggregate() fold over every row
+    snapshot_aggregate(path, name, copy)  a private copy of one, taken atomically
+    count_rows(path)
+
+STORAGE_BACKEND picks the engine:
+  json    (default) one JSON file per store, rewritten atomically on each write;
+          tables registered with journal=True instead append each row write to
+          <path>.journal and are compacted back into <path> in the background
+  sqlite  one database (STORAGE_DB) in WAL mode, so readers never block and
+          are never blocked by a writer; tables index their date/id fields
+
+Decoded documents are cached per process and revalidated against the
+store's version on every read (a write counter in <path>.version plus a
+stat() on json, one indexed SELECT on sqlite), so repeat reads skip both the
+file read and the JSON decoder.
+
+scripts/migrate_storage.py imports the existing JSON files into SQLite.
+"""
+import os
+import re
+import sys
+import json
+import fcntl
+import bisect
+import marshal
+import hashlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+
+from flask import request
+
+from .shared import CONFIG, atomic_write_json, read_generation, bump_generation
+
+_tables = {}
+
+
+def register_table(path, name, wrapper=None, keyed=False, fields=('date',), journal=False,
+                   **dump_kwargs):
+    """Declare the JSON store at path as a row table.
+
+    wrapper: the JSON file is {wrapper: [rows]} instead of a bare [rows].
+    keyed:   the JSON file is {key: row} (rows are keyed by the map key, not id).
+    fields:  row fields copied into indexed columns (date, habitId, ...).
+    journal: on the json engine, row writes append to a journal (append-only logs).
+    dump_kwargs are used when the json engine rewrites the file.
+    """
+    _tables[path] = {
+        'aggregates': {},
+        'name': name,
+        'wrapper': wrapper,
+        'keyed': keyed,
+        'journal': journal,
+        'fields': tuple(fields),
+        'columns': tuple(re.sub(r'([A-Z])', r'_\1', f).lower() for f in fields),
+        'dump_kwargs': dump_kwargs,
+    }
+
+
+def register_aggregate(path, name, initial, fold):
+    """Materialise fold(acc, row) over every row of a table, starting from initial().
+
+    fold mutates acc in place. Inserts are folded in as they are written;
+    a replace or delete drops the value and it is rebuilt on the next read.
+    """
+    _tables[path]['aggregates'][name] = (initial, fold)
+
+
+def _shape(table, pairs):
+    """[(key, row)] -> the document shape of the table's JSON file."""
+    if table['keyed']:
+        return dict(pairs)
+    rows = [row for _, row in pairs]
+    return {table['wrapper']: rows} if table['wrapper'] else rows
+
+
+def _pairs(table, doc):
+    """Document shape -> [(key, row)]; list rows without an id get a positional key."""
+    if table['keyed']:
+        return list((doc or {}).items())
+    if isinstance(doc, dict):
+        rows = doc.get(table['wrapper'] or 'entries', [])
+    else:
+        rows = doc or []
+    return [((row.get('id') if isinstance(row, dict) else None) or 'row-%d' % i, row)
+            for i, row in enumerate(rows)]
+
+
+# --- JSON Engine ---
+
+def _json_read(path, default):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+# --- Journal ---
+#
+# <path>.journal holds one JSON record per line, applied over the snapshot in
+# <path> (which keeps the plain JSON file shape):
+#   {"put": key, "row": {...}}    insert, or replace in place
+#   {"del": key}                  tombstone
+# Appends take an exclusive flock on the journal and fsync; readers take a
+# shared one, so a compaction (snapshot rewrite + truncate) is never seen
+# half-done. A torn final line from a crash is skipped on replay.
+
+_compacting = set()
+_compacting_lock = threading.Lock()
+
+
+@contextmanager
+def _journal(path, op):
+    """The journal's fd, flocked with op for the duration of the block."""
+    fd = os.open(path + '.journal', os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        fcntl.flock(fd, op)
+        yield fd
+    finally:
+        os.close(fd)
+
+
+def _journal_replay(table, doc, fd):
+    """Snapshot document + the journal's records -> current document."""
+    rows = dict(_pairs(table, doc))
+    with open(fd, 'rb', closefd=False) as f:
+        f.seek(0)
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if 'del' in record:
+                rows.pop(record['del'], None)
+            else:
+                rows[record['put']] = record['row']
+    return _shape(table, list(rows.items()))
+
+
+def _journal_append(path, *records):
+    """Append records durably (one write, one fsync) and return the store's
+    (before, after) versions.
+
+    Starts a compaction once the journal is large.
+    """
+    default = _tables[path]['dump_kwargs'].get('default')
+    line = ''.join(json.dumps(record, default=default) + '\n' for record in records)
+    with _journal(path, fcntl.LOCK_EX) as fd:
+        before = _json_version(path)
+        size = os.fstat(fd).st_size
+        if size and os.pread(fd, 1, size - 1) != b'\n':
+            line = '\n' + line   # close off a torn append
+        os.write(fd, line.encode())
+        os.fsync(fd)
+        _bump(path)
+        after = _json_version(path)
+        size = os.fstat(fd).st_size
+    if size >= CONFIG['journal_compact_bytes']:
+        with _compacting_lock:
+            if path not in _compacting:
+                _compacting.add(path)
+                threading.Thread(target=_journal_compact, args=(path,), daemon=True).start()
+    return before, after
+
+
+def _journal_compact(path):
+    """Fold the journal into the snapshot and truncate it."""
+    table = _tables[path]
+    try:
+        with _journal(path, fcntl.LOCK_EX) as fd:
+            doc = _journal_replay(table, _json_read(path, None), fd)
+            atomic_write_json(path, doc, **table['dump_kwargs'])
+            os.ftruncate(fd, 0)
+            os.fsync(fd)
+    except Exception as e:
+        print(f"Journal compaction failed for {path}: {e}")
+    finally:
+        with _compacting_lock:
+            _compacting.discard(path)
+
+
+def _journaled(path):
+    return path in _tables and _tables[path]['journal']
+
+
+class JsonEngine:
+    """Each store is its own JSON file; row writes are load-modify-save,
+    or appends for journaled tables.
+
+    put_row(s)/delete_row report the store's (before, after) versions when the
+    write was a journal append, so the document cache can apply it in place.
+    """
+
+    def load(self, path, default):
+        if _journaled(path):
+            with _journal(path, fcntl.LOCK_SH) as fd:
+                doc = _json_read(path, None)
+                if doc is None and os.fstat(fd).st_size == 0:
+                    return default
+                return _journal_replay(_tables[path], doc, fd)
+        return _json_read(path, default)
+
+    def save(self, path, data, **dump_kwargs):
+        if _journaled(path):
+            with _journal(path, fcntl.LOCK_EX) as fd:
+                atomic_write_json(path, data, **dump_kwargs)
+                os.ftruncate(fd, 0)
+                os.fsync(fd)
+                _bump(path)
+            return
+        atomic_write_json(path, data, **dump_kwargs)
+        _bump(path)
+
+    def get_row(self, path, key):
+        return _copy(_rows(path).get(key))
+
+    def find_rows(self, path, **fields):
+        return [_copy(row) for row in _lookup(path, fields)]
+
+    def rows_by_date(self, path, since, until, limit):
+        return _date_range(path, since, until, limit)
+
+    def put_row(self, path, key, row):
+        return self.put_rows(path, [(key, row)])
+
+    def put_rows(self, path, rows):
+        if _journaled(path):
+            return _journal_append(path, *({'put': key, 'row': row} for key, row in rows))
+        table = _tables[path]
+        pairs = _pairs(table, load(path, None))
+        position = {k: i for i, (k, _) in enumerate(pairs)}
+        for key, row in rows:
+            if key in position:
+                pairs[position[key]] = (key, row)
+            else:
+                position[key] = len(pairs)
+                pairs.append((key, row))
+        atomic_write_json(path, _shape(table, pairs), **table['dump_kwargs'])
+        _bump(path)
+
+    def delete_row(self, path, key):
+        table = _tables[path]
+        if table['journal']:
+            if key not in _rows(path):
+                return False, None
+            return True, _journal_append(path, {'del': key})
+        pairs = _pairs(table, load(path, None))
+        kept = [(k, row) for k, row in pairs if k != key]
+        if len(kept) == len(pairs):
+            return False, None
+        atomic_write_json(path, _shape(table, kept), **table['dump_kwargs'])
+        _bump(path)
+        return True, None
+
+    def version(self, path):
+        return _json_version(path)
+
+
+# Every write through the json engine bumps a counter in <path>.version once
+# the data is in place. mtime/size/inode alone can repeat: os.replace() frees
+# an inode that a later write reuses, and two same-size writes within one
+# mtime tick look identical. The stat() still catches edits made by hand.
+
+def _bump(path):
+    bump_generation(path + '.version')
+
+
+def _json_version(path):
+    version = b'%d;' % read_generation(path + '.version')
+    try:
+        st = os.stat(path)
+    except OSError:
+        return version + b'-'
+    return version + b'%d:%d:%d' % (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+# --- SQLite Engine ---
+
+class SqliteEngine:
+    """All stores in one WAL-mode database; one connection per thread."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._created = set()
+        self._created_lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS documents '
+                         '(path TEXT PRIMARY KEY, body TEXT NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS versions '
+                         '(path TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _table(self, path):
+        """Return (conn, table), creating the table and its indexes once per process."""
+        conn = self._conn()
+        table = _tables[path]
+        if table['name'] not in self._created:
+            with self._created_lock:
+                cols = ''.join(', %s TEXT' % c for c in table['columns'])
+                conn.execute('CREATE TABLE IF NOT EXISTS %s (seq INTEGER PRIMARY KEY AUTOINCREMENT, '
+                             'key TEXT UNIQUE NOT NULL, body TEXT NOT NULL%s)' % (table['name'], cols))
+                if table['columns']:
+                    conn.execute('CREATE INDEX IF NOT EXISTS %s_idx ON %s (%s)'
+                                 % (table['name'], table['name'], ', '.join(reversed(table['columns']))))
+                if 'date' in table['columns'] and len(table['columns']) > 1:
+                    conn.execute('CREATE INDEX IF NOT EXISTS %s_date ON %s (date)'
+                                 % (table['name'], table['name']))
+                self._created.add(table['name'])
+        return conn, table
+
+    def _write(self, conn, path, statements):
+        """Run [(sql, params)] in one IMMEDIATE transaction and bump the store version.
+
+        Returns the statement cursors and the store's (before, after) versions.
+        """
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT version FROM versions WHERE path = ?', (path,)).fetchone()
+            before = row[0] if row else 0
+            results = [conn.execute(sql, params) for sql, params in statements]
+            conn.execute('INSERT INTO versions (path, version) VALUES (?, 1) '
+                         'ON CONFLICT(path) DO UPDATE SET version = version + 1', (path,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return results, (b'%d' % before, b'%d' % (before + 1))
+
+    def _row_params(self, table, key, row):
+        values = [row.get(f) if isinstance(row, dict) else None for f in table['fields']]
+        body = json.dumps(row, default=table['dump_kwargs'].get('default'))
+        return [key, body] + [None if v is None else str(v) for v in values]
+
+    def _insert_sql(self, table):
+        cols = ''.join(', ' + c for c in table['columns'])
+        marks = ', ?' * len(table['columns'])
+        updates = ''.join(', %s = excluded.%s' % (c, c) for c in table['columns'])
+        return ('INSERT INTO %s (key, body%s) VALUES (?, ?%s) '
+                'ON CONFLICT(key) DO UPDATE SET body = excluded.body%s'
+                % (table['name'], cols, marks, updates))
+
+    def load(self, path, default):
+        if path in _tables:
+            conn, table = self._table(path)
+            rows = conn.execute('SELECT key, body FROM %s ORDER BY seq' % table['name'])
+            return _shape(table, [(k, json.loads(body)) for k, body in rows])
+        row = self._conn().execute('SELECT body FROM documents WHERE path = ?', (path,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def save(self, path, data, **dump_kwargs):
+        if path in _tables:
+            conn, table = self._table(path)
+            insert = self._insert_sql(table)
+            statements = [('DELETE FROM %s' % table['name'], ())]
+            statements += [(insert, self._row_params(table, k, row)) for k, row in _pairs(table, data)]
+            self._write(conn, path, statements)
+            return
+        body = json.dumps(data, default=dump_kwargs.get('default'))
+        self._write(self._conn(), path, [(
+            'INSERT INTO documents (path, body) VALUES (?, ?) '
+            'ON CONFLICT(path) DO UPDATE SET body = excluded.body', (path, body))])
+
+    def get_row(self, path, key):
+        conn, table = self._table(path)
+        row = conn.execute('SELECT body FROM %s WHERE key = ?' % table['name'], (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_rows(self, path, **fields):
+        conn, table = self._table(path)
+        columns = dict(zip(table['fields'], table['columns']))
+        where = ' AND '.join('%s = ?' % columns[f] for f in fields) or '1'
+        rows = conn.execute('SELECT body FROM %s WHERE %s ORDER BY seq' % (table['name'], where),
+                            [str(v) for v in fields.values()])
+        return [json.loads(body) for body, in rows]
+
+    def rows_by_date(self, path, since, until, limit):
+        conn, table = self._table(path)
+        where = ' AND '.join(c for c, v in (('date >= ?', since), ('date < ?', until)) if v) or '1'
+        rows = conn.execute('SELECT body FROM %s WHERE %s ORDER BY date DESC, seq LIMIT ?' % (table['name'], where),
+                            [v for v in (since, until) if v] + [-1 if limit is None else limit])
+        return [json.loads(body) for body, in rows]
+
+    def put_row(self, path, key, row):
+        return self.put_rows(path, [(key, row)])
+
+    def put_rows(self, path, rows):
+        conn, table = self._table(path)
+        insert = self._insert_sql(table)
+        _, versions = self._write(conn, path, [(insert, self._row_params(table, key, row))
+                                               for key, row in rows])
+        return versions
+
+    def delete_row(self, path, key):
+        conn, table = self._table(path)
+        (cursor,), versions = self._write(conn, path, [('DELETE FROM %s WHERE key = ?' % table['name'], (key,))])
+        return cursor.rowcount > 0, versions
+
+    def version(self, path):
+        row = self._conn().execute('SELECT version FROM versions WHERE path = ?', (path,)).fetchone()
+        return b'%d' % (row[0] if row else 0)
+
+
+# --- Module API ---
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def engine():
+    """The configured engine (created on first use)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if CONFIG['storage_backend'] == 'sqlite':
+                    _engine = SqliteEngine(CONFIG['storage_db'])
+                else:
+                    _engine = JsonEngine()
+    return _engine
+
+
+# --- Document Cache ---
+#
+# One entry per store: {version, doc, frozen, rows, indexes, by_date}. doc is
+# the decoded document; frozen (its marshal dump, for cheap private copies),
+# rows (key -> row), indexes ({fields: {values: (row, ...)}}) and by_date
+# (parallel [date], [row] lists in date order) are built on first use. A row write that the engine can prove was the only change since
+# the cached version updates rows and indexes in place and only marks doc for
+# rebuilding; anything else drops the entry. _cache_lock guards the in-place
+# updates against index builds and doc rebuilds iterating the same rows.
+
+_MISSING = object()
+_cache = {}
+_cache_lock = threading.RLock()
+
+
+def _copy(obj):
+    """Deep copy of a JSON-shaped value (marshal round-trip, ~2x faster than json)."""
+    return marshal.loads(marshal.dumps(obj)) if obj is not None else None
+
+
+def _cached(path):
+    """The cache entry for path, decoding the store only if it changed.
+
+    The version is read before the load, so a write racing with the load can
+    only make the entry look stale, never make stale data look current.
+    """
+    version = engine().version(path)
+    entry = _cache.get(path)
+    if entry is None or entry['version'] != version:
+        entry = {'version': version, 'doc': engine().load(path, _MISSING),
+                 'frozen': None, 'rows': None, 'indexes': {}, 'by_date': None, 'aggregates': {}}
+        _cache[path] = entry
+    return entry
+
+
+def _doc(path, entry):
+    """The entry's document, rebuilt from its rows after in-place writes."""
+    with _cache_lock:
+        if entry['doc'] is None:
+            entry['doc'] = _shape(_tables[path], list(entry['rows'].items()))
+        return entry['doc']
+
+
+def _rows(path, entry=None):
+    """key -> row for a table (shared; do not mutate)."""
+    entry = entry or _cached(path)
+    with _cache_lock:
+        if entry['rows'] is None:
+            doc = entry['doc']
+            entry['rows'] = dict(_pairs(_tables[path], None if doc is _MISSING else doc))
+        return entry['rows']
+
+
+def _lookup(path, fields):
+    """Rows whose fields equal the given values, via a hash index on those fields."""
+    entry = _cached(path)
+    names = tuple(sorted(fields))
+    with _cache_lock:
+        index = entry['indexes'].get(names)
+        if index is None:
+            buckets = {}
+            for row in _rows(path, entry).values():
+                buckets.setdefault(tuple(row.get(f) for f in names), []).append(row)
+            index = entry['indexes'][names] = {k: tuple(v) for k, v in buckets.items()}
+        return index.get(tuple(fields[f] for f in names), ())
+
+
+def _row_date(row):
+    return str(row.get('date') or '')
+
+
+def _date_range(path, since, until, limit=None):
+    """Rows with since <= date < until, newest first, by bisecting the date index."""
+    entry = _cached(path)
+    with _cache_lock:
+        if entry['by_date'] is None:
+            ordered = sorted(_rows(path, entry).values(), key=_row_date)
+            entry['by_date'] = ([_row_date(r) for r in ordered], ordered)
+        dates, rows = entry['by_date']
+        lo = bisect.bisect_left(dates, since) if since else 0
+        hi = bisect.bisect_left(dates, until) if until else len(dates)
+        if limit is not None and hi - lo > limit:
+            # the newest `limit`, widened to whole dates so ties resolve as below
+            lo = bisect.bisect_left(dates, dates[hi - limit], lo, hi) if limit else hi
+        window = rows[lo:hi]
+    # stable, so rows sharing a date keep their insertion order
+    return sorted(window, key=_row_date, reverse=True)[:limit]
+
+
+def _by_date_update(by_date, old, row):
+    """Move old -> row (either may be None) within the date index."""
+    dates, rows = by_date
+    if old is not None:
+        i = bisect.bisect_left(dates, _row_date(old))
+        while rows[i] is not old:
+            i += 1
+        if row is not None and _row_date(row) == dates[i]:
+            rows[i] = row
+            return
+        del dates[i], rows[i]
+    if row is not None:
+        i = bisect.bisect_right(dates, _row_date(row))
+        dates.insert(i, _row_date(row))
+        rows.insert(i, row)
+
+
+def _apply(path, versions, changes):
+    """Fold our own row writes [(key, row)] (row None = delete) into the cache entry.
+
+    versions is the engine's (before, after); the entry is only updated if it
+    was at `before`, i.e. nobody else wrote in between. Otherwise it is dropped.
+    """
+    table = _tables[path]
+    default = table['dump_kwargs'].get('default')
+    changes = [(key, row if row is None else json.loads(json.dumps(row, default=default)))
+               for key, row in changes]
+    with _cache_lock:
+        entry = _cache.get(path)
+        if versions is None or entry is None or entry['version'] != versions[0]:
+            invalidate(path)
+            return
+        for key, row in changes:
+            _apply_row(table, entry, _rows(path, entry), key, row)
+        entry.update(version=versions[1], doc=None, frozen=None)
+
+
+def _apply_row(table, entry, rows, key, row):
+    """One row of _apply(); call with _cache_lock held."""
+    old = rows.pop(key, None) if row is None else rows.get(key)
+    if row is not None:
+        rows[key] = row
+    for names, index in entry['indexes'].items():
+        if old is not None:
+            k = tuple(old.get(f) for f in names)
+            index[k] = tuple(r for r in index.get(k, ()) if r is not old)
+        if row is not None:
+            k = tuple(row.get(f) for f in names)
+            index[k] = index.get(k, ()) + (row,)
+    if entry['by_date'] is not None and (old is not None or row is not None):
+        _by_date_update(entry['by_date'], old, row)
+    if old is None and row is not None:
+        for name, acc in entry['aggregates'].items():
+            table['aggregates'][name][1](acc, row)
+    else:
+        entry['aggregates'].clear()
+
+
+def invalidate(path):
+    """Drop the cached document for path."""
+    _cache.pop(path, None)
+
+
+def load(path, default):
+    """Private copy of the whole store as the JSON file would hold it, or default."""
+    entry = _cached(path)
+    with _cache_lock:
+        doc = _doc(path, entry)
+        if doc is _MISSING:
+            return default
+        if entry['frozen'] is None:
+            entry['frozen'] = marshal.dumps(doc)
+        frozen = entry['frozen']
+    return marshal.loads(frozen)
+
+
+def snapshot(path, default):
+    """Like load() but returns the shared cached document; callers must not mutate it."""
+    doc = _doc(path, _cached(path))
+    return default if doc is _MISSING else doc
+
+
+def save(path, data, **dump_kwargs):
+    """Replace the whole store; dump_kwargs shape the JSON file on the json engine."""
+    engine().save(path, data, **dump_kwargs)
+    invalidate(path)
+
+
+def get_row(path, key):
+    return engine().get_row(path, key)
+
+
+def find_rows(path, **fields):
+    """Rows whose registered fields equal the given values (indexed on sqlite)."""
+    return engine().find_rows(path, **fields)
+
+
+def rows_by_date(path, since=None, until=None, limit=None):
+    """Rows with since <= date < until (either bound optional), newest first.
+
+    Cost follows the size of the window (or limit), not of the table. Rows
+    may be shared with the cache: treat them as read-only.
+    """
+    return engine().rows_by_date(path, since, until, limit)
+
+
+def _aggregate(path, name, entry):
+    """The entry's fold, built if needed; call with _cache_lock held."""
+    acc = entry['aggregates'].get(name)
+    if acc is None:
+        initial, fold = _tables[path]['aggregates'][name]
+        acc = initial()
+        for row in _rows(path, entry).values():
+            fold(acc, row)
+        entry['aggregates'][name] = acc
+    return acc
+
+
+def aggregate(path, name):
+    """The current value of a register_aggregate() fold (shared; do not mutate)."""
+    entry = _cached(path)
+    with _cache_lock:
+        return _aggregate(path, name, entry)
+
+
+def snapshot_aggregate(path, name, copy):
+    """copy(acc) of a register_aggregate() fold, taken under the cache lock.
+
+    Use it when the value is read over several steps, so a write folding a
+    row in concurrently cannot be seen half-applied.
+    """
+    entry = _cached(path)
+    with _cache_lock:
+        return copy(_aggregate(path, name, entry))
+
+
+def count_rows(path):
+    """Number of rows in a table."""
+    return len(_rows(path))
+
+
+def put_row(path, key, row):
+    """Insert row under key, or replace the existing row keeping its position."""
+    _apply(path, engine().put_row(path, key, row), [(key, row)])
+
+
+def put_rows(path, rows):
+    """put_row() for every (key, row) in rows, as a single write."""
+    rows = list(rows)
+    if rows:
+        _apply(path, engine().put_rows(path, rows), rows)
+
+
+def delete_row(path, key):
+    """Delete the row under key; False if there was none."""
+    deleted, versions = engine().delete_row(path, key)
+    if deleted:
+        _apply(path, versions, [(key, None)])
+    return deleted
+
+
+def store_version(path):
+    """Opaque bytes that change whenever the store at path is written."""
+    return engine().version(path)
+
+
+def store_etag(view):
+    """Strong ETag for a depends_on view from the versions of its stores.
+
+    Every write bumps the store's version (the JSON file's write counter, or
+    the versions row on sqlite), which every worker process can see. The
+    URL, today's date (for "this week" style views) and the view's own
+    source file are mixed in too.
+    """
+    h = hashlib.blake2b(request.full_path.encode(), digest_size=16)
+    h.update(date.today().isoformat().encode())
+    source = getattr(sys.modules.get(view.__module__), '__file__', None)
+    try:
+        st = os.stat(source)
+        h.update(b'%d:%d;' % (st.st_mtime_ns, st.st_size))
+    except (OSError, TypeError):
+        h.update(b'-;')
+    for path in view.store_files:
+        h.update(store_version(path) + b';')
+    return 'v-' + h.hexdigest()
@@ -1,84 +1,149 @@
 """Nextcloud Tasks (VTODO) CRUD."""
+import json
 import uuid
-from datetime import datetime
-from xml.etree import ElementTree as ET
+import heapq
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape as xml_escape
 
-import requests as http_requests
 from flask import Blueprint, request, jsonify
 
-from .shared import (CONFIG, nextcloud_auth, nextcloud_configured,
-                     caldav_url, parse_ical_todos, parse_date, ical_escape_text)
+from .shared import (CONFIG, CalDAVError, caldav_request, nextcloud_configured,
+                     caldav_url, parse_date, ical_escape_text)
+from .caldav_mirror import (iter_todos, invalidate, lookup, lookup_remote, remember, forget,
+                            delete_uid)
 
 bp = Blueprint('tasks', __name__)
 
 
+# --- Filtering & Pagination ---
+
+TASKS_PAGE_MAX = 500
+
+
+def _todo_comp_filter(status, due_from, due_to, category):
+    """calendar-query VTODO filter for the live path.
+
+    It is a superset of what _todo_matches keeps: the RFC 4791 VTODO
+    time-range also matches on DTSTART/COMPLETED, so the due window is
+    widened by a day on each side. "incomplete" is not pushed down: a
+    reopened task can keep its COMPLETED date, and a STATUS filter would
+    drop tasks without a STATUS property.
+    """
+    parts = []
+    if due_from or due_to:
+        attrs = ""
+        if due_from:
+            attrs += ' start="{}T000000Z"'.format(
+                (datetime.strptime(due_from, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y%m%d"))
+        if due_to:
+            attrs += ' end="{}T000000Z"'.format(
+                (datetime.strptime(due_to, "%Y-%m-%d") + timedelta(days=2)).strftime("%Y%m%d"))
+        parts.append("<C:time-range{}/>".format(attrs))
+    if status == "completed":
+        parts.append('<C:prop-filter name="STATUS"><C:text-match>COMPLETED</C:text-match></C:prop-filter>')
+    if category:
+        parts.append('<C:prop-filter name="CATEGORIES"><C:text-match>{}</C:text-match></C:prop-filter>'.format(
+            xml_escape(category)))
+    return '<C:comp-filter name="VTODO">{}</C:comp-filter>'.format("".join(parts))
+
+
+def _todo_matches(task, status, due_from, due_to, category):
+    """Apply the /api/tasks filters to a task dict."""
+    if status == "incomplete" and task["status"] == "COMPLETED":
+        return False
+    elif status == "completed" and task["status"] != "COMPLETED":
+        return False
+    if due_from or due_to:
+        due = (task["due"] or "")[:10]
+        if not due or (due_from and due < due_from) or (due_to and due > due_to):
+            return False
+    if category and category.lower() not in (c.lower() for c in task["categories"]):
+        return False
+    return True
+
+
+def _sort_key(task):
+    return (task.get("priority") or 99, task.get("due") or "9999", task["uid"])
+
+
+def _encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    """Opaque cursor -> sort key of the last task on the previous page (ValueError if bad)."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (int(key[0]), str(key[1]), str(key[2]))
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
 @bp.route('/api/tasks', methods=['GET'])
 def get_tasks():
-    """Fetch VTODOs from Nextcloud Tasks calendar."""
+    """Fetch VTODOs from Nextcloud Tasks calendar.
+
+    Query: status (incomplete|completed|all), due_from/due_to (YYYY-MM-DD,
+    inclusive), category, limit and cursor (from next_cursor) for paging.
+    """
     if not nextcloud_configured():
         return jsonify({"error": "Nextcloud not configured"}), 500
 
     status_filter = request.args.get("status", "incomplete")
     tasks_calendar = request.args.get("calendar", CONFIG['nextcloud_tasks_calendar'])
-    cal_url = caldav_url(tasks_calendar)
-
-    report_body = """<?xml version="1.0" encoding="utf-8" ?>
-<C:calendar-query xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">
-  <D:prop>
-    <D:getetag/>
-    <C:calendar-data/>
-  </D:prop>
-  <C:filter>
-    <C:comp-filter name="VCALENDAR">
-      <C:comp-filter name="VTODO"/>
-    </C:comp-filter>
-  </C:filter>
-</C:calendar-query>"""
+    due_from = request.args.get("due_from", "")[:10]
+    due_to = request.args.get("due_to", "")[:10]
+    category = request.args.get("category", "").strip()
 
     try:
-        r = http_requests.request(
-            "REPORT",
-            cal_url,
-            data=report_body,
-            headers={"Content-Type": "application/xml; charset=utf-8", "Depth": "1"},
-            auth=nextcloud_auth(),
-            timeout=15
-        )
+        for day in (due_from, due_to):
+            if day:
+                datetime.strptime(day, "%Y-%m-%d")
+        limit = request.args.get("limit", "").strip()
+        if limit and not (limit.isdigit() and 1 <= int(limit) <= TASKS_PAGE_MAX):
+            raise ValueError("limit must be between 1 and %d" % TASKS_PAGE_MAX)
+        limit = int(limit or 0)
+        after = _decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        if r.status_code not in (200, 207):
-            return jsonify({"error": "CalDAV request failed", "status": r.status_code, "body": r.text[:500]}), 502
+    try:
+        tasks = []
+        comp_filter = _todo_comp_filter(status_filter, due_from, due_to, category)
+        for _, _, todo in iter_todos(tasks_calendar, comp_filter):
+            task = {
+                "uid": todo.get("uid", ""),
+                "summary": todo.get("summary", ""),
+                "description": todo.get("description", ""),
+                "status": todo.get("status", "NEEDS-ACTION"),
+                "priority": todo.get("priority", 0),
+                "due": parse_date(todo.get("due", "")),
+                "dueAllDay": todo.get("dueAllDay", False),
+                "percent_complete": todo.get("percent_complete", 0),
+                "categories": todo.get("categories", []),
+            }
+
+            if not _todo_matches(task, status_filter, due_from, due_to, category):
+                continue
+            if after is not None and _sort_key(task) <= after:
+                continue
 
-        root = ET.fromstring(r.text)
-        ns = {"D": "DAV:", "C": "urn:ietf:params:xml:ns:caldav"}
+            tasks.append(task)
 
-        tasks = []
-        for response in root.findall(".//D:response", ns):
-            cal_data_el = response.find(".//C:calendar-data", ns)
-            if cal_data_el is not None and cal_data_el.text:
-                parsed = parse_ical_todos(cal_data_el.text)
-                for todo in parsed:
-                    task = {
-                        "uid": todo.get("uid", ""),
-                        "summary": todo.get("summary", ""),
-                        "description": todo.get("description", ""),
-                        "status": todo.get("status", "NEEDS-ACTION"),
-                        "priority": todo.get("priority", 0),
-                        "due": parse_date(todo.get("due", "")),
-                        "dueAllDay": todo.get("dueAllDay", False),
-                        "percent_complete": todo.get("percent_complete", 0),
-                        "categories": todo.get("categories", []),
-                    }
-
-                    if status_filter == "incomplete" and task["status"] == "COMPLETED":
-                        continue
-                    elif status_filter == "completed" and task["status"] != "COMPLETED":
-                        continue
-
-                    tasks.append(task)
-
-        tasks.sort(key=lambda t: (t.get("priority") or 99, t.get("due") or "9999"))
-        return jsonify({"tasks": tasks, "count": len(tasks)}), 200
+        next_cursor = None
+        if limit:
+            tasks = heapq.nsmallest(limit + 1, tasks, key=_sort_key)
+            if len(tasks) > limit:
+                tasks = tasks[:limit]
+                next_cursor = _encode_cursor(_sort_key(tasks[-1]))
+        else:
+            tasks.sort(key=_sort_key)
+        return jsonify({"tasks": tasks, "count": len(tasks), "next_cursor": next_cursor}), 200
 
+    except CalDAVError as e:
+        return jsonify({"error": "CalDAV request failed", "status": e.status, "body": e.body}), 502
     except Exception as e:
         return jsonify({"error": "Failed to fetch tasks", "details": str(e)}), 502
 
@@ -89,9 +154,14 @@ def create_task():
     if not nextcloud_configured():
         return jsonify({"error": "Nextcloud not configured"}), 500
 
-    data = request.get_json()
-    if not data or not data.get("summary", "").strip():
-        return jsonify({"error": "summary is required"}), 400
+    result, code = _create_task(request.get_json())
+    return jsonify(result), code
+
+
+def _create_task(data):
+    """Create a VTODO from request data; return (result, http_status)."""
+    if not data or not (data.get("summary") or "").strip():
+        return {"error": "summary is required"}, 400
 
     uid = str(uuid.uuid4())
     now = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
@@ -141,269 +211,291 @@ def create_task():
 
     try:
         put_url = caldav_url(tasks_calendar) + uid + ".ics"
-        r = http_requests.put(
+        r = caldav_request(
+            "PUT",
             put_url,
             data=ical.encode('utf-8'),
-            headers={"Content-Type": "text/calendar; charset=utf-8"},
-            auth=nextcloud_auth(),
-            timeout=10
+            headers={"Content-Type": "text/calendar; charset=utf-8"}
         )
         if r.status_code in (200, 201, 204):
-            return jsonify({"uid": uid, "summary": summary, "created": True}), 201
+            etag = r.headers.get("ETag")
+            remember(tasks_calendar, uid, put_url[len(CONFIG['nextcloud_url']):], etag, ical)
+            invalidate(tasks_calendar)
+            return {"uid": uid, "summary": summary, "created": True, "etag": etag}, 201
         else:
-            return jsonify({"error": "CalDAV PUT failed", "status": r.status_code, "body": r.text[:300]}), 502
+            return {"error": "CalDAV PUT failed", "status": r.status_code, "body": r.text[:300]}, 502
     except Exception as e:
-        return jsonify({"error": "Failed to create task", "details": str(e)}), 502
+        return {"error": "Failed to create task", "details": str(e)}, 502
 
 
-@bp.route('/api/tasks/<uid>', methods=['PUT'])
-def update_task(uid):
-    """Update a VTODO by UID. Fetches existing, modifies fields, PUTs back."""
-    if not nextcloud_configured():
-        return jsonify({"error": "Nextcloud not configured"}), 500
+def _rebuild_vtodo(ical_text, data):
+    """Return ical_text with the fields present in data applied to its VTODO."""
+    now = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
 
-    data = request.get_json()
+    existing = {}
+    in_todo = False
+    other_lines_before = []
+    other_lines_after = []
+    section = "before"
+    for line in ical_text.replace("\r\n", "\n").split("\n"):
+        stripped = line.strip()
+        if stripped == "BEGIN:VTODO":
+            in_todo = True
+            section = "in"
+            continue
+        elif stripped == "END:VTODO":
+            in_todo = False
+            section = "after"
+            continue
+        if section == "before":
+            other_lines_before.append(stripped)
+        elif section == "after":
+            other_lines_after.append(stripped)
+        elif in_todo:
+            if ":" in stripped:
+                key_part, _, value = stripped.partition(":")
+                key = key_part.split(";")[0].upper()
+                existing[key] = stripped
+
+    # Apply updates
+    if "summary" in data:
+        existing["SUMMARY"] = "SUMMARY:" + ical_escape_text(data["summary"])
+    if "description" in data:
+        desc = ical_escape_text(data["description"])
+        if desc:
+            existing["DESCRIPTION"] = "DESCRIPTION:" + desc
+        else:
+            existing.pop("DESCRIPTION", None)
+    if "status" in data:
+        status_val = data["status"].upper()
+        if status_val in ("NEEDS-ACTION", "IN-PROCESS", "COMPLETED", "CANCELLED"):
+            existing["STATUS"] = "STATUS:" + status_val
+            if status_val == "COMPLETED":
+                existing["PERCENT-COMPLETE"] = "PERCENT-COMPLETE:100"
+                existing["COMPLETED"] = "COMPLETED:" + now
+            elif status_val == "NEEDS-ACTION":
+                existing["PERCENT-COMPLETE"] = "PERCENT-COMPLETE:0"
+                existing.pop("COMPLETED", None)
+    if "percent_complete" in data:
+        pc = max(0, min(100, int(data["percent_complete"])))
+        existing["PERCENT-COMPLETE"] = "PERCENT-COMPLETE:" + str(pc)
+        if pc == 100:
+            existing["STATUS"] = "STATUS:COMPLETED"
+            existing["COMPLETED"] = "COMPLETED:" + now
+        elif pc > 0:
+            existing["STATUS"] = "STATUS:IN-PROCESS"
+            existing.pop("COMPLETED", None)
+        else:
+            existing["STATUS"] = "STATUS:NEEDS-ACTION"
+            existing.pop("COMPLETED", None)
+    if "priority" in data:
+        existing["PRIORITY"] = "PRIORITY:" + str(int(data["priority"]))
+    if "due" in data:
+        due = data["due"]
+        if due:
+            due_clean = due.replace("-", "")[:8]
+            if len(due_clean) == 8 and due_clean.isdigit():
+                existing["DUE"] = "DUE;VALUE=DATE:" + due_clean
+            else:
+                dt_clean = due.replace("-", "").replace(":", "").replace(" ", "T")
+                if "T" in dt_clean:
+                    dt_part = dt_clean[:15]
+                    if not dt_part.endswith("Z"):
+                        dt_part = dt_part + "Z"
+                    existing["DUE"] = "DUE:" + dt_part
+        else:
+            existing.pop("DUE", None)
+    if "categories" in data:
+        cats = data["categories"]
+        if isinstance(cats, list):
+            cats = ",".join(cats)
+        if cats:
+            existing["CATEGORIES"] = "CATEGORIES:" + cats
+        else:
+            existing.pop("CATEGORIES", None)
+
+    existing["LAST-MODIFIED"] = "LAST-MODIFIED:" + now
+
+    rebuild_lines = [l for l in other_lines_before if l]
+    rebuild_lines.append("BEGIN:VTODO")
+    for key, full_line in existing.items():
+        if full_line:
+            rebuild_lines.append(full_line)
+    rebuild_lines.append("END:VTODO")
+    rebuild_lines.extend([l for l in other_lines_after if l])
+
+    return "\r\n".join(rebuild_lines) + "\r\n"
+
+
+def _put_vtodo(tasks_calendar, uid, hit, data):
+    """PUT the updated VTODO over hit=(href, etag, data) with If-Match."""
+    href, etag, ical_text = hit
+    new_ical = _rebuild_vtodo(ical_text, data)
+    put_headers = {"Content-Type": "text/calendar; charset=utf-8"}
+    if etag:
+        put_headers["If-Match"] = etag
+
+    r = caldav_request(
+        "PUT",
+        CONFIG['nextcloud_url'] + href,
+        data=new_ical.encode('utf-8'),
+        headers=put_headers
+    )
+    if r.status_code in (200, 201, 204):
+        remember(tasks_calendar, uid, href, r.headers.get("ETag"), new_ical)
+    return r
+
+
+def _update_vtodo(tasks_calendar, uid, data, etag=None):
+    """Apply data to a task, trying the UID index before the lookup REPORT.
+
+    With etag (the caller's If-Match) a mismatch is returned as the 412
+    instead of being retried against the current copy.
+    Returns the PUT response, or None when no task has that UID.
+    """
+    hit = lookup(tasks_calendar, uid)
+    if hit and hit[2] and (etag is None or hit[1] == etag):
+        r = _put_vtodo(tasks_calendar, uid, hit, data)
+        if r.status_code not in (404, 412) or (etag and r.status_code == 412):
+            return r
+        forget(tasks_calendar, uid)
+
+    hit = lookup_remote(tasks_calendar, uid, "VTODO")
+    if hit is None:
+        return None
+    href, current, ical_text = hit
+    return _put_vtodo(tasks_calendar, uid, (href, etag or current, ical_text), data)
+
+
+def _update_task(uid, data, etag=None):
+    """Update a VTODO by UID from request data; return (result, http_status)."""
     if not data:
-        return jsonify({"error": "JSON body required"}), 400
+        return {"error": "JSON body required"}, 400
 
+    data = dict(data)
     tasks_calendar = data.pop("calendar", CONFIG['nextcloud_tasks_calendar'])
-    cal_base = caldav_url(tasks_calendar)
-
-    # Search for the task by UID
-    report_body = """<?xml version="1.0" encoding="utf-8" ?>
-<C:calendar-query xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">
-  <D:prop>
-    <D:getetag/>
-    <C:calendar-data/>
-  </D:prop>
-  <C:filter>
-    <C:comp-filter name="VCALENDAR">
-      <C:comp-filter name="VTODO">
-        <C:prop-filter name="UID">
-          <C:text-match collation="i;octet">{uid}</C:text-match>
-        </C:prop-filter>
-      </C:comp-filter>
-    </C:comp-filter>
-  </C:filter>
-</C:calendar-query>""".format(uid=uid)
 
     try:
-        r = http_requests.request(
-            "REPORT",
-            cal_base,
-            data=report_body,
-            headers={"Content-Type": "application/xml; charset=utf-8", "Depth": "1"},
-            auth=nextcloud_auth(),
-            timeout=10
-        )
-
-        if r.status_code not in (200, 207):
-            return jsonify({"error": "CalDAV search failed", "status": r.status_code}), 502
-
-        root = ET.fromstring(r.text)
-        ns = {"D": "DAV:", "C": "urn:ietf:params:xml:ns:caldav"}
-
-        href = None
-        ical_text = None
-        etag = None
-        for response in root.findall(".//D:response", ns):
-            href_el = response.find("D:href", ns)
-            cal_data_el = response.find(".//C:calendar-data", ns)
-            etag_el = response.find(".//D:getetag", ns)
-            if href_el is not None and cal_data_el is not None and cal_data_el.text:
-                href = href_el.text
-                ical_text = cal_data_el.text
-                if etag_el is not None:
-                    etag = etag_el.text
-                break
-
-        if not href or not ical_text:
-            return jsonify({"error": "Task not found", "uid": uid}), 404
-
-        # Rebuild the VTODO with updated fields
-        now = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-
-        existing = {}
-        in_todo = False
-        other_lines_before = []
-        other_lines_after = []
-        section = "before"
-        for line in ical_text.replace("\r\n", "\n").split("\n"):
-            stripped = line.strip()
-            if stripped == "BEGIN:VTODO":
-                in_todo = True
-                section = "in"
-                continue
-            elif stripped == "END:VTODO":
-                in_todo = False
-                section = "after"
-                continue
-            if section == "before":
-                other_lines_before.append(stripped)
-            elif section == "after":
-                other_lines_after.append(stripped)
-            elif in_todo:
-                if ":" in stripped:
-                    key_part, _, value = stripped.partition(":")
-                    key = key_part.split(";")[0].upper()
-                    existing[key] = stripped
-
-        # Apply updates
-        if "summary" in data:
-            existing["SUMMARY"] = "SUMMARY:" + ical_escape_text(data["summary"])
-        if "description" in data:
-            desc = ical_escape_text(data["description"])
-            if desc:
-                existing["DESCRIPTION"] = "DESCRIPTION:" + desc
-            else:
-                existing.pop("DESCRIPTION", None)
-        if "status" in data:
-            status_val = data["status"].upper()
-            if status_val in ("NEEDS-ACTION", "IN-PROCESS", "COMPLETED", "CANCELLED"):
-                existing["STATUS"] = "STATUS:" + status_val
-                if status_val == "COMPLETED":
-                    existing["PERCENT-COMPLETE"] = "PERCENT-COMPLETE:100"
-                    existing["COMPLETED"] = "COMPLETED:" + now
-                elif status_val == "NEEDS-ACTION":
-                    existing["PERCENT-COMPLETE"] = "PERCENT-COMPLETE:0"
-                    existing.pop("COMPLETED", None)
-        if "percent_complete" in data:
-            pc = max(0, min(100, int(data["percent_complete"])))
-            existing["PERCENT-COMPLETE"] = "PERCENT-COMPLETE:" + str(pc)
-            if pc == 100:
-                existing["STATUS"] = "STATUS:COMPLETED"
-                existing["COMPLETED"] = "COMPLETED:" + now
-            elif pc > 0:
-                existing["STATUS"] = "STATUS:IN-PROCESS"
-                existing.pop("COMPLETED", None)
-            else:
-                existing["STATUS"] = "STATUS:NEEDS-ACTION"
-                existing.pop("COMPLETED", None)
-        if "priority" in data:
-            existing["PRIORITY"] = "PRIORITY:" + str(int(data["priority"]))
-        if "due" in data:
-            due = data["due"]
-            if due:
-                due_clean = due.replace("-", "")[:8]
-                if len(due_clean) == 8 and due_clean.isdigit():
-                    existing["DUE"] = "DUE;VALUE=DATE:" + due_clean
-                else:
-                    dt_clean = due.replace("-", "").replace(":", "").replace(" ", "T")
-                    if "T" in dt_clean:
-                        dt_part = dt_clean[:15]
-                        if not dt_part.endswith("Z"):
-                            dt_part = dt_part + "Z"
-                        existing["DUE"] = "DUE:" + dt_part
-            else:
-                existing.pop("DUE", None)
-        if "categories" in data:
-            cats = data["categories"]
-            if isinstance(cats, list):
-                cats = ",".join(cats)
-            if cats:
-                existing["CATEGORIES"] = "CATEGORIES:" + cats
-            else:
-                existing.pop("CATEGORIES", None)
+        r = _update_vtodo(tasks_calendar, uid, data, etag)
+        if r is None:
+            return {"error": "Task not found", "uid": uid}, 404
+        if r.status_code in (200, 201, 204):
+            invalidate(tasks_calendar)
+            return {"uid": uid, "updated": True, "etag": r.headers.get("ETag")}, 200
+        elif r.status_code == 412 and etag:
+            return {"error": "Task changed on server", "uid": uid, "etag": etag}, 412
+        else:
+            return {"error": "CalDAV PUT failed", "status": r.status_code, "body": r.text[:300]}, 502
 
-        existing["LAST-MODIFIED"] = "LAST-MODIFIED:" + now
+    except CalDAVError as e:
+        return {"error": "CalDAV search failed", "status": e.status}, 502
+    except Exception as e:
+        return {"error": "Failed to update task", "details": str(e)}, 502
 
-        rebuild_lines = [l for l in other_lines_before if l]
-        rebuild_lines.append("BEGIN:VTODO")
-        for key, full_line in existing.items():
-            if full_line:
-                rebuild_lines.append(full_line)
-        rebuild_lines.append("END:VTODO")
-        rebuild_lines.extend([l for l in other_lines_after if l])
 
-        new_ical = "\r\n".join(rebuild_lines) + "\r\n"
+@bp.route('/api/tasks/<uid>', methods=['PUT'])
+def update_task(uid):
+    """Update a VTODO by UID. Honours If-Match; modifies fields and PUTs back."""
+    if not nextcloud_configured():
+        return jsonify({"error": "Nextcloud not configured"}), 500
 
-        put_url = CONFIG['nextcloud_url'] + href
-        put_headers = {"Content-Type": "text/calendar; charset=utf-8"}
-        if etag:
-            put_headers["If-Match"] = etag
+    result, code = _update_task(uid, request.get_json(), request.headers.get("If-Match"))
+    return jsonify(result), code
 
-        r2 = http_requests.put(
-            put_url,
-            data=new_ical.encode('utf-8'),
-            headers=put_headers,
-            auth=nextcloud_auth(),
-            timeout=10
-        )
 
-        if r2.status_code in (200, 201, 204):
-            return jsonify({"uid": uid, "updated": True}), 200
-        else:
-            return jsonify({"error": "CalDAV PUT failed", "status": r2.status_code, "body": r2.text[:300]}), 502
+def _delete_task(uid, tasks_calendar, etag=None):
+    """Delete a VTODO by UID; return (result, http_status)."""
+    if etag is None and lookup(tasks_calendar, uid) is None:
+        # Not indexed yet: try direct deletion with UID as filename
+        try:
+            r = caldav_request("DELETE", caldav_url(tasks_calendar) + uid + ".ics")
+            if r.status_code in (200, 204):
+                invalidate(tasks_calendar)
+                return {"deleted": True, "uid": uid}, 200
+        except Exception:
+            pass
 
+    try:
+        if delete_uid(tasks_calendar, uid, "VTODO", etag):
+            invalidate(tasks_calendar)
+            return {"deleted": True, "uid": uid}, 200
+        return {"error": "Task not found", "uid": uid}, 404
+
+    except CalDAVError as e:
+        if e.status == 412 and etag:
+            return {"error": "Task changed on server", "uid": uid, "etag": etag}, 412
+        return {"error": "Failed to delete task", "details": str(e)}, 502
     except Exception as e:
-        return jsonify({"error": "Failed to update task", "details": str(e)}), 502
+        return {"error": "Failed to delete task", "details": str(e)}, 502
 
 
 @bp.route('/api/tasks/<uid>', methods=['DELETE'])
 def delete_task(uid):
-    """Delete a VTODO by UID."""
+    """Delete a VTODO by UID. Honours If-Match."""
     if not nextcloud_configured():
         return jsonify({"error": "Nextcloud not configured"}), 500
 
     tasks_calendar = request.args.get("calendar", CONFIG['nextcloud_tasks_calendar'])
-    cal_base = caldav_url(tasks_calendar)
-
-    # Try direct deletion with UID as filename
-    try:
-        r = http_requests.delete(
-            cal_base + uid + ".ics",
-            auth=nextcloud_auth(),
-            timeout=10
-        )
-        if r.status_code in (200, 204):
-            return jsonify({"deleted": True, "uid": uid}), 200
-    except:
-        pass
-
-    # Search for the task by UID
-    report_body = """<?xml version="1.0" encoding="utf-8" ?>
-<C:calendar-query xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">
-  <D:prop>
-    <D:getetag/>
-    <C:calendar-data/>
-  </D:prop>
-  <C:filter>
-    <C:comp-filter name="VCALENDAR">
-      <C:comp-filter name="VTODO">
-        <C:prop-filter name="UID">
-          <C:text-match collation="i;octet">{uid}</C:text-match>
-        </C:prop-filter>
-      </C:comp-filter>
-    </C:comp-filter>
-  </C:filter>
-</C:calendar-query>""".format(uid=uid)
-
-    try:
-        r = http_requests.request(
-            "REPORT",
-            cal_base,
-            data=report_body,
-            headers={"Content-Type": "application/xml; charset=utf-8", "Depth": "1"},
-            auth=nextcloud_auth(),
-            timeout=10
-        )
-
-        if r.status_code in (200, 207):
-            root = ET.fromstring(r.text)
-            ns = {"D": "DAV:"}
-            for response in root.findall(".//D:response", ns):
-                href_el = response.find("D:href", ns)
-                if href_el is not None and href_el.text:
-                    delete_url = CONFIG['nextcloud_url'] + href_el.text
-                    dr = http_requests.delete(
-                        delete_url,
-                        auth=nextcloud_auth(),
-                        timeout=10
-                    )
-                    if dr.status_code in (200, 204):
-                        return jsonify({"deleted": True, "uid": uid}), 200
-
-        return jsonify({"error": "Task not found", "uid": uid}), 404
+    result, code = _delete_task(uid, tasks_calendar, request.headers.get("If-Match"))
+    return jsonify(result), code
+
+
+# --- Batch ---
+
+BATCH_MAX_OPERATIONS = 100
+
+
+def _run_batch_operation(op):
+    """Run one batch operation; return its per-item result with an HTTP-style status.
+
+    The operation's "calendar" applies to every op; one inside data is ignored.
+    """
+    if not isinstance(op, dict):
+        return {"error": "operation must be an object"}, 400
+    action = op.get("op")
+    uid = op.get("uid")
+    calendar = op.get("calendar") or CONFIG['nextcloud_tasks_calendar']
+    data = op.get("data")
+    if data and isinstance(data, dict):
+        data = dict(data, calendar=calendar)
+    if action == "create":
+        return _create_task(data)
+    if action not in ("update", "delete"):
+        return {"error": "op must be create, update or delete"}, 400
+    if not uid:
+        return {"error": "uid is required"}, 400
+    if action == "update":
+        return _update_task(uid, data, op.get("etag"))
+    return _delete_task(uid, calendar, op.get("etag"))
+
+
+@bp.route('/api/tasks/batch', methods=['POST'])
+def batch_tasks():
+    """Run create/update/delete operations concurrently; per-item results.
+
+    Body: {"operations": [{"op": "update", "uid": "...", "etag": "...", "data": {...}},
+                          {"op": "delete", "uid": "..."}, {"op": "create", "data": {...}}]}
+    Each operation may name its "calendar". Results carry the op's own fields
+    plus index, op and httpStatus.
+    """
+    if not nextcloud_configured():
+        return jsonify({"error": "Nextcloud not configured"}), 500
 
-    except Exception as e:
-        return jsonify({"error": "Failed to delete task", "details": str(e)}), 502
+    operations = (request.get_json() or {}).get("operations")
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations list is required"}), 400
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return jsonify({"error": "At most %d operations per batch" % BATCH_MAX_OPERATIONS}), 400
+
+    workers = min(CONFIG['tasks_batch_workers'], len(operations))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(_run_batch_operation, operations))
+
+    results = []
+    for index, (op, (result, code)) in enumerate(zip(operations, outcomes)):
+        result["index"] = index
+        result["op"] = op.get("op") if isinstance(op, dict) else None
+        result["httpStatus"] = code
+        results.append(result)
+    failed = sum(1 for r in results if r["httpStatus"] >= 300)
+    return jsonify({"results": results, "count": len(results), "failed": failed}), 200
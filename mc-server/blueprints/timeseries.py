@@ -0,0 +1,137 @@
+"""Columnar time series over the health logs, for charting.
+
+Each log keeps a columnar copy of itself as a storage aggregate. A day column
+holds date ordinals and each value field is a float column, with NaN where the
+field is missing. Both are array.array, so an append is amortised O(1), and
+copy_columns() (run under the storage cache lock) is the one buffer copy
+before NumPy reads them.
+
+series() buckets a column by day, week (starting Monday) or month, and adds a
+trailing moving average and a least-squares trend line. All of it runs
+vectorised, so a multi-year chart is a single small response.
+"""
+from array import array
+from datetime import date
+
+import numpy as np
+
+BUCKETS = ('day', 'week', 'month')
+AGGREGATES = ('mean', 'sum', 'min', 'max', 'last')
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def columns(fields, scale=None):
+    """(initial, fold) for storage.register_aggregate() building columns of fields.
+
+    scale(row, field, value) may convert a value before it is stored (units).
+    """
+    def initial():
+        cols = {'day': array('q')}
+        cols.update((f, array('d')) for f in fields)
+        return cols
+
+    def fold(cols, row):
+        try:
+            day = date.fromisoformat(str(row.get('date', ''))[:10]).toordinal()
+        except ValueError:
+            return
+        cols['day'].append(day)
+        for f in fields:
+            value = row.get(f)
+            try:
+                value = float(value) if value not in (None, '') else np.nan
+            except (TypeError, ValueError):
+                value = np.nan
+            if scale and value == value:
+                value = scale(row, f, value)
+            cols[f].append(value)
+
+    return initial, fold
+
+
+def copy_columns(cols):
+    """Private copies of the columns, for storage.snapshot_aggregate()."""
+    return {name: col[:] for name, col in cols.items()}
+
+
+def ordinal(day):
+    """ISO date (or YYYY-MM month start) -> date ordinal."""
+    if len(day) == 7:
+        day += '-01'
+    return date.fromisoformat(day[:10]).toordinal()
+
+
+def _bucket_keys(days, bucket):
+    """Bucket start (as a date ordinal) for each day ordinal."""
+    if bucket == 'week':
+        return days - (days - 1) % 7   # ordinal 1 (0001-01-01) was a Monday
+    if bucket == 'month':
+        months = (days - _EPOCH).astype('datetime64[D]').astype('datetime64[M]')
+        return months.astype('datetime64[D]').astype(np.int64) + _EPOCH
+    return days
+
+
+def series(cols, field, bucket='day', agg='mean', since=None, until=None, window=7):
+    """Downsample one column into buckets.
+
+    cols must be a private copy (copy_columns()), not the shared aggregate.
+    since/until are date ordinals (until exclusive). Returns parallel lists:
+    dates (bucket start), values, counts and movingAverage (trailing mean over
+    `window` buckets, None until it fills), plus a trend dict with the
+    least-squares slope per day and the fitted start/end values (None with
+    fewer than two buckets).
+    """
+    days = np.frombuffer(cols['day'], dtype=np.int64)
+    values = np.frombuffer(cols[field], dtype=np.float64)
+    keep = ~np.isnan(values)
+    if since is not None:
+        keep &= days >= since
+    if until is not None:
+        keep &= days < until
+    days, values = days[keep], values[keep]
+
+    order = np.argsort(days, kind='stable')
+    keys = _bucket_keys(days[order], bucket)
+    values = values[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=np.int64)
+    counts = np.diff(np.r_[starts, len(keys)])
+
+    if not len(starts):
+        out = np.array([], dtype=np.float64)
+    elif agg == 'sum':
+        out = np.add.reduceat(values, starts)
+    elif agg == 'min':
+        out = np.minimum.reduceat(values, starts)
+    elif agg == 'max':
+        out = np.maximum.reduceat(values, starts)
+    elif agg == 'last':
+        out = values[starts + counts - 1]
+    else:
+        out = np.add.reduceat(values, starts) / counts
+
+    moving = [None] * len(out)
+    if window and len(out) >= window:
+        csum = np.cumsum(np.r_[0.0, out])
+        ma = (csum[window:] - csum[:-window]) / window
+        moving[window - 1:] = np.round(ma, 3).tolist()
+
+    bucket_days = keys[starts]
+    trend = None
+    if len(out) >= 2:
+        slope, intercept = np.polyfit(bucket_days - bucket_days[0], out, 1)
+        span = int(bucket_days[-1] - bucket_days[0])
+        trend = {
+            'slopePerDay': round(float(slope), 5),
+            'slopePerWeek': round(float(slope) * 7, 4),
+            'start': round(float(intercept), 3),
+            'end': round(float(intercept + slope * span), 3),
+        }
+
+    return {
+        'dates': [date.fromordinal(int(d)).isoformat() for d in bucket_days],
+        'values': np.round(out, 3).tolist(),
+        'counts': counts.tolist(),
+        'movingAverage': moving,
+        'trend': trend,
+    }
@@ -1,16 +1,15 @@
 """Today aggregation endpoint — daily briefing data for the dashboard."""
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from xml.etree import ElementTree as ET
 
-import requests as http_requests
 from flask import Blueprint, jsonify
 
-from .shared import (CONFIG, nextcloud_auth, nextcloud_configured,
-                     caldav_url, parse_ical_events, parse_ical_todos, parse_date)
-from .health import (_load_habits, _load_habit_log, _load_json,
-                     _load_family_scores, _family_score_streak,
-                     WEIGHT_FILE, ROWING_FILE)
+from .shared import CONFIG, nextcloud_configured, parse_date
+from .caldav_mirror import iter_events, iter_todos, fan_out
+from .tasks import _todo_comp_filter
+from . import storage
+from .health import (_load_habits, _habit_log_on, _rowing_since,
+                     _family_score_today, _family_score_streak, WEIGHT_FILE)
 
 bp = Blueprint('today', __name__)
 
@@ -69,50 +68,28 @@ def _fetch_calendar_events(today_str):
     end_date = (datetime.strptime(today_str, '%Y-%m-%d') + timedelta(days=1))
     end = end_date.strftime('%Y%m%dT%H%M%SZ')
 
-    report_body = """<?xml version="1.0" encoding="utf-8" ?>
-<C:calendar-query xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">
-  <D:prop>
-    <D:getetag/>
-    <C:calendar-data/>
-  </D:prop>
-  <C:filter>
-    <C:comp-filter name="VCALENDAR">
-      <C:comp-filter name="VEVENT">
-        <C:time-range start="{start}" end="{end}"/>
-      </C:comp-filter>
-    </C:comp-filter>
-  </C:filter>
-</C:calendar-query>""".format(start=start, end=end)
+    def fetch(calendar):
+        events = []
+        for _, _, ev in iter_events(calendar, start, end):
+            cats = ev.get('categories', [])
+            title = ev.get('summary', 'Untitled')
+            events.append({
+                'id': ev.get('uid', ''),
+                'title': title,
+                'startDate': parse_date(ev.get('dtstart', '')),
+                'endDate': parse_date(ev.get('dtend', '')),
+                'allDay': ev.get('allDay', False),
+                'category': cats[0] if cats else 'personal',
+                'pillar': classify_pillar(cats, title),
+                'calendar': calendar,
+            })
+        return events
 
     try:
-        r = http_requests.request(
-            "REPORT", caldav_url(),
-            data=report_body,
-            headers={"Content-Type": "application/xml; charset=utf-8", "Depth": "1"},
-            auth=nextcloud_auth(), timeout=10
-        )
-        if r.status_code not in (200, 207):
-            return []
-
-        root = ET.fromstring(r.text)
-        ns = {"D": "DAV:", "C": "urn:ietf:params:xml:ns:caldav"}
-        events = []
-        for response in root.findall(".//D:response", ns):
-            cal_data_el = response.find(".//C:calendar-data", ns)
-            if cal_data_el is not None and cal_data_el.text:
-                for ev in parse_ical_events(cal_data_el.text):
-                    cats = ev.get('categories', [])
-                    title = ev.get('summary', 'Untitled')
-                    events.append({
-                        'id': ev.get('uid', ''),
-                        'title': title,
-                        'startDate': parse_date(ev.get('dtstart', '')),
-                        'endDate': parse_date(ev.get('dtend', '')),
-                        'allDay': ev.get('allDay', False),
-                        'category': cats[0] if cats else 'personal',
-                        'pillar': classify_pillar(cats, title),
-                    })
-        events.sort(key=lambda e: (not e['allDay'], e.get('startDate') or ''))
+        events, errors = fan_out(CONFIG['nextcloud_calendars'], fetch,
+                                 key=lambda e: (not e['allDay'], e.get('startDate') or ''))
+        for err in errors:
+            print("Today: calendar " + err['calendar'] + " failed: " + err['error'])
         return events
     except Exception:
         return []
@@ -123,58 +100,31 @@ def _fetch_tasks_due(today_str):
     if not nextcloud_configured():
         return []
 
-    tasks_calendar = CONFIG['nextcloud_tasks_calendar']
-    report_body = """<?xml version="1.0" encoding="utf-8" ?>
-<C:calendar-query xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:caldav">
-  <D:prop>
-    <D:getetag/>
-    <C:calendar-data/>
-  </D:prop>
-  <C:filter>
-    <C:comp-filter name="VCALENDAR">
-      <C:comp-filter name="VTODO"/>
-    </C:comp-filter>
-  </C:filter>
-</C:calendar-query>"""
-
     try:
-        r = http_requests.request(
-            "REPORT", caldav_url(tasks_calendar),
-            data=report_body,
-            headers={"Content-Type": "application/xml; charset=utf-8", "Depth": "1"},
-            auth=nextcloud_auth(), timeout=10
-        )
-        if r.status_code not in (200, 207):
-            return []
-
-        root = ET.fromstring(r.text)
-        ns = {"D": "DAV:", "C": "urn:ietf:params:xml:ns:caldav"}
         tasks = []
-        for response in root.findall(".//D:response", ns):
-            cal_data_el = response.find(".//C:calendar-data", ns)
-            if cal_data_el is not None and cal_data_el.text:
-                for todo in parse_ical_todos(cal_data_el.text):
-                    status = todo.get('status', 'NEEDS-ACTION')
-                    if status == 'COMPLETED':
-                        continue
-                    due_raw = todo.get('due', '')
-                    due_parsed = parse_date(due_raw)
-                    # Include tasks with no due date, due today, or overdue
-                    if due_parsed:
-                        due_date = due_parsed[:10]
-                        if due_date > today_str:
-                            continue
-                    cats = todo.get('categories', [])
-                    summary = todo.get('summary', '')
-                    tasks.append({
-                        'uid': todo.get('uid', ''),
-                        'summary': summary,
-                        'status': status,
-                        'priority': todo.get('priority', 0),
-                        'due': due_parsed,
-                        'categories': cats,
-                        'pillar': classify_pillar(cats, summary),
-                    })
+        open_tasks = _todo_comp_filter("incomplete", "", "", "")
+        for _, _, todo in iter_todos(CONFIG['nextcloud_tasks_calendar'], open_tasks):
+            status = todo.get('status', 'NEEDS-ACTION')
+            if status == 'COMPLETED':
+                continue
+            due_raw = todo.get('due', '')
+            due_parsed = parse_date(due_raw)
+            # Include tasks with no due date, due today, or overdue
+            if due_parsed:
+                due_date = due_parsed[:10]
+                if due_date > today_str:
+                    continue
+            cats = todo.get('categories', [])
+            summary = todo.get('summary', '')
+            tasks.append({
+                'uid': todo.get('uid', ''),
+                'summary': summary,
+                'status': status,
+                'priority': todo.get('priority', 0),
+                'due': due_parsed,
+                'categories': cats,
+                'pillar': classify_pillar(cats, summary),
+            })
         tasks.sort(key=lambda t: (t.get('priority') or 99, t.get('due') or '9999'))
         return tasks
     except Exception:
@@ -183,12 +133,11 @@ def _fetch_tasks_due(today_str):
 
 def _fetch_habits(today_str, iso_weekday):
     """Load habits for today and their completion status."""
-    habits = _load_habits()
+    habits = _load_habits(readonly=True)
     active = [h for h in habits if h.get('active', True)]
     todays = [h for h in active if iso_weekday in h.get('defaultDays', [])]
 
-    log = _load_habit_log()
-    todays_log = [e for e in log if e.get('date') == today_str]
+    todays_log = _habit_log_on(today_str)
     completed_ids = [e['habitId'] for e in todays_log]
 
     suggested = [{
@@ -208,11 +157,7 @@ def _fetch_habits(today_str, iso_weekday):
 
 def _fetch_health_snapshot(today_str):
     """Get latest weight, rowing count this week, and family time score."""
-    weight_entries = _load_json(WEIGHT_FILE)
-    rowing_entries = _load_json(ROWING_FILE)
-
-    weight_entries.sort(key=lambda e: e.get('date', ''), reverse=True)
-    latest = weight_entries[0] if weight_entries else None
+    latest = next(iter(storage.rows_by_date(WEIGHT_FILE, limit=1)), None)
     latest_weight = None
     if latest:
         latest_weight = {
@@ -222,12 +167,11 @@ def _fetch_health_snapshot(today_str):
         }
 
     week_ago = (datetime.strptime(today_str, '%Y-%m-%d') - timedelta(days=7)).strftime('%Y-%m-%d')
-    rowing_this_week = sum(1 for e in rowing_entries if e.get('date', '') >= week_ago)
+    rowing_this_week, _ = _rowing_since(week_ago)
 
     # Family time score
-    family_scores = _load_family_scores()
-    todays_family = next((e for e in family_scores if e.get('date') == today_str), None)
-    family_streak = _family_score_streak(family_scores)
+    todays_family = _family_score_today(today_str)
+    family_streak = _family_score_streak()
 
     return {
         'latestWeight': latest_weight,
@@ -1,8 +1,13 @@
-"""LCiB Dashboard Command Server — Flask app with Blueprint modules."""
-from flask import Flask
+"""LCiB Dashboard Command Server — Flask app with Blueprint modules.
+
+Development: python3 command_server.py
+Production:  gunicorn -c gunicorn.conf.py command_server:app
+"""
+from flask import Flask, g, request
 from flask_cors import CORS
 
 from blueprints.shared import CONFIG, check_token
+from blueprints.storage import store_etag
 from blueprints import infrastructure, ha, oliver, calendar, cathy, freezer, tasks, financials
 from blueprints import health as health_bp
 from blueprints import today as today_bp
@@ -18,6 +23,39 @@ for bp in [infrastructure.bp, ha.bp, oliver.bp, calendar.bp,
     app.register_blueprint(bp)
 
 
+# --- Conditional GET ---
+
+@app.before_request
+def answer_not_modified():
+    """304 for depends_on views whose store files have not changed."""
+    if request.method != 'GET':
+        return
+    view = app.view_functions.get(request.endpoint)
+    if getattr(view, 'store_files', None) is None:
+        return
+    if view.store_etag_arg and not request.args.get(view.store_etag_arg):
+        return
+    g.etag = store_etag(view)
+    if request.if_none_match.contains(g.etag):
+        response = app.response_class(status=304)
+        response.set_etag(g.etag)
+        return response
+
+
+@app.after_request
+def add_etag(response):
+    """Strong ETag on every 200 GET (store version or body hash), 304 on match."""
+    if (request.method != 'GET' or response.status_code != 200
+            or response.is_streamed or response.direct_passthrough):
+        return response
+    if g.get('etag'):
+        response.set_etag(g.etag)
+    else:
+        response.add_etag()
+    response.headers.setdefault('Cache-Control', 'private, no-cache')
+    return response.make_conditional(request)
+
+
 @app.route('/api/health-check', methods=['GET'])
 def health_check():
     """Health check endpoint."""
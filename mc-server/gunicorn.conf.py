@@ -0,0 +1,37 @@
+"""Gunicorn settings for running the command server in production.
+
+Start (from /root/mc-server):  gunicorn -c gunicorn.conf.py command_server:app
+Graceful reload after a deploy: kill -HUP $(cat gunicorn.pid)
+
+Each worker process runs its own thread pool. Writes to the JSON stores are
+serialised across workers by serialize_writes() in blueprints/shared.py.
+"""
+import os
+import multiprocessing
+
+bind = os.getenv('MC_SERVER_BIND', '0.0.0.0:5001')
+workers = int(os.getenv('MC_SERVER_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.getenv('MC_SERVER_THREADS', '8'))
+
+# A worker that stops heart-beating this long is killed and replaced;
+# outbound calls are bounded separately by HTTP_CONNECT/READ_TIMEOUT.
+timeout = int(os.getenv('MC_SERVER_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('MC_SERVER_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+
+# Recycle workers now and then so slow leaks cannot accumulate
+max_requests = 2000
+max_requests_jitter = 200
+
+pidfile = os.getenv('MC_SERVER_PIDFILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.pid'))
+accesslog = '-'
+errorlog = '-'
+capture_output = True
+
+
+def on_starting(server):
+    """Refuse to start without a token, like the dev server does."""
+    from blueprints.shared import CONFIG
+    if not CONFIG['secret_token']:
+        raise ValueError("COMMAND_SERVER_TOKEN environment variable not set. Please create a .env file.")
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Benchmark the streaming iCal tokenizer against the old whole-payload parsers.
+
+Usage: python3 bench_ical_parser.py [--components 10000] [--repeat 3]
+
+Builds a synthetic CalDAV-sized calendar (folded lines, VALARMs, CRLF endings)
+and reports best-of-N CPU time and tracemalloc peak for each parser. Both
+sides build the full list of records, so the comparison is like for like;
+the "consumed" row adds the streaming parser drained without keeping its
+records, which is what a view that filters as it reads pays.
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from blueprints.shared import iter_ical_events, iter_ical_todos  # noqa: E402
+
+
+# --- Old parsers (pre-tokenizer), kept verbatim for comparison ---
+
+def _legacy_unfold_ical(text):
+    return text.replace('\r\n ', '').replace('\r\n\t', '').replace('\n ', '').replace('\n\t', '')
+
+
+def legacy_parse_ical_events(ical_text):
+    ical_text = _legacy_unfold_ical(ical_text)
+    events = []
+    in_event = False
+    current = {}
+    for line in ical_text.replace("\r\n", "\n").split("\n"):
+        line = line.strip()
+        if line == "BEGIN:VEVENT":
+            in_event = True
+            current = {}
+        elif line == "END:VEVENT":
+            in_event = False
+            if current.get("summary"):
+                events.append(current)
+            current = {}
+        elif in_event and ":" in line:
+            key_part, _, value = line.partition(":")
+            key = key_part.split(";")[0].upper()
+            if key == "SUMMARY":
+                current["summary"] = value
+            elif key == "DTSTART":
+                current["dtstart"] = value
+                current["allDay"] = "VALUE=DATE" in key_part and "DATE-TIME" not in key_part
+            elif key == "DTEND":
+                current["dtend"] = value
+            elif key == "UID":
+                current["uid"] = value
+            elif key == "CATEGORIES":
+                current["categories"] = [c.strip() for c in value.split(',') if c.strip()]
+            elif key == "DESCRIPTION":
+                current["description"] = value
+    return events
+
+
+def legacy_parse_ical_todos(ical_text):
+    ical_text = _legacy_unfold_ical(ical_text)
+    todos = []
+    in_todo = False
+    current = {}
+    for line in ical_text.replace("\r\n", "\n").split("\n"):
+        line = line.strip()
+        if line == "BEGIN:VTODO":
+            in_todo = True
+            current = {}
+        elif line == "END:VTODO":
+            in_todo = False
+            if current.get("summary") or current.get("uid"):
+                todos.append(current)
+            current = {}
+        elif in_todo and ":" in line:
+            key_part, _, value = line.partition(":")
+            key = key_part.split(";")[0].upper()
+            if key == "UID":
+                current["uid"] = value
+            elif key == "SUMMARY":
+                current["summary"] = value
+            elif key == "DESCRIPTION":
+                current["description"] = value
+            elif key == "STATUS":
+                current["status"] = value
+            elif key == "PRIORITY":
+                try:
+                    current["priority"] = int(value)
+                except ValueError:
+                    current["priority"] = 0
+            elif key == "DUE":
+                current["due"] = value
+                current["dueAllDay"] = "VALUE=DATE" in key_part and "DATE-TIME" not in key_part
+            elif key == "PERCENT-COMPLETE":
+                try:
+                    current["percent_complete"] = int(value)
+                except ValueError:
+                    current["percent_complete"] = 0
+            elif key == "CATEGORIES":
+                current["categories"] = [c.strip() for c in value.split(',') if c.strip()]
+    return todos
+
+
+# --- Synthetic calendar ---
+
+def _fold(line):
+    """Fold a content line at 75 octets like Nextcloud does."""
+    if len(line) <= 75:
+        return [line]
+    parts = [line[:75]]
+    rest = line[75:]
+    while rest:
+        parts.append(" " + rest[:74])
+        rest = rest[74:]
+    return parts
+
+
+def build_calendar(n):
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//LCiB Dashboard//Bench//EN"]
+    for i in range(n):
+        day = 20260101 + (i % 28)
+        description = ("Synthetic event %d with a long description that must be folded " % i) * 3
+        lines.append("BEGIN:VEVENT")
+        lines.append("UID:event-%06d@bench" % i)
+        lines.append("DTSTAMP:20260101T000000Z")
+        if i % 3:
+            lines.append("DTSTART:%dT090000Z" % day)
+            lines.append("DTEND:%dT100000Z" % day)
+        else:
+            lines.append("DTSTART;VALUE=DATE:%d" % day)
+            lines.append("DTEND;VALUE=DATE:%d" % day)
+        lines.append("SUMMARY:Bench event %d" % i)
+        lines.extend(_fold("DESCRIPTION:" + description))
+        lines.append("CATEGORIES:work,bench")
+        lines.extend(["BEGIN:VALARM", "ACTION:DISPLAY", "DESCRIPTION:Reminder",
+                      "TRIGGER:-PT15M", "END:VALARM"])
+        lines.append("END:VEVENT")
+
+        lines.append("BEGIN:VTODO")
+        lines.append("UID:todo-%06d@bench" % i)
+        lines.append("SUMMARY:Bench task %d" % i)
+        lines.extend(_fold("DESCRIPTION:" + description))
+        lines.append("STATUS:" + ("COMPLETED" if i % 4 == 0 else "NEEDS-ACTION"))
+        lines.append("PRIORITY:%d" % (i % 9))
+        lines.append("DUE;VALUE=DATE:%d" % day)
+        lines.append("PERCENT-COMPLETE:%d" % (100 if i % 4 == 0 else 0))
+        lines.append("CATEGORIES:home")
+        lines.append("END:VTODO")
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+# --- Runners ---
+
+def _consume(it):
+    """Drain an iterator without keeping what it yields."""
+    count = 0
+    for _ in it:
+        count += 1
+    return count
+
+
+def measure(fn, text, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = fn(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    fn(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark iCal parsers")
+    parser.add_argument("--components", type=int, default=10000,
+                        help="VEVENT and VTODO count (each)")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repeats (best-of)")
+    args = parser.parse_args()
+
+    text = build_calendar(args.components)
+    print(f"Payload: {args.components} VEVENT + {args.components} VTODO, "
+          f"{len(text) / 1024 / 1024:.1f} MiB")
+
+    cases = [
+        ("events", legacy_parse_ical_events, iter_ical_events),
+        ("todos", legacy_parse_ical_todos, iter_ical_todos),
+    ]
+
+    def row(name, impl, result):
+        count, elapsed, peak = result
+        print(f"{name:<8} {impl:<10} {count:>7} {elapsed * 1000:>9.1f} {peak / 1024 / 1024:>9.2f}")
+
+    print(f"\n{'parser':<8} {'impl':<10} {'items':>7} {'cpu ms':>9} {'peak MiB':>9}")
+    for name, legacy, streaming in cases:
+        l_result = measure(lambda t: len(legacy(t)), text, args.repeat)
+        s_result = measure(lambda t: len(list(streaming(t))), text, args.repeat)
+        row(name, 'legacy', l_result)
+        row(name, 'streaming', s_result)
+        print(f"{'':<8} {'savings':<10} {'':>7} {(1 - s_result[1] / l_result[1]) * 100:>8.0f}% "
+              f"{(1 - s_result[2] / l_result[2]) * 100:>8.0f}%")
+        row(name, 'consumed', measure(lambda t: _consume(streaming(t)), text, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Import the JSON stores into the SQLite storage backend (one-shot).
+
+Usage: python3 migrate_storage.py [--dry-run] [--force]
+       python3 migrate_storage.py --family-score
+
+Reads every *_FILE the file-backed blueprints declare, replaying the journal
+of the journaled health logs, and writes it to STORAGE_DB (default
+/opt/mc-data/store.db). The JSON files are left in place, so switching
+STORAGE_BACKEND back to json is a rollback.
+
+A database that already holds data is refused (it may be newer than the
+JSON files); --force replaces it store by store.
+
+--family-score moves a family-score document written by an older server
+(which kept it as one document) into its row table. It only touches that
+store and does nothing when the table already has rows.
+"""
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv('/opt/.env')
+os.environ['STORAGE_BACKEND'] = 'sqlite'
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from blueprints import storage, financials, health, freezer, cathy, oliver  # noqa: E402
+
+MODULES = [financials, health, freezer, cathy, oliver]
+
+
+def store_paths():
+    """Every module-level *_FILE path, in module order."""
+    paths = []
+    for module in MODULES:
+        for name in sorted(vars(module)):
+            value = getattr(module, name)
+            if name.endswith('_FILE') and isinstance(value, str) and value not in paths:
+                paths.append(value)
+    return paths
+
+
+def read_store(path):
+    """The store at path as the json engine sees it (journal replayed), or None."""
+    if not os.path.exists(path) and not os.path.exists(path + '.journal'):
+        return None
+    return storage.JsonEngine().load(path, None)
+
+
+def database_has_data(db_path):
+    """True if any store has been written to the database at db_path."""
+    if not os.path.exists(db_path):
+        return False
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('SELECT 1 FROM versions LIMIT 1').fetchone() is not None
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+def migrate(paths, dry_run=False):
+    """Import each store in paths; returns the paths imported."""
+    imported = []
+    for path in paths:
+        data = read_store(path)
+        if data is None:
+            print(f"  skip    {path} (missing or unreadable)")
+            continue
+        if dry_run:
+            print(f"  would   {path}")
+            continue
+        storage.save(path, data, default=str)
+        imported.append(path)
+        print(f"  import  {path}")
+    return imported
+
+
+def migrate_family_score(db_path):
+    """Move an old family-score document row into the family_score table."""
+    path = health.FAMILY_SCORE_FILE
+    conn = sqlite3.connect(db_path)
+    try:
+        try:
+            row = conn.execute('SELECT body FROM documents WHERE path = ?', (path,)).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        if row is None:
+            print("  nothing to migrate (no family-score document)")
+            return False
+        if storage.count_rows(path):
+            print("  skip    family_score table already has rows; leaving the old document")
+            return False
+        storage.save(path, json.loads(row[0]), default=str)
+        conn.execute('DELETE FROM documents WHERE path = ?', (path,))
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"  import  {path} (moved to its row table)")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dry-run', action='store_true', help='report what would be imported')
+    parser.add_argument('--force', action='store_true', help='replace stores in a non-empty database')
+    parser.add_argument('--family-score', action='store_true',
+                        help='only move an old family-score document into its row table')
+    args = parser.parse_args()
+
+    db_path = storage.CONFIG['storage_db']
+    print(f"Target: {db_path}")
+    if args.family_score:
+        migrate_family_score(db_path)
+        return
+    if database_has_data(db_path) and not args.force and not args.dry_run:
+        print("  refusing: the database already holds data and may be newer than the JSON files.")
+        print("  Use --family-score for the family-score table move, or --force to overwrite.")
+        sys.exit(1)
+    migrate(store_paths(), dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
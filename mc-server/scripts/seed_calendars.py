@@ -9,21 +9,20 @@ import os
 import sys
 import uuid
 import argparse
-import requests
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 load_dotenv('/opt/.env')
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from blueprints.shared import caldav_request  # noqa: E402  (reads the env loaded above)
+
 NC_URL = os.getenv('NEXTCLOUD_URL', 'http://192.168.0.99:8090')
 NC_USER = os.getenv('NEXTCLOUD_USER', '')
 NC_PASS = os.getenv('NEXTCLOUD_APP_PASSWORD', '')
 
 
-def nc_auth():
-    return (NC_USER, NC_PASS)
-
-
 def caldav_base(calendar):
     return f"{NC_URL}/remote.php/dav/calendars/{NC_USER}/{calendar}/"
 
@@ -32,8 +31,7 @@ def create_calendar(name, display_name, color="#4a6741"):
     """Create a new calendar via MKCALENDAR if it doesn't exist."""
     url = caldav_base(name)
     # Check if it exists
-    r = requests.request("PROPFIND", url, auth=nc_auth(),
-                         headers={"Depth": "0"}, timeout=10)
+    r = caldav_request("PROPFIND", url, headers={"Depth": "0"})
     if r.status_code in (200, 207):
         print(f"  Calendar '{name}' already exists")
         return True
@@ -53,8 +51,8 @@ def create_calendar(name, display_name, color="#4a6741"):
   </D:set>
 </C:mkcalendar>"""
 
-    r = requests.request("MKCALENDAR", url, data=body, auth=nc_auth(),
-                         headers={"Content-Type": "application/xml"}, timeout=10)
+    r = caldav_request("MKCALENDAR", url, data=body,
+                       headers={"Content-Type": "application/xml"})
     if r.status_code in (201, 207):
         print(f"  Created calendar '{name}' ({display_name})")
         return True
@@ -108,9 +106,8 @@ def create_event(calendar, title, start_date, all_day=True, description="",
         return True
 
     url = caldav_base(calendar) + uid + ".ics"
-    r = requests.put(url, data=ical.encode('utf-8'),
-                     headers={"Content-Type": "text/calendar; charset=utf-8"},
-                     auth=nc_auth(), timeout=10)
+    r = caldav_request("PUT", url, data=ical.encode('utf-8'),
+                       headers={"Content-Type": "text/calendar; charset=utf-8"})
     if r.status_code in (200, 201, 204):
         return True
     else:
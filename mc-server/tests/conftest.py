@@ -0,0 +1,39 @@
+"""Shared fixtures: the blueprints import with a test token, the json engine
+and no background CalDAV sync, and stores can be moved under tmp_path."""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault('COMMAND_SERVER_TOKEN', 'test-token')
+os.environ['CALDAV_SYNC_INTERVAL'] = '0'
+os.environ['CALDAV_STAMP_DIR'] = tempfile.mkdtemp(prefix='caldav-stamps-')
+os.environ['STORAGE_BACKEND'] = 'json'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pytest  # noqa: E402
+
+from blueprints import storage  # noqa: E402
+
+
+@pytest.fixture
+def relocate(monkeypatch, tmp_path):
+    """relocate(module, 'X_FILE') points the store at a fresh file under
+    tmp_path, keeping its table and aggregate registrations."""
+    def move(module, name):
+        old = getattr(module, name)
+        new = str(tmp_path / os.path.basename(old))
+        if old in storage._tables:
+            monkeypatch.setitem(storage._tables, new, storage._tables[old])
+        monkeypatch.setattr(module, name, new)
+        storage.invalidate(new)
+        return new
+    return move
+
+
+@pytest.fixture
+def client():
+    from command_server import app
+    app.config['TESTING'] = True
+    with app.test_client() as c:
+        c.environ_base['HTTP_AUTHORIZATION'] = 'Bearer ' + os.environ['COMMAND_SERVER_TOKEN']
+        yield c
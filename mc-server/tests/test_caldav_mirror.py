@@ -0,0 +1,268 @@
+import re
+from xml.sax.saxutils import escape, unescape
+
+import pytest
+
+from blueprints import caldav_mirror
+from blueprints.caldav_mirror import _event_overlaps
+from blueprints.shared import CONFIG, bump_generation, parse_ical_events, read_generation
+
+# The window is 2026-03-10 (UTC), as today.py asks for it
+START, END = '2026-03-10T00:00:00', '2026-03-11T00:00:00'
+
+
+def event(*lines):
+    text = '\r\n'.join(['BEGIN:VCALENDAR', 'BEGIN:VEVENT', 'UID:x', 'SUMMARY:Test',
+                        *lines, 'END:VEVENT', 'END:VCALENDAR'])
+    [ev] = parse_ical_events(text)
+    return ev
+
+
+@pytest.mark.parametrize('lines, expected', [
+    # All-day DTEND is exclusive: yesterday's event ends as the window starts
+    (['DTSTART;VALUE=DATE:20260309', 'DTEND;VALUE=DATE:20260310'], False),
+    (['DTSTART;VALUE=DATE:20260310', 'DTEND;VALUE=DATE:20260311'], True),
+    (['DTSTART;VALUE=DATE:20260311', 'DTEND;VALUE=DATE:20260312'], False),
+    # All-day without DTEND lasts the day
+    (['DTSTART;VALUE=DATE:20260310'], True),
+    (['DTSTART;VALUE=DATE:20260309'], False),
+    # Timed event ending exactly at the window start
+    (['DTSTART:20260309T230000Z', 'DTEND:20260310T000000Z'], False),
+    (['DTSTART:20260309T230000Z', 'DTEND:20260310T000001Z'], True),
+    # Timed event without DTEND is an instant
+    (['DTSTART:20260310T000000Z'], True),
+    (['DTSTART:20260311T000000Z'], False),
+])
+def test_single_events(lines, expected):
+    assert _event_overlaps(event(*lines), START, END) is expected
+
+
+@pytest.mark.parametrize('lines, expected', [
+    # 20:00-21:00 Chicago (CDT from 8 March) is 01:00-02:00 UTC the next day
+    (['DTSTART;TZID=America/Chicago:20260309T200000',
+      'DTEND;TZID=America/Chicago:20260309T210000'], True),
+    (['DTSTART;TZID=America/Chicago:20260310T200000',
+      'DTEND;TZID=America/Chicago:20260310T210000'], False),
+    # Unknown zones are compared as floating times
+    (['DTSTART;TZID=Nowhere/Else:20260310T090000',
+      'DTEND;TZID=Nowhere/Else:20260310T100000'], True),
+])
+def test_tzid(lines, expected):
+    assert _event_overlaps(event(*lines), START, END) is expected
+
+
+@pytest.mark.parametrize('rrule, expected', [
+    ('FREQ=DAILY', True),
+    ('FREQ=DAILY;COUNT=5', False),           # 1st..5th March
+    ('FREQ=DAILY;COUNT=10', True),           # 1st..10th March
+    ('FREQ=WEEKLY;COUNT=2', False),          # 1st, 8th March
+    ('FREQ=WEEKLY;INTERVAL=3;COUNT=2', True),   # 1st, 22nd: spans it, gaps are not expanded
+    ('FREQ=WEEKLY;BYDAY=SU,TU;COUNT=3', True),   # may reach the 10th
+    ('FREQ=DAILY;BYDAY=MO;COUNT=2', True),   # limiting BYDAY: not bounded
+    ('FREQ=DAILY;UNTIL=20260309', False),
+    ('FREQ=DAILY;UNTIL=20260310', True),
+])
+def test_all_day_rrule(rrule, expected):
+    ev = event('DTSTART;VALUE=DATE:20260301', 'DTEND;VALUE=DATE:20260302', 'RRULE:' + rrule)
+    assert _event_overlaps(ev, START, END) is expected
+
+
+@pytest.mark.parametrize('rrule, expected', [
+    ('FREQ=DAILY;UNTIL=20260309T090000Z', False),
+    ('FREQ=DAILY;UNTIL=20260310T090000Z', True),
+    ('FREQ=DAILY;UNTIL=20260310', True),     # a date UNTIL covers the whole day
+])
+def test_timed_rrule(rrule, expected):
+    ev = event('DTSTART:20260301T090000Z', 'DTEND:20260301T100000Z', 'RRULE:' + rrule)
+    assert _event_overlaps(ev, START, END) is expected
+
+
+def test_starts_after_window():
+    ev = event('DTSTART;VALUE=DATE:20260312', 'RRULE:FREQ=DAILY')
+    assert _event_overlaps(ev, START, END) is False
+
+
+# --- Sync against a fake CalDAV collection ---
+
+CALENDAR = 'tasks'
+
+
+class Response:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.content = body.encode()
+        self.text = body
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeCalDAV:
+    """Just enough of a calendar collection for sync-collection and calendar-multiget.
+
+    Sync tokens are epoch-position in the change log; forget_tokens() makes
+    every token issued so far invalid, as a server does after a collection reset.
+    """
+
+    def __init__(self):
+        self.base = '/remote.php/dav/calendars/%s/%s/' % (CONFIG['nextcloud_user'], CALENDAR)
+        self.objects = {}   # href -> (etag, data)
+        self.log = []       # changed hrefs, in order
+        self.epoch = 1
+        self.reports = []   # ('sync', token) / ('multiget', [hrefs])
+
+    def put(self, uid, summary):
+        href = self.base + uid + '.ics'
+        data = '\n'.join(['BEGIN:VCALENDAR', 'BEGIN:VTODO', 'UID:' + uid,
+                             'SUMMARY:' + summary, 'END:VTODO', 'END:VCALENDAR'])
+        self.log.append(href)
+        self.objects[href] = ('"%d"' % len(self.log), data)
+        return href
+
+    def delete(self, uid):
+        href = self.base + uid + '.ics'
+        del self.objects[href]
+        self.log.append(href)
+
+    def forget_tokens(self):
+        self.epoch += 1
+
+    def __call__(self, method, url, data=None, headers=None, **kwargs):
+        assert method == 'REPORT' and url.endswith(self.base)
+        if 'sync-collection' in data:
+            return self._sync(re.search(r'<D:sync-token>(.*)</D:sync-token>', data).group(1))
+        hrefs = [unescape(h) for h in re.findall(r'<D:href>(.*?)</D:href>', data)]
+        self.reports.append(('multiget', hrefs))
+        return self._multistatus(
+            '<d:response><d:href>%s</d:href><d:propstat><d:prop><d:getetag>%s</d:getetag>'
+            '<c:calendar-data>%s</c:calendar-data></d:prop></d:propstat></d:response>'
+            % (escape(h), self.objects[h][0], escape(self.objects[h][1]))
+            for h in hrefs if h in self.objects)
+
+    def _sync(self, token):
+        self.reports.append(('sync', token))
+        if token:
+            epoch, since = map(int, token.rsplit('/', 1)[1].split('-'))
+            if epoch != self.epoch:
+                return Response(403, '<d:error xmlns:d="DAV:"><d:valid-sync-token/></d:error>')
+            changed = list(dict.fromkeys(self.log[since:]))
+        else:
+            changed = [self.base] + list(self.objects)
+        responses = []
+        for href in changed:
+            if href in self.objects or href == self.base:
+                etag = self.objects[href][0] if href in self.objects else '"collection"'
+                responses.append('<d:response><d:href>%s</d:href><d:propstat><d:prop>'
+                                 '<d:getetag>%s</d:getetag></d:prop></d:propstat></d:response>'
+                                 % (escape(href), etag))
+            else:
+                responses.append('<d:response><d:href>%s</d:href>'
+                                 '<d:status>HTTP/1.1 404 Not Found</d:status></d:response>' % escape(href))
+        return self._multistatus(responses, 'http://sabre.io/ns/sync/%d-%d' % (self.epoch, len(self.log)))
+
+    @staticmethod
+    def _multistatus(responses, token=None):
+        body = ''.join(responses)
+        if token:
+            body += '<d:sync-token>%s</d:sync-token>' % token
+        return Response(207, '<?xml version="1.0"?><d:multistatus xmlns:d="DAV:" '
+                             'xmlns:c="urn:ietf:params:xml:ns:caldav">%s</d:multistatus>' % body)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeCalDAV()
+    monkeypatch.setattr(caldav_mirror, 'caldav_request', fake)
+    monkeypatch.setattr(caldav_mirror, '_mirrors', {})
+    monkeypatch.setitem(CONFIG, 'caldav_mirror', True)
+    return fake
+
+
+def summaries():
+    return sorted(todo['summary'] for _, _, todo in caldav_mirror.iter_todos(CALENDAR))
+
+
+def test_initial_sync_fetches_every_member(server):
+    a, b = server.put('a', 'First'), server.put('b', 'Second')
+    assert summaries() == ['First', 'Second']
+    assert server.reports == [('sync', ''), ('multiget', [a, b])]
+    assert caldav_mirror._entry(CALENDAR)['token'] == 'http://sabre.io/ns/sync/1-2'
+
+
+def test_incremental_sync_fetches_only_changes(server):
+    server.put('a', 'First')
+    server.put('b', 'Second')
+    server.put('c', 'Third')
+    summaries()
+    server.reports.clear()
+
+    changed = server.put('a', 'First, edited')
+    server.delete('b')
+    added = server.put('d', 'Fourth')
+    assert summaries() == ['First, edited', 'Fourth', 'Third']
+    assert server.reports == [('sync', 'http://sabre.io/ns/sync/1-3'), ('multiget', [changed, added])]
+    assert server.base + 'b.ics' not in caldav_mirror._entry(CALENDAR)['objects']
+
+
+def test_unchanged_collection_skips_multiget(server):
+    server.put('a', 'First')
+    summaries()
+    server.reports.clear()
+    assert summaries() == ['First']
+    assert server.reports == [('sync', 'http://sabre.io/ns/sync/1-1')]
+
+
+def test_invalid_sync_token_resyncs_from_scratch(server):
+    server.put('a', 'First')
+    server.put('b', 'Second')
+    summaries()
+    server.reports.clear()
+
+    # The server forgets its history; b disappears without a change record
+    del server.objects[server.base + 'b.ics']
+    server.forget_tokens()
+    assert summaries() == ['First']
+    assert server.reports == [('sync', 'http://sabre.io/ns/sync/1-2'), ('sync', '')]
+    assert caldav_mirror._entry(CALENDAR)['token'] == 'http://sabre.io/ns/sync/2-2'
+
+
+def test_reads_fill_the_uid_index(server):
+    href = server.put('a', 'First')
+    assert caldav_mirror.lookup(CALENDAR, 'a') is None
+    summaries()
+    assert caldav_mirror.lookup(CALENDAR, 'a') == (href, '"1"', server.objects[href][1])
+    caldav_mirror.forget(CALENDAR, 'a')
+    assert caldav_mirror.lookup(CALENDAR, 'a') is None
+
+
+def test_failed_sync_serves_the_last_copy(server, monkeypatch):
+    server.put('a', 'First')
+    summaries()
+    monkeypatch.setattr(caldav_mirror, 'caldav_request',
+                        lambda *a, **kw: Response(500, 'Internal Server Error'))
+    assert summaries() == ['First']
+
+
+def test_invalidate_in_another_process_forces_a_sync(server, monkeypatch):
+    monkeypatch.setitem(CONFIG, 'caldav_sync_interval', 3600)
+    server.put('a', 'First')
+    assert summaries() == ['First']
+    server.put('b', 'Second')
+    assert summaries() == ['First']       # within the interval: served as is
+
+    # Another worker's invalidate() only reaches us through the stamp file
+    stamp = caldav_mirror._stamp_path(CALENDAR)
+    bump_generation(stamp)
+    assert summaries() == ['First', 'Second']
+    assert caldav_mirror._entry(CALENDAR)['generation'] == read_generation(stamp)
+
+
+def test_invalidate_bumps_the_shared_generation(server):
+    stamp = caldav_mirror._stamp_path(CALENDAR)
+    before = read_generation(stamp)
+    caldav_mirror.invalidate(CALENDAR)
+    assert read_generation(stamp) == before + 1
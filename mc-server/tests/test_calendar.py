@@ -0,0 +1,69 @@
+import pytest
+
+from blueprints import calendar
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ''
+
+
+@pytest.fixture
+def caldav(monkeypatch):
+    calls = []
+    monkeypatch.setattr(calendar, 'nextcloud_configured', lambda: True)
+    monkeypatch.setattr(calendar, 'lookup', lambda cal, uid: None)
+
+    def delete_uid(cal, uid, component):
+        calls.append(('delete_uid', uid))
+        return uid == 'indexed'
+
+    monkeypatch.setattr(calendar, 'delete_uid', delete_uid)
+    return calls
+
+
+def test_direct_href_is_tried_first(client, caldav, monkeypatch):
+    monkeypatch.setattr(calendar, 'caldav_request',
+                        lambda method, url, **kw: caldav.append((method, url[-11:])) or Response(204))
+    r = client.delete('/api/calendar-events/event-1')
+    assert r.status_code == 200
+    assert caldav == [('DELETE', 'event-1.ics')]
+
+
+def test_falls_back_to_uid_lookup(client, caldav, monkeypatch):
+    monkeypatch.setattr(calendar, 'caldav_request', lambda method, url, **kw: Response(404))
+    assert client.delete('/api/calendar-events/indexed').status_code == 200
+    assert client.delete('/api/calendar-events/missing').status_code == 404
+    assert caldav == [('delete_uid', 'indexed'), ('delete_uid', 'missing')]
+
+
+@pytest.fixture
+def two_calendars(monkeypatch):
+    from blueprints.shared import CONFIG
+    monkeypatch.setitem(CONFIG, 'nextcloud_calendar', 'personal')
+    monkeypatch.setitem(CONFIG, 'nextcloud_calendars', ['personal', 'family'])
+
+
+def test_deletes_from_a_named_calendar(client, caldav, two_calendars, monkeypatch):
+    monkeypatch.setattr(calendar, 'caldav_request',
+                        lambda method, url, **kw: caldav.append(url.split('/')[-2]) or Response(204))
+    r = client.delete('/api/calendar-events/event-1?calendar=family')
+    assert r.status_code == 200 and r.get_json()['calendar'] == 'family'
+    assert caldav == ['family']
+
+
+def test_tries_every_configured_calendar(client, caldav, two_calendars, monkeypatch):
+    def request(method, url, **kw):
+        caldav.append(url.split('/')[-2])
+        return Response(204 if '/family/' in url else 404)
+
+    monkeypatch.setattr(calendar, 'caldav_request', request)
+    r = client.delete('/api/calendar-events/event-1')
+    assert r.status_code == 200 and r.get_json()['calendar'] == 'family'
+    assert caldav == ['personal', ('delete_uid', 'event-1'), 'family']
+
+
+def test_unknown_calendar_is_rejected(client, caldav, two_calendars):
+    assert client.delete('/api/calendar-events/event-1?calendar=other').status_code == 400
+    assert caldav == []
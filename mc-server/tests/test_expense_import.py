@@ -0,0 +1,145 @@
+import io
+
+import pytest
+
+from blueprints import financials, storage
+
+
+@pytest.fixture
+def expenses(relocate):
+    return relocate(financials, 'EXPENSES_FILE')
+
+
+def upload(client, text, filename='statement.csv', **form):
+    data = {'file': (io.BytesIO(text.encode()), filename), **form}
+    return client.post('/api/financials/expenses/import', data=data,
+                       content_type='multipart/form-data')
+
+
+@pytest.mark.parametrize('sign', ['negative', 'positive'])
+def test_debit_credit_columns_ignore_sign(client, expenses, sign):
+    r = upload(client, 'Date,Description,Debit,Credit\n'
+                       '2026-03-01,KROGER #123,42.10,\n'
+                       '2026-03-02,PAYMENT THANK YOU,,500.00\n', sign=sign)
+    body = r.get_json()
+    assert r.status_code == 201
+    assert (body['imported'], body['skipped']) == (1, 1)
+    assert storage.load(expenses, None)['expenses'][0]['amount'] == 42.10
+
+
+def test_amount_column_takes_sign(client, expenses):
+    text = 'Date,Description,Amount\n2026-03-01,KROGER #123,42.10\n2026-03-02,REFUND,-5.00\n'
+    assert upload(client, text, sign='negative').get_json()['imported'] == 1
+    body = upload(client, text, sign='positive').get_json()
+    assert (body['imported'], body['skipped']) == (1, 1)
+    assert sorted(e['amount'] for e in storage.load(expenses, None)['expenses']) == [5.0, 42.10]
+
+
+@pytest.mark.parametrize('text, category', [
+    ('SHELL OIL 57442', 'transportation'),
+    ('Marshell Furniture', None),
+    ('UBER *TRIP HELP.UBER.COM', 'transportation'),
+    ('UBER EATS', 'food'),
+    ('UBEREATS PENDING', 'food'),
+    ('COSTCO GAS #1097', 'transportation'),
+    ('COSTCO WHSE #1097', 'food'),
+    ('Energy drink at Kroger', 'food'),
+    ('CONSUMERS ENERGY', 'utilities'),
+    ('Waterford Crystal', None),
+    ('CITY WATER DEPT', 'utilities'),
+    ('Refuel Cafe', None),
+    ('GITHUB SPONSORS', 'subscriptions'),
+])
+def test_classify(text, category):
+    assert financials._classify(text).get('category') == category
+
+
+CSV = ('Date,Description,Amount\n'
+       '03/01/2026,KROGER #123,-42.10\n'
+       '03/01/2026,KROGER #123,-42.10\n'
+       '03/02/2026,SHELL OIL,-30.00\n'
+       '03/03/2026,PAYMENT THANK YOU,500.00\n'
+       'not a date,SOMETHING,-1.00\n')
+
+
+def test_import_csv(client, expenses):
+    r = upload(client, CSV, rewardCard=next(iter(financials.REWARD_CARDS)))
+    body = r.get_json()
+    assert r.status_code == 201
+    assert (body['imported'], body['duplicates'], body['skipped']) == (3, 0, 1)
+    assert body['errors'] == [{'line': 6, 'error': "unrecognised date 'not a date'"}]
+    assert body['byCategory'] == {'food': 84.2, 'transportation': 30.0}
+    assert body['partial'] is False
+    rows = storage.load(expenses, None)['expenses']
+    assert [e['date'] for e in rows] == ['2026-03-01', '2026-03-01', '2026-03-02']
+
+
+def test_reimport_skips_duplicates(client, expenses):
+    upload(client, CSV)
+    # An overlapping statement: one Kroger line repeats, one is a new same-day repeat
+    r = upload(client, CSV + '03/01/2026,KROGER #123,-42.10\n03/04/2026,MEIJER,-10.00\n')
+    body = r.get_json()
+    assert (body['imported'], body['duplicates']) == (2, 3)
+    assert len(storage.load(expenses, None)['expenses']) == 5
+
+
+def test_dry_run_writes_nothing(client, expenses):
+    body = upload(client, CSV, dryRun='1').get_json()
+    assert body['imported'] == 3 and body['dryRun'] is True
+    assert storage.load(expenses, None) is None
+
+
+def test_import_ofx(client, expenses):
+    ofx = '\n'.join([
+        'OFXHEADER:100', 'DATA:OFXSGML', '', '<OFX>', '<BANKTRANLIST>',
+        '<STMTTRN>', '<TRNTYPE>DEBIT', '<DTPOSTED>20260301120000[-5:EST]', '<TRNAMT>-12.50',
+        '<FITID>A1', '<NAME>NETFLIX.COM', '</STMTTRN>',
+        '<STMTTRN>', '<TRNTYPE>CREDIT', '<DTPOSTED>20260302', '<TRNAMT>100.00',
+        '<FITID>A2', '<NAME>DEPOSIT', '</STMTTRN>',
+        '</BANKTRANLIST>', '</OFX>',
+    ])
+    body = upload(client, ofx, filename='statement.qfx').get_json()
+    assert (body['imported'], body['skipped']) == (1, 1)
+    [row] = storage.load(expenses, None)['expenses']
+    assert (row['date'], row['amount'], row['category'], row['externalId']) == \
+        ('2026-03-01', 12.5, 'subscriptions', 'A1')
+
+
+def test_unreadable_tail_is_partial(client, expenses, monkeypatch):
+    monkeypatch.setattr(financials, 'IMPORT_BATCH', 1)
+    text = CSV + '03/05/2026,"' + 'x' * 200000 + '",-1.00\n03/06/2026,ALDI,-5.00\n'
+    r = upload(client, text)
+    body = r.get_json()
+    assert r.status_code == 201
+    assert body['partial'] is True and 'field limit' in body['readError']
+    assert body['imported'] == 3
+    assert len(storage.load(expenses, None)['expenses']) == 3
+
+
+def test_unreadable_file_is_rejected(client, expenses):
+    r = upload(client, 'foo,bar\n1,2\n')
+    assert r.status_code == 400
+    assert storage.load(expenses, None) is None
+
+
+def test_csv_and_ofx_exports_of_a_line_dedupe(client, expenses):
+    upload(client, 'Date,Description,Amount\n03/05/2026,AT&T <WIRELESS>,-80.00\n')
+    ofx = '\n'.join([
+        'OFXHEADER:100', 'DATA:OFXSGML', '', '<OFX>', '<BANKTRANLIST>',
+        '<STMTTRN>', '<DTPOSTED>20260305', '<TRNAMT>-80.00', '<FITID>B1',
+        '<NAME>AT&amp;T &lt;WIRELESS&gt;', '</STMTTRN>',
+        '</BANKTRANLIST>', '</OFX>',
+    ])
+    body = upload(client, ofx, filename='statement.ofx').get_json()
+    assert (body['imported'], body['duplicates']) == (0, 1)
+    [row] = storage.load(expenses, None)['expenses']
+    assert (row['description'], row['category']) == ('AT&T <WIRELESS>', 'utilities')
+
+
+def test_unknown_classification_is_rejected(client, expenses):
+    assert upload(client, CSV, classification='corporate').status_code == 400
+    assert storage.load(expenses, None) is None
+    r = client.post('/api/financials/expenses', json={'amount': 5, 'classification': 'corporate'})
+    assert r.status_code == 400
+    with pytest.raises(ValueError):
+        financials._compile_rules([('acme', {'category': 'other', 'classification': 'corporate'})])
@@ -0,0 +1,55 @@
+import pytest
+
+from blueprints import financials, storage
+
+
+@pytest.fixture
+def expenses(relocate):
+    path = relocate(financials, 'EXPENSES_FILE')
+    rows = [
+        {'id': 'a', 'date': '2026-03-01', 'amount': 10, 'category': 'food', 'classification': 'personal'},
+        {'id': 'b', 'date': '2026-03-15', 'amount': 5, 'category': 'food', 'classification': 'business'},
+        {'id': 'c', 'date': '2026-04-02', 'amount': 7, 'category': 'housing', 'classification': 'personal'},
+        {'id': 'd', 'date': None, 'amount': 100, 'category': 'other', 'classification': 'personal'},
+        {'id': 'e', 'amount': 50, 'category': 'other', 'classification': 'personal'},
+    ]
+    storage.put_rows(path, [(r['id'], r) for r in rows])
+    return path
+
+
+@pytest.mark.parametrize('month', ['2026-03', '2026-03-15'])
+def test_month_or_date(client, expenses, month):
+    body = client.get('/api/financials/expenses/summary?month=' + month).get_json()
+    assert body['month'] == '2026-03'
+    assert (body['total'], body['businessTotal'], body['personalTotal']) == (15, 5, 10)
+
+
+def test_year_prefix_merges_months(client, expenses):
+    body = client.get('/api/financials/expenses/summary?month=2026').get_json()
+    assert body['byCategory'] == {'food': 15, 'housing': 7}
+
+
+def test_undated_expenses_are_left_out(client, expenses):
+    assert '' in storage.aggregate(expenses, 'months')
+    assert 'None' not in storage.aggregate(expenses, 'months')
+    body = client.get('/api/financials/expenses/summary?month=2026').get_json()
+    assert 'other' not in body['byCategory']
+
+
+@pytest.mark.parametrize('month, ids', [
+    ('2026-03', ['b', 'a']),
+    ('2026-03-15', ['b', 'a']),
+    ('2026', ['c', 'b', 'a']),
+    ('2025', []),
+])
+def test_list_by_month_or_year(client, expenses, month, ids):
+    body = client.get('/api/financials/expenses?month=' + month).get_json()
+    assert [e['id'] for e in body['expenses']] == ids
+
+
+@pytest.mark.parametrize('url', ['/api/financials/expenses', '/api/financials/expenses/summary'])
+@pytest.mark.parametrize('month', ['2026-3', '2026-13', '26', 'None', '2026-03x'])
+def test_malformed_month_is_rejected(client, expenses, url, month):
+    r = client.get(url + '?month=' + month)
+    assert r.status_code == 400
+    assert 'YYYY-MM or YYYY' in r.get_data(as_text=True)
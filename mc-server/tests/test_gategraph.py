@@ -0,0 +1,45 @@
+import pytest
+
+from blueprints import financials, gategraph, storage
+
+
+def gate(gid, *deps, status='not-started'):
+    return {'id': gid, 'dependencies': list(deps), 'status': status}
+
+
+@pytest.mark.parametrize('ids, bad', [
+    (['a', 'b', 'a'], ['a']),
+    (['a', ''], ['']),
+    (['a', None], [None]),
+])
+def test_duplicate_or_empty_ids_are_rejected(ids, bad):
+    with pytest.raises(gategraph.GateIdError) as e:
+        gategraph.build([gate(i) for i in ids])
+    assert e.value.ids == bad
+
+
+def test_falsy_ids_stay_on_the_critical_path():
+    graph = gategraph.build([gate(0), gate(1, 0), gate(2, 1)])
+    assert gategraph.critical_path(graph, 2) == [0, 1, 2]
+    gategraph.set_status(graph, 1, gategraph.DONE)
+    assert gategraph.critical_path(graph, 2) == [0, 2]
+
+
+@pytest.fixture
+def gates(relocate):
+    path = relocate(financials, 'GATES_FILE')
+    storage.save(path, {'gates': [gate('a'), gate('b', 'a')]})
+    return path
+
+
+def test_create_refuses_an_existing_id(client, gates):
+    r = client.post('/api/financials/gates', json={'id': 'a', 'label': 'Again'})
+    assert r.status_code == 400
+    assert [g['id'] for g in client.get('/api/financials/gates').get_json()['gates']] == ['a', 'b']
+
+
+def test_hand_edited_duplicates_are_reported(client, gates):
+    storage.save(gates, {'gates': [gate('a'), gate('b', 'a'), gate('a')]})
+    r = client.get('/api/financials/gates')
+    assert r.status_code == 409
+    assert r.get_json()['ids'] == ['a']
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from blueprints import health, storage
+
+
+@pytest.fixture
+def stores(relocate):
+    for name in ('WEIGHT_FILE', 'ROWING_FILE', 'HABITS_FILE', 'HABIT_LOG_FILE', 'FAMILY_SCORE_FILE'):
+        relocate(health, name)
+
+
+def day(offset):
+    return (datetime.now() - timedelta(days=offset)).strftime('%Y-%m-%d')
+
+
+def test_summary_counts_this_week_only(client, stores):
+    week_start = datetime.now().weekday()
+    for i, (habit, offset) in enumerate([('h1', 0), ('h1', week_start), ('h2', 0),
+                                         ('h1', week_start + 1), ('h2', 400)]):
+        storage.put_row(health.HABIT_LOG_FILE, 'e%d' % i, {'id': 'e%d' % i, 'habitId': habit, 'date': day(offset)})
+    for i, (meters, offset) in enumerate([(2000, 1), (3000, 6), (5000, 8), (1000, 40)]):
+        storage.put_row(health.ROWING_FILE, 'r%d' % i, {'id': 'r%d' % i, 'meters': meters, 'date': day(offset)})
+
+    body = client.get('/api/health/summary').get_json()
+    assert body['habitsThisWeek']['byHabit'] == {'h1': 2, 'h2': 1}
+    assert body['habitsThisWeek']['completed'] == 3
+    assert body['rowingThisWeek'] == {'sessions': 2, 'totalMeters': 5000}
+    assert body['rowingThisMonth'] == {'sessions': 3, 'totalMeters': 10000}
+
+
+def test_rowing_totals_follow_replace_and_delete(client, stores):
+    for i, meters in enumerate([2000, 3000]):
+        storage.put_row(health.ROWING_FILE, 'r%d' % i, {'id': 'r%d' % i, 'meters': meters, 'date': day(1)})
+    assert health._rowing_since(day(7)) == (2, 5000)
+
+    storage.put_row(health.ROWING_FILE, 'r0', {'id': 'r0', 'meters': 2500, 'date': day(1)})
+    assert health._rowing_since(day(7)) == (2, 5500)
+    storage.delete_row(health.ROWING_FILE, 'r1')
+    assert health._rowing_since(day(7)) == (1, 2500)
+    storage.put_row(health.ROWING_FILE, 'r2', {'id': 'r2', 'meters': 1000, 'date': day(0)})
+    assert health._rowing_since(day(7)) == (2, 3500)
+    assert health._rowing_since(day(0)) == (1, 1000)
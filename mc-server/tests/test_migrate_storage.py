@@ -0,0 +1,56 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+from blueprints import storage, health
+
+_spec = importlib.util.spec_from_file_location(
+    'migrate_storage', os.path.join(os.path.dirname(__file__), '..', 'scripts', 'migrate_storage.py'))
+migrate_storage = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(migrate_storage)
+
+
+@pytest.fixture
+def sqlite_db(monkeypatch, tmp_path):
+    """Switch storage to a fresh sqlite database for the test; -> its path."""
+    db = str(tmp_path / 'store.db')
+    monkeypatch.setattr(storage, '_engine', storage.SqliteEngine(db))
+    monkeypatch.setattr(storage, '_cache', {})
+    return db
+
+
+def test_migrate_replays_journal(relocate, request):
+    path = relocate(health, 'HABIT_LOG_FILE')
+    storage.save(path, {'entries': [{'id': 'a', 'date': '2026-03-01', 'habitId': 'h1'}]})
+    storage.put_row(path, 'b', {'id': 'b', 'date': '2026-03-02', 'habitId': 'h1'})
+    storage.put_row(path, 'c', {'id': 'c', 'date': '2026-03-03', 'habitId': 'h2'})
+    storage.delete_row(path, 'a')
+    assert os.path.getsize(path + '.journal')
+
+    sqlite_db = request.getfixturevalue('sqlite_db')
+
+    assert migrate_storage.migrate([path]) == [path]
+
+    rows = storage.load(path, None)['entries']
+    assert sorted(r['id'] for r in rows) == ['b', 'c']
+    assert migrate_storage.database_has_data(sqlite_db)
+
+
+def test_migrate_skips_missing_store(sqlite_db, tmp_path):
+    assert migrate_storage.migrate([str(tmp_path / 'absent.json')]) == []
+    assert not migrate_storage.database_has_data(sqlite_db)
+
+
+def test_family_score_document_moves_to_table(relocate, sqlite_db):
+    path = relocate(health, 'FAMILY_SCORE_FILE')
+    doc = {'entries': [{'id': 'f1', 'date': '2026-03-01', 'score': 4}]}
+    conn = storage.engine()._conn()
+    conn.execute('INSERT INTO documents (path, body) VALUES (?, ?)', (path, json.dumps(doc)))
+
+    assert migrate_storage.migrate_family_score(sqlite_db)
+    assert [r['id'] for r in storage.load(path, None)['entries']] == ['f1']
+    assert conn.execute('SELECT count(*) FROM documents WHERE path = ?', (path,)).fetchone()[0] == 0
+    # A second run finds nothing left to move
+    assert not migrate_storage.migrate_family_score(sqlite_db)
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from blueprints import financials, projection, storage
+
+
+def streams():
+    return [
+        {'id': 'a', 'monthlyAmount': 1000, 'startMonth': '2026-03', 'endMonth': None},
+        {'id': 'b', 'monthlyAmount': 500, 'startMonth': 'Aug 2026', 'endMonth': None},
+        {'id': 'c', 'monthlyAmount': 200},
+    ]
+
+
+def test_malformed_stream_is_skipped():
+    proj = projection.project([{'streamIds': ['a', 'b'], 'taxRate': 0}], streams(), '2026-01', 4)
+    assert proj['grossRevenue'][0].tolist() == [0, 0, 1000, 1000]
+
+
+def test_missing_start_month_defaults():
+    revenue, _ = projection.stream_revenue(streams(), '2025-11', 4)
+    assert revenue[2].tolist() == [0, 0, 200, 200]
+
+
+def test_simulate_skips_malformed_stream():
+    result = projection.simulate({'streamIds': ['b'], 'taxRate': 0, 'monthlyExpenses': 0},
+                                 streams(), '2026-01', 12, paths=100, seed=1)
+    assert np.all(np.array(result['mean']) == 0)
+
+
+def test_revenue_months_are_validated(client, relocate):
+    relocate(financials, 'REVENUE_FILE')
+    r = client.post('/api/financials/revenue', json={'name': 'x', 'startMonth': 'Aug 2026'})
+    assert r.status_code == 400
+    r = client.post('/api/financials/revenue', json={'name': 'x', 'startMonth': '2026-08'})
+    assert r.status_code == 201
+    r = client.put('/api/financials/revenue/' + r.get_json()['id'], json={'endMonth': '2026-13'})
+    assert r.status_code == 400
+
+
+class BrokenPool:
+    shut = False
+
+    def map(self, *args):
+        raise projection.BrokenProcessPool("worker died")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut = True
+
+
+def test_broken_pool_falls_back_and_resets(monkeypatch):
+    pool = BrokenPool()
+    monkeypatch.setattr(projection, '_pool', pool)
+    scenario = {'streamIds': ['a'], 'taxRate': 0.2, 'monthlyExpenses': 800}
+    args = (scenario, streams(), '2026-01', 12)
+    paths = projection.SIM_CHUNK * 2
+    result = projection.simulate(*args, paths=paths, seed=7, workers=2)
+    assert result == projection.simulate(*args, paths=paths, seed=7, workers=1)
+    assert pool.shut and projection._pool is None
+
+
+@pytest.fixture
+def scenario(relocate):
+    relocate(financials, 'REVENUE_FILE')
+    path = relocate(financials, 'SCENARIOS_FILE')
+    storage.save(path, {'scenarios': [{'id': 's1', 'name': 'Base', 'streamIds': [],
+                                       'taxRate': 0, 'monthlyExpenses': 100}]})
+
+
+def test_unseeded_simulation_is_never_answered_304(client, scenario):
+    url = '/api/financials/scenarios/s1/simulate?paths=50'
+    first = client.get(url)
+    assert first.status_code == 200 and isinstance(first.get_json()['seed'], int)
+    again = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 200
+    assert again.get_json()['seed'] != first.get_json()['seed']
+
+
+def test_seeded_simulation_is_cacheable(client, scenario):
+    url = '/api/financials/scenarios/s1/simulate?paths=50&seed=7'
+    first = client.get(url)
+    assert first.get_json()['seed'] == 7
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert client.get(url.replace('seed=7', 'seed=-1')).status_code == 400
@@ -0,0 +1,60 @@
+import pytest
+
+from blueprints import storage
+
+ROWS = 'rows.json'
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    path = str(tmp_path / ROWS)
+    monkeypatch.setitem(storage._tables, path, None)   # unregistered again afterwards
+    storage.register_table(path, 'rows', journal=False)
+    yield path
+    storage.invalidate(path)
+
+
+@pytest.fixture
+def same_stat(monkeypatch):
+    """Every stat() of a store looks the same, as when a freed inode is reused
+    within one mtime tick by a write of the same size."""
+    real_stat = storage.os.stat
+
+    class Stat:
+        st_mtime_ns, st_size, st_ino, st_mode = 1, 2, 3, 0o100644
+
+    def stat(path, *args, **kwargs):
+        return Stat if str(path).endswith(ROWS) else real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(storage.os, 'stat', stat)
+
+
+def test_same_size_writes_get_new_versions(table, same_stat):
+    storage.save(table, [{'id': 'a', 'n': 1}])
+    seen = storage.store_version(table)
+    assert storage.load(table, None) == [{'id': 'a', 'n': 1}]
+
+    storage.save(table, [{'id': 'a', 'n': 2}])
+    assert storage.store_version(table) != seen
+    assert storage.load(table, None) == [{'id': 'a', 'n': 2}]
+
+
+def test_every_row_write_bumps_the_version(table, same_stat):
+    versions = [storage.store_version(table)]
+    storage.put_row(table, 'a', {'id': 'a', 'n': 1})
+    versions.append(storage.store_version(table))
+    storage.put_row(table, 'a', {'id': 'a', 'n': 2})
+    versions.append(storage.store_version(table))
+    storage.delete_row(table, 'a')
+    versions.append(storage.store_version(table))
+    assert len(set(versions)) == 4
+
+
+def test_journal_appends_report_their_versions(table, same_stat):
+    storage._tables[table]['journal'] = True
+    try:
+        storage.put_row(table, 'a', {'id': 'a', 'date': '2026-03-01'})
+        before, after = storage.engine().put_row(table, 'b', {'id': 'b', 'date': '2026-03-02'})
+        assert before != after == storage.store_version(table)
+    finally:
+        storage._tables[table]['journal'] = False
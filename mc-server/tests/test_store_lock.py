@@ -0,0 +1,56 @@
+import fcntl
+
+import pytest
+from flask import Blueprint, Flask, jsonify
+
+from blueprints import health
+from blueprints.shared import serialize_writes, locks_own_writes
+
+
+def lock_is_free(path):
+    """True if nothing else holds the flock on path."""
+    with open(path, 'a') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+
+@pytest.fixture
+def app(tmp_path):
+    lock_path = str(tmp_path / '.lock')
+    bp = Blueprint('locktest', __name__)
+    store_lock = serialize_writes(bp, lock_path)
+
+    @bp.route('/plain', methods=['POST'])
+    def plain():
+        with store_lock():   # already held: must not deadlock
+            return jsonify(free=lock_is_free(lock_path))
+
+    @bp.route('/network', methods=['POST'])
+    @locks_own_writes
+    def network():
+        before = lock_is_free(lock_path)
+        with store_lock():
+            during = lock_is_free(lock_path)
+        return jsonify(before=before, during=during)
+
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    return app.test_client()
+
+
+def test_mutating_request_holds_lock(app):
+    assert app.post('/plain').get_json() == {'free': False}
+
+
+def test_locks_own_writes_takes_lock_only_around_writes(app):
+    assert app.post('/network').get_json() == {'before': True, 'during': False}
+
+
+def test_habits_seed_on_get(client, relocate):
+    relocate(health, 'HABITS_FILE')
+    body = client.get('/api/health/habits').get_json()
+    assert len(body['habits']) == len(health.DEFAULT_HABITS)
+    assert len(client.get('/api/health/habits').get_json()['habits']) == len(health.DEFAULT_HABITS)
@@ -0,0 +1,67 @@
+import pytest
+
+from blueprints import tasks
+from blueprints.shared import parse_ical_todos
+
+REOPENED = '\r\n'.join([
+    'BEGIN:VCALENDAR', 'BEGIN:VTODO', 'UID:t1', 'SUMMARY:Reopened',
+    'STATUS:NEEDS-ACTION', 'COMPLETED:20260301T120000Z', 'END:VTODO', 'END:VCALENDAR',
+])
+
+
+@pytest.fixture
+def calendar(monkeypatch):
+    """Serve tasks from a fixed list; records the comp-filters asked for."""
+    filters = []
+
+    def iter_todos(calendar, comp_filter=None):
+        filters.append(comp_filter)
+        for todo in parse_ical_todos(REOPENED):
+            yield 'href', 'etag', todo
+
+    monkeypatch.setattr(tasks, 'nextcloud_configured', lambda: True)
+    monkeypatch.setattr(tasks, 'iter_todos', iter_todos)
+    return filters
+
+
+def test_reopened_task_is_incomplete(client, calendar):
+    r = client.get('/api/tasks?status=incomplete')
+    assert [t['uid'] for t in r.get_json()['tasks']] == ['t1']
+    assert 'COMPLETED' not in calendar[0]
+
+
+def test_completed_filter_is_pushed_down(client, calendar):
+    r = client.get('/api/tasks?status=completed')
+    assert r.get_json()['tasks'] == []
+    assert '<C:text-match>COMPLETED</C:text-match>' in calendar[0]
+
+
+@pytest.mark.parametrize('limit', ['abc', '-1', '0', '501', '1.5'])
+def test_bad_limit_is_rejected(client, calendar, limit):
+    assert client.get('/api/tasks?limit=' + limit).status_code == 400
+
+
+def test_batch_keeps_op_status_and_one_calendar(client, monkeypatch):
+    calls = []
+
+    def update(uid, data, etag=None):
+        calls.append(('update', data['calendar']))
+        return {"error": "CalDAV PUT failed", "status": 500, "body": ""}, 502
+
+    def delete(uid, calendar, etag=None):
+        calls.append(('delete', calendar))
+        return {"deleted": True, "uid": uid}, 200
+
+    monkeypatch.setattr(tasks, 'nextcloud_configured', lambda: True)
+    monkeypatch.setattr(tasks, '_update_task', update)
+    monkeypatch.setattr(tasks, '_delete_task', delete)
+    monkeypatch.setitem(tasks.CONFIG, 'tasks_batch_workers', 1)
+    r = client.post('/api/tasks/batch', json={'operations': [
+        {'op': 'update', 'uid': 'a', 'calendar': 'work', 'data': {'summary': 'x', 'calendar': 'home'}},
+        {'op': 'delete', 'uid': 'b', 'calendar': 'work'},
+    ]})
+    body = r.get_json()
+    assert [(x.get('status'), x['httpStatus']) for x in body['results']] == \
+        [(500, 502), (None, 200)]
+    assert body['failed'] == 1
+    assert calls == [('update', 'work'), ('delete', 'work')]
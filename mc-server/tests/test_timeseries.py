@@ -0,0 +1,17 @@
+from blueprints import health, storage, timeseries
+
+
+def test_series_reads_a_snapshot_of_the_columns(relocate):
+    path = relocate(health, 'WEIGHT_FILE')
+    for day, weight in (('2026-03-01', 180), ('2026-03-02', 179)):
+        storage.put_row(path, day, {'id': day, 'date': day, 'weight': weight, 'unit': 'lbs'})
+    cols = storage.snapshot_aggregate(path, 'columns', timeseries.copy_columns)
+
+    # A later write folds into the shared columns, not into the snapshot
+    storage.put_row(path, 'late', {'id': 'late', 'date': '2026-03-03', 'weight': 178, 'unit': 'lbs'})
+    assert len(storage.aggregate(path, 'columns')['day']) == 3
+    assert {len(col) for col in cols.values()} == {2}
+
+    out = timeseries.series(cols, 'weight')
+    assert out['dates'] == ['2026-03-01', '2026-03-02']
+    assert out['values'] == [180, 179]
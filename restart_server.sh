@@ -1,2 +1,3 @@
 #!/bin/bash
-ssh -T -o BatchMode=yes -o StrictHostKeyChecking=no root@192.168.0.99 "pkill -f command_server.py && nohup python3 /root/mc-server/command_server.py > /root/mc-server/server.log 2>&1 &"
+# Graceful reload when gunicorn is running, otherwise (re)start it.
+ssh -T -o BatchMode=yes -o StrictHostKeyChecking=no root@192.168.0.99 "cd /root/mc-server && if [ -f gunicorn.pid ] && kill -HUP \$(cat gunicorn.pid) 2>/dev/null; then echo 'command server reloaded'; else pkill -f command_server.py; nohup gunicorn -c gunicorn.conf.py command_server:app > /root/mc-server/server.log 2>&1 & fi"